@@ -11,35 +11,37 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-from src.paper_state import get_paper_state
-from components.sidebar import render_sidebar
-from components import stage_topic, stage_overview, stage_structure, stage_draft, stage_finalize
+from src.st_session import autosave_paper_state, get_paper_state
+from src.warmup import timed_import
 
 # 사이드바
-render_sidebar()
+timed_import("components.sidebar").render_sidebar()
 
-# 메인 영역 - 현재 단계에 맞는 페이지 렌더링
+# 메인 영역 - 현재 단계에 맞는 페이지 렌더링 (단계 모듈은 처음 열릴 때 import)
 ps = get_paper_state()
 
-STAGE_RENDERERS = {
-    "topic": stage_topic.render,
-    "overview": stage_overview.render,
-    "structure": stage_structure.render,
-    "draft": stage_draft.render,
-    "finalize": stage_finalize.render,
+STAGE_MODULES = {
+    "topic": "components.stage_topic",
+    "overview": "components.stage_overview",
+    "structure": "components.stage_structure",
+    "draft": "components.stage_draft",
+    "finalize": "components.stage_finalize",
 }
 
-renderer = STAGE_RENDERERS.get(ps.current_stage, stage_topic.render)
-renderer()
+timed_import(STAGE_MODULES.get(ps.current_stage, STAGE_MODULES["topic"])).render()
 
 # 하단 대화형 도우미
 st.divider()
 with st.expander("대화형 도우미", expanded=False):
     st.markdown("논문 작성 과정에서 궁금한 점을 질문하세요.")
 
-    from src.llm_client import call_llm, is_llm_configured
-    from src.prompts import CHAT_PROMPT, SYSTEM_PROMPTS
-    from src.paper_state import add_chat, STAGE_LABELS, get_mode
+    from src import chat_memory
+    from src.prompts import SYSTEM_PROMPTS
+    from src.paper_state import STAGE_LABELS
+    from src.st_session import add_chat, call_llm, get_llm_config, get_mode, is_llm_configured, stream_llm
+
+    if ps.chat_summary:
+        st.caption(f"이전 대화 요약: {ps.chat_summary}")
 
     for msg in ps.chat_history[-10:]:
         with st.chat_message(msg["role"]):
@@ -47,26 +49,39 @@ with st.expander("대화형 도우미", expanded=False):
 
     user_input = st.chat_input("질문을 입력하세요...")
     if user_input:
-        add_chat("user", user_input)
         with st.chat_message("user"):
             st.markdown(user_input)
 
         if is_llm_configured():
-            with st.spinner("답변 생성 중..."):
-                context = f"주제: {ps.topic}\n개요: {ps.overview[:200]}..." if ps.overview else f"주제: {ps.topic}"
-                prompt = CHAT_PROMPT.format(
-                    topic=ps.topic or "(미설정)",
-                    stage=STAGE_LABELS.get(ps.current_stage, ps.current_stage),
-                    context=context,
-                    question=user_input,
-                )
-                answer = call_llm(SYSTEM_PROMPTS[get_mode()], prompt)
-                if answer:
-                    add_chat("assistant", answer)
-                    with st.chat_message("assistant"):
-                        st.markdown(answer)
+            # 오래된 대화가 충분히 쌓였으면 먼저 요약에 접는다 (몇 턴에 한 번).
+            pending = chat_memory.summary_prompt(ps)
+            if pending:
+                summary_request, folded = pending
+                with st.spinner("이전 대화 요약 중..."):
+                    summary = call_llm(SYSTEM_PROMPTS[get_mode()], summary_request, template="chat_summary")
+                if summary:
+                    chat_memory.apply_summary(ps, summary, folded)
+
+            cfg = get_llm_config()
+            prompt = chat_memory.chat_prompt(
+                ps,
+                STAGE_LABELS.get(ps.current_stage, ps.current_stage),
+                user_input,
+                budget=cfg.context_budget,
+                model=cfg.model,
+            )
+            add_chat("user", user_input)
+            with st.chat_message("assistant"):
+                stream = stream_llm(SYSTEM_PROMPTS[get_mode()], prompt, template="chat")
+                answer = st.write_stream(stream)
+            if answer and stream.completed:
+                add_chat("assistant", answer)
         else:
+            add_chat("user", user_input)
             msg = "LLM API가 설정되지 않았습니다. 사이드바에서 API Key를 입력해 주세요."
             add_chat("assistant", msg)
             with st.chat_message("assistant"):
                 st.info(msg)
+
+# 자동 저장 (바뀐 필드만 기록)
+autosave_paper_state()
@@ -0,0 +1,236 @@
+"""여러 주제의 리뷰 논문을 화면 없이 한 번에 생성하는 배치 실행기.
+
+    python batch.py topics.jsonl --out output/ --provider OpenAI --jobs 3
+
+topics.jsonl은 한 줄에 주제 하나씩 JSON 객체를 담는다. "topic"만 필수이고, 그 밖의 키 중
+PaperState 필드(mode, research_question, scope, keywords, paper_type, ...)는 그대로 초기값이 된다.
+"id"를 주지 않으면 소유자(--owner), 주제, 모드로 만든 고정 id를 쓴다.
+
+    {"topic": "대규모 언어 모델의 환각 현상", "mode": "quick"}
+    {"id": "rag-survey", "topic": "검색 증강 생성", "research_question": "RAG는 환각을 줄이는가?"}
+
+진행 상황은 단계/섹션이 끝날 때마다 논문 저장소(PAPER_DB)에 기록된다. 같은 명령을 다시 실행하면
+끝난 논문은 건너뛰고 멈춘 논문은 남은 단계부터 이어서 진행한다. 저장된 논문은 앱에서
+?user=<owner> 로 열어 이어서 편집할 수 있다. 다른 소유자의 논문 id면 이어 쓰지 않고 실패로 처리한다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+
+from src.async_bridge import run_async
+from src.config import DEFAULT_MAX_CONCURRENCY, LLMConfig
+from src.llm_client import PROVIDERS, check_endpoints, default_model, endpoint_status, llm_labels
+from src.paper_export import build_docx, build_markdown
+from src.paper_state import MODE_INFO, PaperState
+from src.pipeline import is_complete, run_pipeline
+from src.references import import_file
+from src.routing import DEFAULT_FAST_ROUTES, ROUTE_LABELS
+from src.storage import get_store
+from src.telemetry import telemetry
+from src.tokens import DEFAULT_CONTEXT_BUDGET
+
+# 계측(src.telemetry)에서 이 실행의 호출을 묶는 세션 라벨.
+BATCH_SESSION = "batch"
+
+
+def _log(message: str) -> None:
+    print(f"{time.strftime('%H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+def _paper_id(job: dict, owner: str) -> str:
+    if job.get("id"):
+        return str(job["id"])
+    return hashlib.sha1(f"{owner}\n{job.get('mode', '')}\n{job['topic']}".encode()).hexdigest()[:12]
+
+
+def _log_telemetry() -> None:
+    """LLM 호출 수, 토큰, 추정 비용, 프롬프트 캐시 사용량과 단계별 지연 시간을 출력한다 (src.telemetry)."""
+    totals = telemetry.totals(BATCH_SESSION)
+    if not totals:
+        return
+    cached = totals["cache_read_tokens"] / totals["input_tokens"] * 100 if totals["input_tokens"] else 0.0
+    _log(f"LLM 호출 {totals['calls']}회 (실패 {totals['errors']}), 입력 {totals['input_tokens']:,} / "
+         f"출력 {totals['output_tokens']:,} 토큰, 추정 비용 ${totals['cost']:.2f}")
+    _log(f"프롬프트 캐시: 읽기 {totals['cache_read_tokens']:,} 토큰 (입력의 {cached:.0f}%), "
+         f"쓰기 {totals['cache_write_tokens']:,} 토큰")
+    for s in telemetry.stage_stats(BATCH_SESSION):
+        if s["p50"] is not None:
+            _log(f"  {s['stage']:<9} {s['calls']:>4}회  p50 {s['p50']:6.1f}초  p95 {s['p95']:6.1f}초")
+    for m in telemetry.model_stats(BATCH_SESSION):
+        tier = " (빠른 모델)" if m["tier"] == "fast" else ""
+        _log(f"  {m['model']}{tier}: {m['calls']}회, 입력 {m['input_tokens']:,} / 출력 {m['output_tokens']:,} 토큰, "
+             f"${m['cost']:.2f}")
+
+
+def _log_endpoints(status: list[dict]) -> None:
+    for e in status:
+        state = "정상" if e["up"] else f"제외 ({e['error'][:80]})"
+        latency = f"{e['latency']:.2f}초" if e["latency"] is not None else "-"
+        _log(f"  {e['url']} (가중치 {e['weight']:g}): {state}, 호출 {e['calls']}회, 최근 지연 {latency}")
+
+
+def load_jobs(path: str, default_mode: str, owner: str) -> list[dict]:
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if not str(job.get("topic", "")).strip():
+                raise SystemExit(f"{path}:{lineno}: 'topic'이 없습니다.")
+            job.setdefault("mode", default_mode)
+            if job["mode"] not in MODE_INFO:
+                raise SystemExit(f"{path}:{lineno}: 알 수 없는 모드 '{job['mode']}'")
+            job["paper_id"] = _paper_id(job, owner)
+            jobs.append(job)
+    return jobs
+
+
+def _write_outputs(ps: PaperState, out_dir: str, formats: list[str]) -> list[str]:
+    written = []
+    if "md" in formats:
+        path = os.path.join(out_dir, f"{ps.paper_id}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(build_markdown(ps))
+        written.append(path)
+    if "docx" in formats:
+        try:
+            data = build_docx(ps)
+        except ImportError:
+            _log("python-docx가 없어 .docx 출력을 건너뜁니다 (pip install python-docx).")
+        else:
+            path = os.path.join(out_dir, f"{ps.paper_id}.docx")
+            with open(path, "wb") as f:
+                f.write(data.getbuffer())
+            written.append(path)
+    return written
+
+
+def _read_references(paths: list[str]) -> list[tuple[str, str]]:
+    files = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            files.append((os.path.basename(path), f.read()))
+    return files
+
+
+async def run_batch(jobs: list[dict], cfg: LLMConfig, args: argparse.Namespace) -> int:
+    """jobs를 최대 args.jobs개씩 동시에 처리하고, 실패한 논문 수를 반환한다."""
+    store = get_store()
+    semaphore = asyncio.Semaphore(max(1, args.jobs))
+    total = len(jobs)
+    failed = 0
+    reference_files = _read_references(args.references)
+
+    def checkpoint(ps: PaperState) -> None:
+        store.save(ps.paper_id, args.owner, ps.to_dict())
+
+    async def process(n: int, job: dict) -> None:
+        nonlocal failed
+        tag = f"[{n}/{total}] {job['paper_id']}"
+        owner = store.owner_of(job["paper_id"])
+        if owner not in (None, args.owner):
+            failed += 1
+            _log(f"{tag} 건너뜀: 다른 소유자('{owner}')의 논문입니다. id를 바꾸거나 --owner {owner}로 실행하세요.")
+            return
+        saved = None if args.restart else store.load(job["paper_id"], args.owner)
+        ps = PaperState.from_dict(saved or job)
+
+        if is_complete(ps):
+            _log(f"{tag} 이미 완료 — 결과 파일만 다시 씁니다")
+            _write_outputs(ps, args.out, args.format)
+            return
+
+        async with semaphore:
+            _log(f"{tag} 시작: {ps.topic}" + (f" (저장된 '{ps.current_stage}' 단계부터)" if saved else ""))
+            for name, text in reference_files:
+                added, _ = await asyncio.to_thread(import_file, ps.paper_id, text, name, store)
+                if added:
+                    _log(f"{tag} 참고문헌 {name}: {added}건 추가")
+            started = time.perf_counter()
+            try:
+                await run_pipeline(
+                    ps, cfg, checkpoint,
+                    on_stage=lambda _ps, stage: _log(f"{tag} {stage}"),
+                )
+            except Exception as e:
+                failed += 1
+                checkpoint(ps)
+                _log(f"{tag} 실패: {e}")
+                return
+            paths = _write_outputs(ps, args.out, args.format)
+            _log(f"{tag} 완료 ({time.perf_counter() - started:.0f}초) → {', '.join(paths)}")
+
+    await asyncio.gather(*(process(n, job) for n, job in enumerate(jobs, start=1)))
+    return failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="리뷰 논문 배치 생성 (Topic → Overview → Structure → Draft → Finalize)")
+    parser.add_argument("topics", help="주제 JSONL 파일")
+    parser.add_argument("--out", default="output", help="결과 파일 디렉터리 (기본: output)")
+    parser.add_argument("--format", nargs="+", choices=["md", "docx"], default=["md", "docx"])
+    parser.add_argument("--mode", choices=list(MODE_INFO), default="standard", help="JSONL에 mode가 없을 때의 기본 모드")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default="OpenAI")
+    parser.add_argument("--model", help="기본값: 제공자의 첫 번째 모델")
+    parser.add_argument("--fast-model", default="", help="가벼운 요청용 모델 (기본값: 제공자의 빠른 모델)")
+    parser.add_argument("--fast-routes", nargs="*", choices=list(ROUTE_LABELS), default=list(DEFAULT_FAST_ROUTES),
+                        metavar="ROUTE", help="빠른 모델로 보낼 요청 (src/routing.py). 값 없이 주면 모두 주 모델로 보낸다")
+    key_envs = [spec["api_key_env"] for spec in PROVIDERS.values() if spec.get("api_key_env")]
+    parser.add_argument("--api-key", help=f"기본값: 환경 변수 {' / '.join(dict.fromkeys(key_envs))} (Local은 선택)")
+    parser.add_argument("--base-url", nargs="+", metavar="URL",
+                        help='프록시/자체 호스팅 서버. 여러 개면 요청을 나눠 보낸다 ("URL 가중치" 형식 가능)')
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--jobs", type=int, default=2, help="동시에 진행할 논문 수")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="논문 하나당 동시 요청 수")
+    parser.add_argument("--context-budget", type=int, default=DEFAULT_CONTEXT_BUDGET)
+    parser.add_argument("--references", nargs="+", default=[], metavar="FILE",
+                        help="모든 논문의 참고문헌 라이브러리에 넣을 BibTeX/RIS 파일")
+    parser.add_argument("--no-cache", action="store_true", help="응답 캐시를 사용하지 않는다")
+    parser.add_argument("--owner", default="batch", help="저장소에 기록할 소유자 (앱에서 ?user=<owner>로 조회)")
+    parser.add_argument("--restart", action="store_true", help="저장된 진행 상황을 무시하고 처음부터 다시 생성")
+    args = parser.parse_args(argv)
+
+    key_env = PROVIDERS[args.provider].get("api_key_env", "")
+    api_key = args.api_key or (os.environ.get(key_env, "") if key_env else "")
+    if PROVIDERS[args.provider]["requires_key"] and not api_key.strip():
+        parser.error("API 키가 없습니다. --api-key" + (f" 또는 {key_env}" if key_env else "") + "를 지정하세요.")
+    if not PROVIDERS[args.provider]["requires_key"] and not args.base_url:
+        parser.error(f"{args.provider} 제공자는 --base-url이 필요합니다.")
+
+    cfg = LLMConfig(
+        provider=args.provider,
+        model=args.model or default_model(args.provider),
+        api_key=api_key,
+        base_url="\n".join(args.base_url) if args.base_url else None,
+        temperature=args.temperature,
+        max_concurrency=args.concurrency,
+        context_budget=args.context_budget,
+        use_cache=not args.no_cache,
+        fast_model=args.fast_model,
+        fast_routes=tuple(args.fast_routes),
+    )
+
+    jobs = load_jobs(args.topics, args.mode, args.owner)
+    os.makedirs(args.out, exist_ok=True)
+    _log(f"{len(jobs)}개 주제, 동시 {args.jobs}편 × 요청 {args.concurrency}개, {cfg.provider} / {cfg.model}")
+    if args.base_url and len(args.base_url) > 1:
+        _log_endpoints(check_endpoints(cfg))
+    with llm_labels(session=BATCH_SESSION):
+        failed = run_async(run_batch(jobs, cfg, args))
+    _log(f"완료 {len(jobs) - failed}편, 실패 {failed}편")
+    _log_telemetry()
+    if args.base_url and len(args.base_url) > 1:
+        _log_endpoints(endpoint_status(cfg))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
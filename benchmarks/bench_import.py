@@ -0,0 +1,77 @@
+"""모듈 import 시간 / 메모리 벤치마크.
+
+각 모듈을 새 인터프리터에서 import해 걸린 시간과 최대 RSS를 잰다. 코어(src.pipeline 등)는
+Streamlit 없이 가볍게 떠야 하고, 화면 어댑터(src.st_session)만 Streamlit 비용을 낸다.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 10 src.pipeline batch
+    python -m benchmarks.bench_import --top 15 components.stage_draft openai
+
+--top N을 주면 모듈마다 -X importtime 기준으로 누적 시간이 긴 하위 모듈 N개를 함께 보여준다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["src.llm_client", "src.paper_state", "src.pipeline", "src.st_session"]
+
+_PROBE = """
+import resource, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - t) * 1000
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{{elapsed:.1f}} {{rss:.1f}} {{int('streamlit' in sys.modules)}}")
+"""
+
+
+def measure(module: str) -> tuple[float, float, bool]:
+    """(import ms, 최대 RSS MB, streamlit 로드 여부)."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), float(out[1]), out[2] == "1"
+
+
+def breakdown(module: str, top: int) -> list[tuple[str, float]]:
+    """-X importtime 출력에서 누적 import 시간이 긴 모듈 top개 (이름, ms)."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="모듈별 하위 import 상위 N개 출력")
+    args = parser.parse_args()
+
+    print(f"{'module':<28} {'import ms (median)':>20} {'max RSS MB':>12} {'streamlit':>10}")
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        ms = statistics.median(r[0] for r in runs)
+        rss = statistics.median(r[1] for r in runs)
+        print(f"{module:<28} {ms:>20.1f} {rss:>12.1f} {'yes' if runs[0][2] else 'no':>10}")
+
+    for module in args.modules if args.top else []:
+        print(f"\n{module} — 누적 import 시간 상위 {args.top}개")
+        for name, ms in breakdown(module, args.top):
+            print(f"  {ms:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
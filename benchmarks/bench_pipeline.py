@@ -0,0 +1,151 @@
+"""파이프라인 종단 벤치마크 — 가짜 LLM 서버를 상대로 Topic → Finalize 전체를 모드별로 돌린다.
+
+benchmarks.fake_llm_server를 띄우고 모드마다 새 인터프리터에서 run_pipeline을 한 번 실행해
+걸린 시간, LLM 호출 수, 입력/출력 토큰, 최대 RSS를 잰다. 응답 캐시는 끄고 논문 저장소는 임시 디렉터리를 쓴다.
+API 키나 네트워크가 필요 없고 응답이 결정적이라 실행 간 비교가 가능하다.
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --modes standard --latency 0.5 --tps 40 --error-rate 0.05
+    python -m benchmarks.bench_pipeline --timeout-rate 0.1 --hang 3 --request-timeout 1
+    python -m benchmarks.bench_pipeline --save base.json
+    python -m benchmarks.bench_pipeline --compare base.json --threshold 0.2
+
+--compare는 저장해 둔 결과보다 시간이나 메모리가 threshold 비율 이상 늘어난 모드가 있으면 종료 코드 1을 낸다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.fake_llm_server import add_arguments, options_from_args, start_server
+
+DEFAULT_MODES = ["quick", "standard", "expert"]
+
+_TOPIC = "대규모 언어 모델의 환각 현상 완화 기법"
+
+
+def run_one(mode: str, provider: str, base_url: str, concurrency: int) -> dict:
+    """현재 프로세스에서 모드 하나를 처음부터 끝까지 진행하고 측정값을 돌려준다 (--run-one)."""
+    import resource
+    import time
+
+    from src.async_bridge import run_async
+    from src.config import LLMConfig
+    from src.llm_client import PROVIDERS, llm_labels
+    from src.paper_state import PaperState
+    from src.pipeline import run_pipeline
+    from src.telemetry import telemetry
+
+    cfg = LLMConfig(
+        provider=provider,
+        model=PROVIDERS[provider]["models"][0],
+        api_key="offline",
+        base_url=base_url,
+        max_concurrency=concurrency,
+        use_cache=False,
+    )
+    ps = PaperState(topic=_TOPIC, mode=mode)
+    started = time.perf_counter()
+    with llm_labels(session="bench"):
+        run_async(run_pipeline(ps, cfg))
+    wall = time.perf_counter() - started
+
+    totals = telemetry.totals("bench")
+    return {
+        "mode": mode,
+        "wall": wall,
+        "calls": totals.get("calls", 0),
+        "errors": totals.get("errors", 0),
+        "retries": sum(r["retries"] or 0 for r in telemetry.records("bench")),
+        "input_tokens": totals.get("input_tokens", 0),
+        "output_tokens": totals.get("output_tokens", 0),
+        "cache_read_tokens": totals.get("cache_read_tokens", 0),
+        "sections": len(ps.sections),
+        "paper_chars": len(ps.final_paper),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def measure(mode: str, provider: str, base_url: str, concurrency: int, db_dir: str,
+            request_timeout: float | None = None) -> dict:
+    env = {**os.environ, "PAPER_DB": os.path.join(db_dir, f"{mode}.sqlite")}
+    env.pop("LLM_TELEMETRY", None)
+    if request_timeout:
+        env["LLM_REQUEST_TIMEOUT"] = str(request_timeout)
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--run-one", mode,
+         "--provider", provider, "--base-url", base_url, "--concurrency", str(concurrency)],
+        capture_output=True, text=True, env=env,
+    )
+    if out.returncode != 0:
+        raise SystemExit(f"{mode} 실패:\n{out.stderr.strip()}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> bool:
+    """기준 결과보다 wall / rss_mb가 threshold 비율 이상 늘어난 모드를 출력하고, 하나라도 있으면 True."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["mode"]: r for r in json.load(f)}
+    regressed = False
+    for r in results:
+        base = baseline.get(r["mode"])
+        if base is None:
+            continue
+        for key in ("wall", "rss_mb"):
+            if base[key] and (r[key] - base[key]) / base[key] > threshold:
+                print(f"회귀: {r['mode']} {key} {base[key]:.1f} → {r[key]:.1f} (+{(r[key] / base[key] - 1):.0%})")
+                regressed = True
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=DEFAULT_MODES, default=DEFAULT_MODES)
+    parser.add_argument("--provider", choices=["OpenAI", "Anthropic"], default="OpenAI",
+                        help="가짜 서버에 말할 SDK 형식")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수 (LLMConfig.max_concurrency)")
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 보는 증가 비율 (기본 0.2)")
+    parser.add_argument("--request-timeout", type=float, default=1.0,
+                        help="--timeout-rate를 줄 때 SDK 요청 제한 시간(초, LLM_REQUEST_TIMEOUT)")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.provider, args.base_url, args.concurrency)))
+        return
+
+    server, fake, base_url = start_server(options_from_args(args))
+    if args.provider == "OpenAI":
+        base_url += "/v1"
+    print(f"가짜 서버 {base_url}: 첫 토큰 {args.latency}초, {args.tps:g} tok/s, 오류 {args.error_rate:.0%}, "
+          f"멈춤 {args.timeout_rate:.0%}, 동시 {args.concurrency}")
+    request_timeout = args.request_timeout if args.timeout_rate > 0 else None
+    print(f"{'mode':<10} {'wall':>8} {'calls':>6} {'errors':>6} {'retries':>7} {'input':>9} {'output':>8} {'cached':>8} {'RSS':>8}")
+    results = []
+    with tempfile.TemporaryDirectory() as db_dir:
+        for mode in args.modes:
+            r = measure(mode, args.provider, base_url, args.concurrency, db_dir, request_timeout)
+            results.append(r)
+            print(f"{mode:<10} {r['wall']:>7.2f}s {r['calls']:>6} {r['errors']:>6} {r['retries']:>7} {r['input_tokens']:>9,} "
+                  f"{r['output_tokens']:>8,} {r['cache_read_tokens']:>8,} {r['rss_mb']:>6.1f}MB")
+    server.shutdown()
+    print(f"서버가 받은 요청: {fake.requests}회 (응답 없이 멈춘 요청 {fake.hangs}회)")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
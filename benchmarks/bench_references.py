@@ -0,0 +1,106 @@
+"""참고문헌 라이브러리 벤치마크.
+
+합성 BibTeX / RIS 내보내기 파일(같은 문헌이 두 파일에 일부 겹침)을 만들어 파싱·중복 제거·색인
+시간과 키워드/저자 검색 시간을 잰다.
+
+    python -m benchmarks.bench_references                # 1만 건
+    python -m benchmarks.bench_references --entries 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from src.references import ReferenceLibrary, parse
+
+TOPIC_WORDS = (
+    "large language models retrieval augmented generation hallucination factuality benchmark "
+    "evaluation instruction tuning reinforcement learning human feedback multimodal vision speech "
+    "code generation reasoning chain of thought knowledge graph summarization translation safety "
+    "alignment bias fairness efficiency quantization distillation pruning embedding transformer"
+).split()
+SURNAMES = "Kim Lee Park Smith Wang Zhang Chen Garcia Müller Rossi Tanaka Nguyen Brown Ivanov Silva".split()
+VENUES = ["ACL", "EMNLP", "NeurIPS", "ICML", "ICLR", "TACL", "Nature Machine Intelligence", "JMLR"]
+
+
+def _entries(n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        out.append({
+            "title": " ".join(rng.choice(TOPIC_WORDS) for _ in range(rng.randint(6, 12))).capitalize() + f" {i}",
+            "authors": [f"{rng.choice(SURNAMES)}, {chr(65 + rng.randrange(26))}." for _ in range(rng.randint(1, 6))],
+            "year": str(rng.randint(2015, 2025)),
+            "venue": rng.choice(VENUES),
+            "doi": f"10.1234/bench.{seed}.{i}" if rng.random() < 0.7 else "",
+            "keywords": ", ".join(rng.sample(TOPIC_WORDS, 4)),
+            "abstract": " ".join(rng.choice(TOPIC_WORDS) for _ in range(120)),
+        })
+    return out
+
+
+def to_bibtex(entries: list[dict]) -> str:
+    parts = []
+    for i, e in enumerate(entries):
+        doi = f"  doi = {{{e['doi']}}},\n" if e["doi"] else ""
+        parts.append(
+            f"@article{{ref{i},\n  title = {{{{{e['title']}}}}},\n  author = {{{' and '.join(e['authors'])}}},\n"
+            f"  journal = {{{e['venue']}}},\n  year = {e['year']},\n{doi}"
+            f"  keywords = {{{e['keywords']}}},\n  abstract = {{{e['abstract']}}}\n}}\n"
+        )
+    return "\n".join(parts)
+
+
+def to_ris(entries: list[dict]) -> str:
+    lines = []
+    for e in entries:
+        lines += ["TY  - JOUR", f"TI  - {e['title'].upper()}"]  # 대소문자가 달라도 같은 제목으로 합쳐져야 한다
+        lines += [f"AU  - {a}" for a in e["authors"]]
+        lines += [f"PY  - {e['year']}///", f"JO  - {e['venue']}", f"AB  - {e['abstract']}"]
+        lines += [f"KW  - {kw.strip()}" for kw in e["keywords"].split(",")]
+        if e["doi"]:
+            lines.append(f"DO  - https://doi.org/{e['doi'].upper()}")
+        lines += ["ER  - ", ""]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    entries = _entries(args.entries, seed=0)
+    overlap = args.entries // 5
+    bib = to_bibtex(entries)
+    ris = to_ris(entries[-overlap:] + _entries(overlap, seed=1))
+    print(f"BibTeX {len(bib) / 1e6:.1f} MB ({args.entries}건), RIS {len(ris) / 1e6:.1f} MB ({2 * overlap}건, {overlap}건 중복)")
+
+    library = ReferenceLibrary()
+    start = time.perf_counter()
+    refs = list(parse(bib, "scholar.bib"))
+    parsed = time.perf_counter()
+    library.ingest(refs)
+    bib_done = time.perf_counter()
+    _, duplicates = library.ingest(parse(ris, "scopus.ris"))
+    ris_done = time.perf_counter()
+    print(f"  BibTeX 파싱        {(parsed - start) * 1000:8.1f} ms")
+    print(f"  중복 제거 + 색인   {(bib_done - parsed) * 1000:8.1f} ms")
+    print(f"  RIS 가져오기 전체  {(ris_done - bib_done) * 1000:8.1f} ms  → 중복 {duplicates}건, 총 {len(library)}건")
+
+    rng = random.Random(2)
+    queries = [" ".join(rng.sample(TOPIC_WORDS, 3)) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for q in queries:
+        library.search(q, 15)
+    print(f"  키워드 검색 (top-15)  {(time.perf_counter() - start) / len(queries) * 1000:6.2f} ms")
+    start = time.perf_counter()
+    for q in queries:
+        library.search(q, 15, author=rng.choice(SURNAMES))
+    print(f"  저자 + 키워드 검색    {(time.perf_counter() - start) / len(queries) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""오프라인 LLM 대역 서버 — OpenAI chat completions / Anthropic messages 형식을 흉내 낸다.
+
+API 키 없이 앱, 배치 실행기, 벤치마크를 끝까지 돌려 보기 위한 로컬 서버다. 같은 요청에는 항상
+같은 응답(프롬프트 해시로 만든 결정적 텍스트)을 돌려주고, 첫 토큰 지연·토큰 처리량·오류 비율을 조절할 수 있다.
+--timeout-rate로 요청을 --hang초 동안 응답 없이 붙잡았다가 끊어 제한 시간/연결 오류도 흉내 낼 수 있다.
+스트리밍(SSE), usage 보고, 프롬프트 접두사 캐시(cache_control / prompt_cache_key) 흉내도 지원한다.
+구조화 출력(OpenAI response_format json_schema, Anthropic 강제 도구 호출)을 요청하면 스키마에 맞는 JSON을 만든다.
+
+    python -m benchmarks.fake_llm_server --port 8765 --latency 0.3 --tps 80 --error-rate 0.05
+
+앱의 LLM 설정에서 Base URL을 http://127.0.0.1:8765 로 지정하면 된다 (제공자는 OpenAI / Anthropic 아무거나,
+API 키는 아무 값). 경로 끝(/chat/completions, /messages)만 보고 형식을 고르므로 /v1을 붙여도 된다.
+--responses FILE에 {"match": "부분 문자열", "text": "응답"} JSONL을 주면 프롬프트에 match가 들어 있는
+요청에는 그 텍스트를 그대로 돌려준다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.tokens import approx_tokens
+
+# 기본 응답에 섞어 쓰는 학술 문체 어휘.
+FILLER = (
+    "본 연구는 선행 연구를 체계적으로 검토하여 주요 접근법의 강점과 한계를 비교한다. "
+    "특히 평가 지표와 데이터셋의 차이가 결과 해석에 미치는 영향을 분석하고, 재현성 측면의 과제를 정리한다. "
+    "이러한 논의는 향후 연구 방향을 제시하는 데 근거가 된다."
+).split()
+CITATIONS = ["[Kim et al., 2021]", "[Lee & Park, 2022]", "[Smith, 2020]", "[Wang et al., 2023]"]
+
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+
+
+@dataclass
+class FakeOptions:
+    latency: float = 0.2  # 첫 토큰까지의 시간(초)
+    tps: float = 100.0  # 초당 출력 토큰 수 (0이면 지연 없음)
+    output_tokens: int = 400  # 기본 응답 길이(토큰, 근사)
+    error_rate: float = 0.0  # 요청이 오류로 끝날 확률
+    error_statuses: tuple[int, ...] = (429, 500, 503)
+    timeout_rate: float = 0.0  # 요청이 응답 없이 멈출 확률 (hang초 뒤 연결을 닫는다)
+    hang: float = 5.0
+    seed: int = 0
+    responses: list[tuple[str, str]] = field(default_factory=list)  # (match, text)
+
+
+def canned_text(prompt: str, tokens: int) -> str:
+    """프롬프트로부터 결정적인 응답을 만든다. 주제 자동 완성 JSON을 요구하는 프롬프트에는 그 JSON 객체를 돌려준다.
+
+    구조화 출력 없이 프롬프트만으로 JSON을 받는 제공자를 흉내 낸다.
+    """
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    words = _WORD_RE.findall(prompt)[-200:] or FILLER
+    if '"research_question"' in prompt:
+        pick = lambda n: " ".join(rng.choice(words) for _ in range(n))  # noqa: E731
+        return json.dumps({
+            "research_question": pick(8) + "?",
+            "scope": pick(10),
+            "keywords": ", ".join(rng.choice(words) for _ in range(4)),
+        }, ensure_ascii=False)
+
+    paragraphs: list[str] = []
+    used = 0
+    while used < tokens:
+        sentence_words = [rng.choice(words if rng.random() < 0.4 else FILLER) for _ in range(rng.randint(10, 18))]
+        sentence = " ".join(sentence_words) + (f" {rng.choice(CITATIONS)}" if rng.random() < 0.3 else "") + "."
+        if not paragraphs or rng.random() < 0.2:
+            paragraphs.append(sentence)
+        else:
+            paragraphs[-1] += " " + sentence
+        used += approx_tokens(sentence)
+    return "\n\n".join(paragraphs)
+
+
+def canned_object(schema: dict, prompt: str):
+    """JSON 스키마에 맞는 결정적인 값을 만든다 (object / array / string / number / boolean)."""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    words = _WORD_RE.findall(prompt)[-200:] or FILLER
+
+    def build(node: dict, depth: int):
+        kind = node.get("type")
+        if kind == "object":
+            return {name: build(sub, depth + 1) for name, sub in node.get("properties", {}).items()}
+        if kind == "array":
+            count = rng.randint(5, 8) if depth <= 1 else rng.randint(0, 3)
+            return [build(node.get("items", {}), depth + 1) for _ in range(count)]
+        if kind in ("integer", "number"):
+            return rng.randint(1, 10)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        return " ".join(rng.choice(words) for _ in range(rng.randint(3, 10)))
+
+    return build(schema, 0)
+
+
+def _chunks(text: str, size: int = 12) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class FakeLLM:
+    """요청 파싱과 응답 생성. 서버 스레드들이 공유하므로 상태 변경은 잠금 안에서 한다."""
+
+    def __init__(self, options: FakeOptions) -> None:
+        self.options = options
+        self.requests = 0
+        self.disconnects = 0  # 클라이언트가 응답 도중 끊은(취소한) 요청 수
+        self.hangs = 0  # 응답 없이 멈춘 요청 수 (timeout_rate)
+        self._rng = random.Random(options.seed)
+        self._prefixes: dict[str, int] = {}  # 캐시된 접두사 키 -> 토큰 수
+        self._lock = threading.Lock()
+
+    def _should_fail(self, handler: BaseHTTPRequestHandler) -> int | None:
+        """주입할 오류의 상태 코드. 멈춤(timeout_rate)이면 응답하지 않은 채 끝내고 0을 돌려준다."""
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.options.timeout_rate:
+                self.hangs += 1
+                status = 0
+            elif self._rng.random() < self.options.error_rate:
+                status = self._rng.choice(self.options.error_statuses)
+            else:
+                return None
+        if status == 0:
+            # 요청을 받은 채 응답하지 않다가 연결을 닫는다 — 클라이언트 쪽 제한 시간(APITimeoutError)이나
+            # 연결 오류(APIConnectionError)를 흉내 낸다.
+            time.sleep(self.options.hang)
+            handler.close_connection = True
+        return status
+
+    def _cache(self, key: str, tokens: int) -> tuple[int, int]:
+        """(캐시 읽기, 캐시 쓰기) 토큰 수. 처음 보는 접두사는 쓰기, 그다음부터는 읽기."""
+        if not key or tokens < 1024:
+            return 0, 0
+        with self._lock:
+            if key in self._prefixes:
+                return tokens, 0
+            self._prefixes[key] = tokens
+        return 0, tokens
+
+    def _reply(self, prompt: str) -> str:
+        for match, text in self.options.responses:
+            if match in prompt:
+                return text
+        return canned_text(prompt, self.options.output_tokens)
+
+    def _delays(self, text: str) -> tuple[list[str], float]:
+        chunks = _chunks(text)
+        per_chunk = approx_tokens(chunks[0]) / self.options.tps if self.options.tps > 0 else 0.0
+        return chunks, per_chunk
+
+    # ── OpenAI ──
+
+    def openai(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        status = self._should_fail(handler)
+        if status is not None:
+            if status:
+                handler.send_json(status, {"error": {"message": f"injected error {status}", "type": "server_error",
+                                                     "code": str(status)}})
+            return
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        prompt_tokens = approx_tokens(prompt)
+        key = body.get("prompt_cache_key") or ""
+        read, _ = self._cache(key and f"openai:{key}", prompt_tokens // 128 * 128 - 128)
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            text = json.dumps(canned_object(response_format["json_schema"]["schema"], prompt), ensure_ascii=False)
+        else:
+            text = self._reply(prompt)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": approx_tokens(text),
+                 "total_tokens": prompt_tokens + approx_tokens(text),
+                 "prompt_tokens_details": {"cached_tokens": read}}
+        base = {"id": f"chatcmpl-{self.requests}", "created": int(time.time()), "model": body.get("model", "fake")}
+
+        time.sleep(self.options.latency)
+        if not body.get("stream"):
+            time.sleep(approx_tokens(text) / self.options.tps if self.options.tps > 0 else 0.0)
+            handler.send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]})
+            return
+
+        handler.start_sse()
+        chunks, delay = self._delays(text)
+        for piece in chunks:
+            handler.send_event(None, {**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            time.sleep(delay)
+        handler.send_event(None, {**base, "object": "chat.completion.chunk", "choices": [
+            {"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            handler.send_event(None, {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        handler.send_raw("data: [DONE]\n\n")
+
+    # ── Anthropic ──
+
+    def anthropic(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        status = self._should_fail(handler)
+        if status is not None:
+            if status:
+                kind = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+                handler.send_json(status, {"type": "error",
+                                           "error": {"type": kind, "message": f"injected error {status}"}})
+            return
+        system = body.get("system") or ""
+        if isinstance(system, list):
+            system = "".join(block.get("text", "") for block in system)
+        parts: list[str] = []
+        cached_prefix = ""
+        for message in body.get("messages", []):
+            content = message.get("content", "")
+            if isinstance(content, str):
+                parts.append(content)
+                continue
+            for block in content:
+                parts.append(block.get("text", ""))
+                if block.get("cache_control"):
+                    cached_prefix = system + "".join(parts)
+        prompt = "".join(parts)
+        total = approx_tokens(system) + approx_tokens(prompt)
+        prefix_key = hashlib.sha256(cached_prefix.encode("utf-8")).hexdigest() if cached_prefix else ""
+        read, write = self._cache(prefix_key and f"anthropic:{prefix_key}", approx_tokens(cached_prefix))
+        tool = _forced_tool(body)
+        tool_input = canned_object(tool["input_schema"], prompt) if tool else None
+        text = json.dumps(tool_input, ensure_ascii=False) if tool else self._reply(prompt)
+        usage = {"input_tokens": total - read - write, "output_tokens": approx_tokens(text),
+                 "cache_read_input_tokens": read, "cache_creation_input_tokens": write}
+        message = {"id": f"msg_{self.requests}", "type": "message", "role": "assistant",
+                   "model": body.get("model", "fake"), "stop_sequence": None}
+
+        time.sleep(self.options.latency)
+        if not body.get("stream"):
+            time.sleep(approx_tokens(text) / self.options.tps if self.options.tps > 0 else 0.0)
+            block = ({"type": "tool_use", "id": f"toolu_{self.requests}", "name": tool["name"], "input": tool_input}
+                     if tool else {"type": "text", "text": text})
+            handler.send_json(200, {**message, "content": [block],
+                                    "stop_reason": "tool_use" if tool else "end_turn", "usage": usage})
+            return
+
+        handler.start_sse()
+        handler.send_event("message_start", {"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 0}}})
+        start = ({"type": "tool_use", "id": f"toolu_{self.requests}", "name": tool["name"], "input": {}}
+                 if tool else {"type": "text", "text": ""})
+        handler.send_event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": start})
+        chunks, delay = self._delays(text)
+        for piece in chunks:
+            delta = {"type": "input_json_delta", "partial_json": piece} if tool else {"type": "text_delta", "text": piece}
+            handler.send_event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta})
+            time.sleep(delay)
+        handler.send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        handler.send_event("message_delta", {"type": "message_delta",
+                                             "delta": {"stop_reason": "tool_use" if tool else "end_turn",
+                                                       "stop_sequence": None},
+                                             "usage": {"output_tokens": usage["output_tokens"]}})
+        handler.send_event("message_stop", {"type": "message_stop"})
+
+
+def _forced_tool(body: dict) -> dict | None:
+    """tool_choice로 지정한 도구 (구조화 출력 요청). 없으면 None."""
+    choice = body.get("tool_choice") or {}
+    if choice.get("type") != "tool":
+        return None
+    return next((t for t in body.get("tools", []) if t.get("name") == choice.get("name")), None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 클라이언트 연결 풀(keep-alive)을 그대로 쓰도록
+    fake: FakeLLM
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 — 요청마다 stderr에 찍지 않는다
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        # 상태 확인용 모델 목록 (OpenAI: /v1/models, Anthropic: /v1/models)
+        if self.path.split("?")[0].rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [
+                {"id": "fake-model", "object": "model", "type": "model", "created": 0, "owned_by": "fake",
+                 "display_name": "Fake model", "created_at": "2025-01-01T00:00:00Z"}],
+                "has_more": False, "first_id": "fake-model", "last_id": "fake-model"})
+        else:
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("content-length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path.split("?")[0].rstrip("/")
+        try:
+            if path.endswith("/chat/completions"):
+                self.fake.openai(self, body)
+            elif path.endswith("/messages"):
+                self.fake.anthropic(self, body)
+            else:
+                self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 닫았다 — 실제 서버처럼 생성을 멈춘다.
+            with self.fake._lock:
+                self.fake.disconnects += 1
+            self.close_connection = True
+
+    def send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        if status == 429:
+            self.send_header("retry-after-ms", "50")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def start_sse(self) -> None:
+        # 길이를 모르는 스트림이므로 응답이 끝나면 연결을 닫는다.
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def send_event(self, event: str | None, payload: dict) -> None:
+        prefix = f"event: {event}\n" if event else ""
+        self.send_raw(f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n")
+
+    def send_raw(self, text: str) -> None:
+        self.wfile.write(text.encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_server(options: FakeOptions | None = None, host: str = "127.0.0.1",
+                 port: int = 0) -> tuple[ThreadingHTTPServer, FakeLLM, str]:
+    """백그라운드 스레드에서 서버를 띄운다. (서버, FakeLLM, base URL)을 반환한다. port=0이면 빈 포트를 쓴다."""
+    fake = FakeLLM(options or FakeOptions())
+    handler = type("FakeHandler", (_Handler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server, fake, f"http://{host}:{server.server_address[1]}"
+
+
+def load_responses(path: str) -> list[tuple[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [(d["match"], d["text"]) for d in (json.loads(line) for line in f if line.strip())]
+
+
+def options_from_args(args: argparse.Namespace) -> FakeOptions:
+    return FakeOptions(
+        latency=args.latency,
+        tps=args.tps,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang=args.hang,
+        seed=args.seed,
+        responses=load_responses(args.responses) if args.responses else [],
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.2, help="첫 토큰까지의 시간(초)")
+    parser.add_argument("--tps", type=float, default=100.0, help="초당 출력 토큰 수 (0이면 지연 없음)")
+    parser.add_argument("--output-tokens", type=int, default=400, help="기본 응답 길이(토큰)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429/500/503 오류를 돌려줄 확률")
+    parser.add_argument("--timeout-rate", type=float, default=0.0,
+                        help="응답 없이 멈췄다가 연결을 닫을 확률 (클라이언트 제한 시간/연결 오류 흉내)")
+    parser.add_argument("--hang", type=float, default=5.0, help="--timeout-rate로 멈출 시간(초)")
+    parser.add_argument("--seed", type=int, default=0, help="오류 주입 난수 시드")
+    parser.add_argument("--responses", help='{"match": ..., "text": ...} JSONL 고정 응답 파일')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server, _, url = start_server(options_from_args(args), args.host, args.port)
+    print(f"가짜 LLM 서버: {url}  (OpenAI: {url}/v1, Anthropic: {url}) — Ctrl+C로 종료")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
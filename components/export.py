@@ -7,77 +7,38 @@ from datetime import datetime
 
 import streamlit as st
 
-from src.paper_state import get_paper_state
+from src.paper_export import build_docx, build_markdown
+from src.st_session import get_paper_state
 
 
 def _build_markdown() -> str:
     """현재 상태의 논문을 Markdown 문자열로 변환한다."""
-    ps = get_paper_state()
+    return build_markdown(get_paper_state())
+
+
+def _build_docx() -> io.BytesIO:
+    """현재 상태의 논문을 Word 문서(.docx)로 변환한다."""
+    return build_docx(get_paper_state())
 
+
+def _export_fingerprint(ps) -> int:
+    """내보내기 결과에 영향을 주는 필드들의 지문. 프로세스 안에서만 쓰므로 내장 hash로 충분하다."""
     if ps.final_paper:
-        return ps.final_paper
-
-    parts: list[str] = []
-    parts.append(f"# {ps.topic}\n")
-    if ps.research_question:
-        parts.append(f"**연구 질문**: {ps.research_question}\n")
-
-    if ps.overview:
-        parts.append(f"\n## 개요\n\n{ps.overview}\n")
-
-    for sec in ps.sections:
-        title = sec.title if isinstance(sec, object) and hasattr(sec, "title") else sec.get("title", "")
-        parts.append(f"\n## {title}\n")
-        desc = sec.description if hasattr(sec, "description") else sec.get("description", "")
-        if desc:
-            parts.append(f"*{desc}*\n")
-
-        content = ps.draft_sections.get(title, "")
-        if content:
-            parts.append(f"\n{content}\n")
-
-        subs = sec.subsections if hasattr(sec, "subsections") else sec.get("subsections", [])
-        for sub in subs:
-            sub_title = sub.get("title", "") if isinstance(sub, dict) else sub
-            parts.append(f"\n### {sub_title}\n")
-
-    return "\n".join(parts)
-
-
-def _build_docx_bytes() -> bytes:
-    """Markdown 내용을 Word 문서(.docx)로 변환한다."""
-    from docx import Document
-    from docx.shared import Pt
-
-    md = _build_markdown()
-    doc = Document()
-
-    style = doc.styles["Normal"]
-    style.font.size = Pt(11)
-    style.font.name = "Malgun Gothic"
-
-    for line in md.split("\n"):
-        stripped = line.strip()
-        if stripped.startswith("### "):
-            doc.add_heading(stripped[4:], level=3)
-        elif stripped.startswith("## "):
-            doc.add_heading(stripped[3:], level=2)
-        elif stripped.startswith("# "):
-            doc.add_heading(stripped[2:], level=1)
-        elif stripped.startswith("**") and stripped.endswith("**"):
-            p = doc.add_paragraph()
-            run = p.add_run(stripped.strip("*"))
-            run.bold = True
-        elif stripped:
-            doc.add_paragraph(stripped)
-
-    buf = io.BytesIO()
-    doc.save(buf)
-    return buf.getvalue()
+        return hash(("final", ps.topic, ps.final_paper))
+    return hash((
+        ps.topic,
+        ps.research_question,
+        ps.overview,
+        tuple((s.title, s.description, tuple(sub.get("title", "") for sub in s.subsections)) for s in ps.sections),
+        tuple(ps.draft_sections.items()),
+    ))
 
 
 def render_export_buttons() -> None:
-    """사이드바에 내보내기 버튼들을 렌더링한다."""
+    """사이드바에 내보내기 버튼들을 렌더링한다.
+
+    파일은 '내보내기 준비'를 눌렀을 때만 만들고, 내용이 바뀌기 전까지는 세션에 보관한 결과를 재사용한다.
+    """
     st.subheader("내보내기")
     ps = get_paper_state()
 
@@ -85,26 +46,43 @@ def render_export_buttons() -> None:
         st.caption("주제를 설정하면 내보내기가 가능합니다.")
         return
 
+    fingerprint = _export_fingerprint(ps)
+    cache = st.session_state.get("export_cache")
+    if cache is None or cache["fingerprint"] != fingerprint:
+        if cache is not None:
+            # 이전 결과는 더 이상 유효하지 않으므로 바로 해제한다.
+            st.session_state["export_cache"] = {"fingerprint": None, "md": None, "docx": None}
+            st.caption("내용이 변경되었습니다. 다시 준비해 주세요.")
+        if not st.button("내보내기 준비", use_container_width=True):
+            return
+        cache = {"fingerprint": fingerprint, "md": None, "docx": None}
+        st.session_state["export_cache"] = cache
+        with st.spinner("내보내기 파일 생성 중..."):
+            # .docx를 먼저 만들어 변환 중에 Markdown 전체 문자열이 함께 메모리에 있지 않게 한다.
+            try:
+                cache["docx"] = _build_docx()
+            except ImportError:
+                cache["docx"] = None
+            cache["md"] = _build_markdown()
+
     now = datetime.now().strftime("%Y%m%d_%H%M")
     safe_topic = ps.topic[:20].replace(" ", "_")
 
-    md_content = _build_markdown()
     st.download_button(
         label="Markdown (.md)",
-        data=md_content,
+        data=cache["md"],
         file_name=f"review_{safe_topic}_{now}.md",
         mime="text/markdown",
         use_container_width=True,
     )
 
-    try:
-        docx_bytes = _build_docx_bytes()
+    if cache["docx"] is not None:
         st.download_button(
             label="Word (.docx)",
-            data=docx_bytes,
+            data=cache["docx"],
             file_name=f"review_{safe_topic}_{now}.docx",
             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             use_container_width=True,
         )
-    except ImportError:
+    else:
         st.caption("Word 내보내기: `pip install python-docx`")
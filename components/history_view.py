@@ -0,0 +1,48 @@
+"""버전 기록 UI - 버전 선택, 나란히 비교, 변경 사항, 복원."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import streamlit as st
+
+from src.history import restore, unified_diff
+from src.st_session import get_paper_state
+
+
+def render_revision_history(doc_key: str, current: str, key: str) -> str | None:
+    """문서의 버전 기록을 표시한다. '이 버전으로 복원'을 누르면 복원할 텍스트를 반환한다."""
+    revisions = get_paper_state().revisions.get(doc_key, [])
+    if not revisions:
+        return None
+
+    with st.expander(f"버전 기록 ({len(revisions)})", expanded=False):
+        idx = st.selectbox(
+            "버전",
+            list(range(len(revisions) - 1, -1, -1)),
+            format_func=lambda i: (
+                f"v{i + 1} · {datetime.fromtimestamp(revisions[i]['ts']):%m-%d %H:%M} · {revisions[i]['label']}"
+            ),
+            key=f"{key}_select",
+        )
+        old = restore(revisions, idx)
+
+        col_old, col_cur = st.columns(2)
+        with col_old:
+            st.caption(f"v{idx + 1}")
+            with st.container(height=300):
+                st.markdown(old)
+        with col_cur:
+            st.caption("현재")
+            with st.container(height=300):
+                st.markdown(current)
+
+        if old == current:
+            st.caption("현재 내용과 같습니다.")
+            return None
+
+        if st.toggle("변경 사항 보기", key=f"{key}_diff"):
+            st.code(unified_diff(old, current, f"v{idx + 1}", "현재"), language="diff")
+        if st.button("이 버전으로 복원", key=f"{key}_restore"):
+            return old
+    return None
@@ -0,0 +1,48 @@
+"""참고문헌 라이브러리 UI - BibTeX/RIS 가져오기, 검색, 비우기."""
+
+from __future__ import annotations
+
+import streamlit as st
+
+from src.references import clear_library, format_entry, import_file, library_for
+
+
+def render_reference_library(ps) -> None:
+    library = library_for(ps.paper_id)
+    with st.expander(f"참고문헌 라이브러리 ({len(library):,}건)", expanded=False):
+        sources = f" ({ps.databases})" if ps.databases.strip() else ""
+        st.caption(
+            f"검색 데이터베이스{sources}에서 내보낸 BibTeX(.bib) / RIS(.ris) 파일을 올리면 "
+            "섹션마다 관련 문헌만 골라 초안 프롬프트에 넣고, References 섹션은 본문에서 인용된 문헌으로 채웁니다."
+        )
+
+        files = st.file_uploader(
+            "BibTeX / RIS 파일",
+            type=["bib", "bibtex", "ris", "txt"],
+            accept_multiple_files=True,
+            key=f"ref_upload_{ps.paper_id}",
+        )
+        if files and st.button("라이브러리에 추가", key="ref_import"):
+            for f in files:
+                text = f.getvalue().decode("utf-8", errors="replace")
+                added, duplicates = import_file(ps.paper_id, text, f.name)
+                st.success(f"{f.name}: {added:,}건 추가, 중복 {duplicates:,}건 병합")
+
+        if not len(library):
+            return
+
+        col_query, col_author = st.columns([2, 1])
+        with col_query:
+            query = st.text_input("키워드 검색", key="ref_query", placeholder="retrieval augmented generation")
+        with col_author:
+            author = st.text_input("저자 (성)", key="ref_author", placeholder="Lewis")
+        if query.strip() or author.strip():
+            hits = library.search(query, k=20, author=author)
+            if not hits:
+                st.caption("일치하는 문헌이 없습니다.")
+            for ref in hits:
+                st.markdown(f"`[{ref.label}]` {format_entry(ref)}")
+
+        if st.button("라이브러리 비우기", key="ref_clear"):
+            clear_library(ps.paper_id)
+            st.rerun()
@@ -2,16 +2,26 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+
 import streamlit as st
 
-from src.llm_client import PROVIDERS, is_llm_configured
-from src.paper_state import (
-    STAGES,
-    STAGE_LABELS,
-    MODE_INFO,
+from src.config import LLMConfig
+from src.llm_client import CACHE_ADMIN, PROVIDERS, check_endpoints, endpoint_status, fast_model, response_cache
+from src.paper_state import STAGES, STAGE_LABELS, MODE_INFO
+from src.routing import ROUTE_LABELS
+from src.st_session import (
+    get_llm_config,
+    get_owner,
     get_paper_state,
+    is_llm_configured,
+    open_paper,
+    session_telemetry,
+    set_llm_config,
     set_stage,
 )
+from src.storage import get_store
+from src.warmup import import_times, warmup_status
 from components.export import render_export_buttons
 
 
@@ -55,11 +65,45 @@ def render_sidebar() -> None:
         st.divider()
         render_export_buttons()
 
+        # ── 저장된 논문 ──
+        st.divider()
+        _render_saved_papers()
+
+        # ── LLM 호출 통계 ──
+        with st.expander("LLM 호출 통계", expanded=False):
+            _render_llm_telemetry()
+
+        # ── 시작 시간 ──
+        with st.expander("시작 시간 프로파일", expanded=False):
+            _render_import_times()
+
         # ── 초기화 ──
         st.divider()
         if st.button("새 논문 시작", type="secondary", use_container_width=True):
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
+            st.query_params.pop("paper", None)
+            st.rerun()
+
+
+def _render_saved_papers() -> None:
+    st.subheader("저장된 논문")
+    ps = get_paper_state()
+    papers = [p for p in get_store().list_papers(get_owner()) if p["paper_id"] != ps.paper_id]
+    if not papers:
+        st.caption("작성 중인 논문은 자동 저장됩니다.")
+        return
+
+    labels = {p["paper_id"]: f"{p['title'] or '(제목 없음)'} · {datetime.fromtimestamp(p['updated']):%m-%d %H:%M}" for p in papers}
+    selected = st.selectbox("논문 선택", list(labels), format_func=labels.get, key="saved_paper_select")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("열기", key="saved_paper_open", use_container_width=True):
+            open_paper(selected)
+            st.rerun()
+    with col2:
+        if st.button("삭제", key="saved_paper_delete", use_container_width=True):
+            get_store().delete(selected)
             st.rerun()
 
 
@@ -89,42 +133,215 @@ def _render_mode_selector() -> None:
 
 
 def _render_llm_config() -> None:
-    cfg = st.session_state.get("llm_config", {})
+    cfg = get_llm_config()
 
     provider = st.selectbox(
         "AI 제공자",
         list(PROVIDERS.keys()),
-        index=list(PROVIDERS.keys()).index(cfg.get("provider", "OpenAI")),
+        index=list(PROVIDERS.keys()).index(cfg.provider),
         key="llm_provider_select",
     )
-    model = st.selectbox(
-        "모델",
-        PROVIDERS[provider]["models"],
-        key="llm_model_select",
-    )
+    spec = PROVIDERS[provider]
+    if spec["models"]:
+        model = st.selectbox(
+            "모델",
+            spec["models"],
+            key="llm_model_select",
+        )
+    else:
+        model = st.text_input(
+            "모델",
+            value=cfg.model if cfg.provider == provider else "",
+            key="llm_model_input",
+            placeholder="meta-llama/Llama-3.3-70B-Instruct",
+            help="서버에 올린 모델 이름 (vLLM의 --served-model-name). llama.cpp 서버는 비워 두어도 됩니다.",
+        )
+    fast, fast_routes = _render_routing(cfg, provider)
     api_key = st.text_input(
-        "API Key",
-        value=cfg.get("api_key", ""),
+        "API Key" if spec["requires_key"] else "API Key (선택)",
+        value=cfg.api_key,
         type="password",
         key="llm_api_key_input",
     )
+    base_url = st.text_area(
+        "Base URL (선택)" if spec["requires_key"] else "Base URL",
+        value=cfg.base_url or "",
+        key="llm_base_url_input",
+        height=68,
+        placeholder="http://gpu1:8000/v1 3\nhttp://gpu2:8000/v1",
+        help="프록시, 자체 호스팅 서버, 오프라인 테스트 서버(benchmarks/fake_llm_server.py)를 쓸 때 입력합니다. "
+             "한 줄에 하나씩 여러 서버를 넣으면 요청을 나눠 보내고 응답하지 않는 서버는 건너뜁니다. "
+             "URL 뒤의 숫자는 가중치입니다.",
+    )
     temperature = st.slider(
         "Temperature",
         0.0,
         1.0,
-        cfg.get("temperature", 0.7),
+        cfg.temperature,
         0.1,
         key="llm_temp_slider",
     )
+    max_concurrency = st.slider(
+        "동시 요청 수",
+        1,
+        16,
+        cfg.max_concurrency,
+        1,
+        key="llm_concurrency_slider",
+        help="여러 섹션을 한 번에 생성할 때 동시에 보내는 최대 요청 수",
+    )
+    context_budget = st.number_input(
+        "컨텍스트 예산 (토큰)",
+        min_value=500,
+        max_value=32_000,
+        value=cfg.context_budget,
+        step=500,
+        key="llm_context_budget_input",
+        help="섹션 초안 프롬프트에 넣는 개요와 전체 구조의 최대 토큰 수. 넘으면 가운데를 줄입니다.",
+    )
+    use_cache = st.checkbox(
+        "응답 캐시 사용",
+        value=cfg.use_cache,
+        key="llm_use_cache_checkbox",
+        help="같은 프롬프트를 다시 보내면 저장된 응답을 재사용합니다. 새로운 결과가 필요하면 끄세요.",
+    )
 
     if st.button("설정 저장", use_container_width=True):
-        st.session_state.llm_config = {
-            "provider": provider,
-            "model": model,
-            "api_key": api_key,
-            "temperature": temperature,
-        }
-        if api_key.strip():
+        set_llm_config(LLMConfig(
+            provider=provider,
+            model=model,
+            api_key=api_key,
+            base_url=base_url.strip() or None,
+            temperature=temperature,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            context_budget=context_budget,
+            fast_model=fast,
+            fast_routes=fast_routes,
+        ))
+        if api_key.strip() or base_url.strip():
             st.success("LLM 설정이 저장되었습니다.")
+        elif not spec["requires_key"]:
+            st.warning(f"{provider} 제공자는 Base URL이 필요합니다.")
         else:
             st.info("API Key 없이도 수동 모드로 사용할 수 있습니다.")
+
+    _render_warmup_status()
+    _render_endpoints()
+    _render_cache_stats()
+
+
+def _render_routing(cfg: LLMConfig, provider: str) -> tuple[str, tuple[str, ...]]:
+    """가벼운 요청을 보낼 빠른 모델과 그 대상 요청 (src.routing)."""
+    spec = PROVIDERS[provider]
+    current = fast_model(cfg) if cfg.provider == provider else spec.get("fast_model", "")
+    if spec["models"]:
+        fast = st.selectbox(
+            "빠른 모델",
+            spec["models"],
+            index=spec["models"].index(current) if current in spec["models"] else 0,
+            key=f"llm_fast_model_select_{provider}",
+            help="아래에서 고른 가벼운 요청에 쓰는 모델. 나머지 요청은 위의 모델로 보냅니다.",
+        )
+    else:
+        fast = st.text_input(
+            "빠른 모델 (선택)",
+            value=current,
+            key="llm_fast_model_input",
+            help="가벼운 요청에 쓸 작은 모델의 이름. 비우면 모든 요청을 위의 모델로 보냅니다.",
+        )
+    routes = st.multiselect(
+        "빠른 모델로 보낼 요청",
+        list(ROUTE_LABELS),
+        default=[r for r in cfg.fast_routes if r in ROUTE_LABELS],
+        format_func=ROUTE_LABELS.get,
+        key="llm_fast_routes_select",
+        help="프롬프트가 긴 요청은 여기 있어도 위의 모델로 보냅니다. 비우면 모든 요청이 위의 모델을 씁니다.",
+    )
+    return fast.strip(), tuple(routes)
+
+
+def _render_warmup_status() -> None:
+    state, seconds = warmup_status(get_llm_config())
+    if state == "running":
+        st.caption("SDK 준비 중… (첫 호출 전에 백그라운드에서 로드)")
+    elif state == "ready":
+        st.caption(f"SDK 준비 완료 ({seconds:.1f}초)")
+    elif state == "failed":
+        st.caption("SDK 준비 실패 — 첫 호출 때 다시 로드합니다.")
+
+
+def _render_endpoints() -> None:
+    cfg = get_llm_config()
+    if not (cfg.base_url or "").strip():
+        return
+    if st.button("서버 상태 확인", key="llm_check_endpoints", use_container_width=True):
+        with st.spinner("서버에 연결하는 중…"):
+            status = check_endpoints(cfg)
+    else:
+        status = endpoint_status(cfg)
+    for e in status:
+        state = "🟢" if e["up"] else "🔴"
+        detail = f"가중치 {e['weight']:g} · 호출 {e['calls']} · 처리 중 {e['inflight']} · {_seconds(e['latency'])}"
+        st.caption(f"{state} `{e['url'] or '기본 URL'}` — {detail}")
+        if e["models"]:
+            st.caption("모델: " + ", ".join(e["models"][:5]))
+        if e["error"]:
+            st.caption(f"오류: {e['error'][:120]}")
+
+
+def _render_cache_stats() -> None:
+    # 응답 캐시는 프로세스 전체(모든 세션)가 함께 쓴다 — 수치도 서버 전체 기준이다.
+    stats = response_cache.stats()
+    caption = f"응답 캐시 (서버 전체): 적중 {stats['hits']} / 미스 {stats['misses']} · {stats['entries']}개 저장"
+    if not CACHE_ADMIN:
+        st.caption(caption)
+        return
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.caption(caption)
+    with col2:
+        if st.button("비우기", key="llm_cache_clear", use_container_width=True,
+                     help="모든 사용자의 캐시된 응답을 지웁니다."):
+            response_cache.clear()
+            st.rerun()
+
+
+def _seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def _render_llm_telemetry() -> None:
+    stats, models, totals = session_telemetry()
+    if not totals:
+        st.caption("이 세션에서 아직 LLM을 호출하지 않았습니다.")
+        return
+    st.caption(
+        f"호출 {totals['calls']}회 (실패 {totals['errors']}) · 입력 {totals['input_tokens']:,} / "
+        f"출력 {totals['output_tokens']:,} 토큰 · 추정 비용 ${totals['cost']:.3f}"
+    )
+    if totals["cache_read_tokens"] or totals["cache_write_tokens"]:
+        st.caption(f"프롬프트 캐시: 읽기 {totals['cache_read_tokens']:,} / 쓰기 {totals['cache_write_tokens']:,} 토큰")
+    rows = ["| 단계 | 호출 | p50 | p95 | 첫 토큰 |", "|---|---:|---:|---:|---:|"]
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    for s in sorted(stats, key=lambda s: order.get(s["stage"], len(order))):
+        label = STAGE_LABELS.get(s["stage"], s["stage"])
+        rows.append(f"| {label} | {s['calls']} | {_seconds(s['p50'])} | {_seconds(s['p95'])} | {_seconds(s['ttft_p50'])} |")
+    st.markdown("\n".join(rows))
+    rows = ["| 모델 | 호출 | 입력 / 출력 | p50 | 비용 |", "|---|---:|---:|---:|---:|"]
+    for m in models:
+        tier = " (빠른)" if m["tier"] == "fast" else ""
+        rows.append(f"| `{m['model']}`{tier} | {m['calls']} | {m['input_tokens']:,} / {m['output_tokens']:,} | "
+                    f"{_seconds(m['p50'])} | ${m['cost']:.3f} |")
+    st.markdown("\n".join(rows))
+    st.caption("지연 시간은 응답 캐시 적중을 제외한 최근 호출 기준입니다.")
+
+
+def _render_import_times() -> None:
+    times = import_times()
+    if not times:
+        st.caption("아직 기록된 모듈이 없습니다.")
+        return
+    st.caption("이 프로세스에서 처음 로드할 때 걸린 시간 (함께 로드된 모듈 수)")
+    for name, seconds, count in times:
+        st.caption(f"`{name}` — {seconds * 1000:.0f} ms ({count})")
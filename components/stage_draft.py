@@ -2,20 +2,31 @@
 
 from __future__ import annotations
 
-import streamlit as st
+from concurrent.futures import as_completed
 
-from src.paper_state import get_paper_state, get_mode, set_stage, add_chat
-from src.llm_client import call_llm, is_llm_configured
-from src.prompts import SYSTEM_PROMPTS, DRAFT_SECTION_PROMPTS, REFINE_PROMPT
+import streamlit as st
 
+from components.history_view import render_revision_history
+from components.references_view import render_reference_library
+from src.async_bridge import submit_all
+from src.candidates import MAX_CANDIDATES, CandidateRun, candidate_configs
+from src.llm_client import acall_llm
+from src.pipeline import build_bibliography, refine_prompt, section_prompt, structure_summary, uses_bibliography
+from src.prompts import SYSTEM_PROMPTS
+from src.st_session import (
+    add_chat,
+    get_llm_config,
+    get_mode,
+    get_paper_state,
+    is_llm_configured,
+    record_change,
+    session_llm_labels,
+    set_stage,
+    stream_llm,
+)
 
-def _structure_summary(ps) -> str:
-    lines = []
-    for sec in ps.sections:
-        lines.append(f"- {sec.title}: {sec.description}")
-        for sub in sec.subsections:
-            lines.append(f"  - {sub.get('title', '')}")
-    return "\n".join(lines)
+# 후보 생성 중 후보 영역을 다시 그리는 주기(초)
+CANDIDATE_REFRESH = 0.2
 
 
 def render() -> None:
@@ -43,6 +54,12 @@ def render() -> None:
     written = sum(1 for sec in ps.sections if ps.draft_sections.get(sec.title, "").strip())
     st.progress(written / total if total > 0 else 0, text=f"작성 완료: {written}/{total} 섹션")
 
+    render_reference_library(ps)
+
+    # 직전 일괄 생성에서 실패한 섹션 (rerun 이후에도 보이도록 session_state에 보관)
+    for title, err in st.session_state.pop("draft_generation_errors", {}).items():
+        st.error(f"'{title}' 생성 실패: {err}")
+
     # AI 전체 생성
     if is_llm_configured():
         label = "AI로 전체 자동 생성" if mode == "quick" else "AI로 미작성 섹션 모두 생성"
@@ -77,36 +94,58 @@ def render() -> None:
 
 
 def _generate_all_sections(ps, mode: str) -> None:
+    """미작성 섹션을 동시에 생성한다.
+
+    요청은 백그라운드 이벤트 루프에서 실행되어 session_state에 접근할 수 없으므로
+    설정과 프롬프트를 미리 만들어 넘기고, 결과는 모든 요청이 끝난 뒤 섹션 순서대로 반영한다.
+    """
+    pending = [sec for sec in ps.sections if not ps.draft_sections.get(sec.title, "").strip()]
+    if not pending:
+        return
+    bibliographies = [sec for sec in pending if uses_bibliography(ps, sec)]
+    pending = [sec for sec in pending if sec not in bibliographies]
+
+    cfg = get_llm_config()
+    system_prompt = SYSTEM_PROMPTS[mode]
+    structure_sum = structure_summary(ps)
+    prompts = {sec.title: section_prompt(ps, sec, mode, structure_sum, cfg.context_budget) for sec in pending}
+
     total = len(ps.sections)
-    structure_sum = _structure_summary(ps)
-    progress_bar = st.progress(0)
-
-    for idx, sec in enumerate(ps.sections):
-        if ps.draft_sections.get(sec.title, "").strip():
-            progress_bar.progress((idx + 1) / total)
-            continue
-        with st.spinner(f"'{sec.title}' 작성 중..."):
-            subs_text = ""
-            if sec.subsections:
-                subs_text = "**하위 섹션**:\n" + "\n".join(f"- {s.get('title', '')}" for s in sec.subsections)
-
-            prompt_tpl = DRAFT_SECTION_PROMPTS[mode]
-            fmt_kwargs = dict(
-                topic=ps.topic,
-                section_title=sec.title,
-                section_description=sec.description,
-                subsections_text=subs_text,
-            )
-            if mode != "quick":
-                fmt_kwargs["overview"] = ps.overview
-                fmt_kwargs["structure_summary"] = structure_sum
-
-            prompt = prompt_tpl.format(**fmt_kwargs)
-            result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-            if result:
-                ps.draft_sections[sec.title] = result
-                add_chat("assistant", f"[초안 생성: {sec.title}]")
-        progress_bar.progress((idx + 1) / total)
+    done = total - len(prompts) - len(bibliographies)
+    progress_bar = st.progress(done / total, text=f"작성 완료: {done}/{total} 섹션")
+
+    results: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    limit = max(1, cfg.max_concurrency)
+    with session_llm_labels():
+        submitted = submit_all(
+            (acall_llm(cfg, system_prompt, prompt, template="draft_section") for prompt in prompts.values()), limit
+        )
+    futures = dict(zip(submitted, prompts))
+    for future in as_completed(futures):
+        title = futures[future]
+        try:
+            results[title] = future.result()
+        except Exception as e:
+            errors[title] = str(e)
+        done += 1
+        progress_bar.progress(done / total, text=f"작성 완료: {done}/{total} 섹션")
+
+    for title in prompts:
+        if results.get(title):
+            record_change(f"draft:{title}", ps.draft_sections.get(title, ""), results[title], "AI 작성")
+            ps.draft_sections[title] = results[title]
+            add_chat("assistant", f"[초안 생성: {title}]")
+    for sec in bibliographies:
+        _fill_bibliography(ps, sec)
+    if errors:
+        st.session_state["draft_generation_errors"] = errors
+
+
+def _fill_bibliography(ps, sec) -> None:
+    text = build_bibliography(ps)
+    record_change(f"draft:{sec.title}", ps.draft_sections.get(sec.title, ""), text, "인용 문헌 목록")
+    ps.draft_sections[sec.title] = text
 
 
 def _render_section_editor(ps, sec, idx: int, mode: str) -> None:
@@ -114,43 +153,40 @@ def _render_section_editor(ps, sec, idx: int, mode: str) -> None:
 
     col_gen, col_refine = st.columns(2)
     with col_gen:
-        if is_llm_configured():
+        if uses_bibliography(ps, sec):
+            if st.button("인용된 문헌으로 채우기", key=f"gen_{idx}", help="다른 섹션에서 인용한 라이브러리 문헌으로 목록을 만듭니다."):
+                _fill_bibliography(ps, sec)
+                st.session_state.pop(f"draft_{idx}", None)
+                st.rerun()
+        elif is_llm_configured():
             if st.button("AI로 작성", key=f"gen_{idx}"):
-                with st.spinner("생성 중..."):
-                    subs_text = ""
-                    if sec.subsections:
-                        subs_text = "**하위 섹션**:\n" + "\n".join(f"- {s.get('title', '')}" for s in sec.subsections)
-
-                    prompt_tpl = DRAFT_SECTION_PROMPTS[mode]
-                    fmt_kwargs = dict(
-                        topic=ps.topic,
-                        section_title=sec.title,
-                        section_description=sec.description,
-                        subsections_text=subs_text,
-                    )
-                    if mode != "quick":
-                        fmt_kwargs["overview"] = ps.overview
-                        fmt_kwargs["structure_summary"] = _structure_summary(ps)
-
-                    prompt = prompt_tpl.format(**fmt_kwargs)
-                    result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-                    if result:
-                        ps.draft_sections[sec.title] = result
-                        add_chat("assistant", f"[초안 생성: {sec.title}]")
-                        st.rerun()
+                prompt = section_prompt(ps, sec, mode, structure_summary(ps), get_llm_config().context_budget)
+                stream = stream_llm(SYSTEM_PROMPTS[mode], prompt, template="draft_section")
+                result = st.write_stream(stream)
+                if result and stream.completed:
+                    record_change(f"draft:{sec.title}", current, result, "AI 작성")
+                    ps.draft_sections[sec.title] = result
+                    add_chat("assistant", f"[초안 생성: {sec.title}]")
+                    st.rerun()
+            _render_candidate_controls(ps, sec, idx, mode)
 
     with col_refine:
         if is_llm_configured() and current.strip():
             feedback = st.text_input("피드백 입력", key=f"feedback_{idx}", placeholder="수정 요청사항 입력")
             if st.button("AI로 개선", key=f"refine_{idx}"):
                 if feedback.strip():
-                    with st.spinner("개선 중..."):
-                        prompt = REFINE_PROMPT.format(current_content=current, feedback=feedback)
-                        result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-                        if result:
-                            ps.draft_sections[sec.title] = result
-                            add_chat("assistant", f"[개선: {sec.title}] 피드백: {feedback}")
-                            st.rerun()
+                    cfg = get_llm_config()
+                    prompt = refine_prompt(ps, f"draft:{sec.title}", current, feedback, cfg.context_budget, cfg.model)
+                    stream = stream_llm(SYSTEM_PROMPTS[mode], prompt, template="refine")
+                    result = st.write_stream(stream)
+                    if result and stream.completed:
+                        record_change(f"draft:{sec.title}", current, result, f"AI 개선: {feedback}")
+                        ps.draft_sections[sec.title] = result
+                        add_chat("assistant", f"[개선: {sec.title}] 피드백: {feedback}")
+                        st.rerun()
+
+    if f"candidates_{idx}" in st.session_state:
+        _render_candidates(ps, sec, idx)
 
     new_content = st.text_area(
         f"{sec.title} 내용",
@@ -159,3 +195,85 @@ def _render_section_editor(ps, sec, idx: int, mode: str) -> None:
         key=f"draft_{idx}",
     )
     ps.draft_sections[sec.title] = new_content
+
+    restored = render_revision_history(f"draft:{sec.title}", new_content, key=f"draft_hist_{idx}")
+    if restored is not None:
+        record_change(f"draft:{sec.title}", new_content, restored, "버전 복원")
+        ps.draft_sections[sec.title] = restored
+        st.session_state.pop(f"draft_{idx}", None)
+        st.rerun()
+
+
+def _render_candidate_controls(ps, sec, idx: int, mode: str) -> None:
+    """후보 여러 개를 동시에 생성하는 버튼 (src.candidates)."""
+    with st.popover("후보 여러 개 비교"):
+        n = st.number_input("후보 수", min_value=2, max_value=MAX_CANDIDATES, value=3, key=f"cand_n_{idx}")
+        mix = st.checkbox("빠른 모델 섞기", key=f"cand_mix_{idx}", help="짝수 번째 후보는 빠른 모델로 생성합니다.")
+        if st.button(f"후보 {n}개 생성", key=f"cand_gen_{idx}"):
+            old = st.session_state.pop(f"candidates_{idx}", None)
+            if old is not None:
+                old.cancel()
+            cfg = get_llm_config()
+            prompt = section_prompt(ps, sec, mode, structure_summary(ps), cfg.context_budget)
+            with session_llm_labels():
+                st.session_state[f"candidates_{idx}"] = CandidateRun(
+                    candidate_configs(cfg, int(n), mix), SYSTEM_PROMPTS[mode], prompt
+                )
+
+
+def _render_candidates(ps, sec, idx: int) -> None:
+    """후보들을 나란히 스트리밍하고, 고른 후보를 초안에 반영한다. 고르면 나머지는 바로 취소된다.
+
+    후보 영역만 fragment로 만들어 생성 중에는 그 부분만 주기적으로 다시 그린다. 스크립트를 붙잡고
+    기다리지 않으므로 다른 섹션, 채팅, 자동 저장은 그대로 동작하고, 후보 요청은 백그라운드 루프에서 계속 진행된다.
+    """
+    live = not st.session_state[f"candidates_{idx}"].finished
+    st.fragment(_candidates_fragment, run_every=CANDIDATE_REFRESH if live else None)(ps, sec, idx, live)
+
+
+def _candidates_fragment(ps, sec, idx: int, live: bool) -> None:
+    key = f"candidates_{idx}"
+    run: CandidateRun | None = st.session_state.get(key)
+    if run is None:
+        if live:
+            st.rerun()  # 취소로 사라졌으면 전체를 다시 그려 주기적 갱신을 멈춘다
+        return
+
+    result = run.result()
+    if result is not None:
+        current = ps.draft_sections.get(sec.title, "")
+        label = run.candidates[run.chosen].label
+        record_change(f"draft:{sec.title}", current, result, f"AI 작성 (후보 {run.chosen + 1}: {label})")
+        ps.draft_sections[sec.title] = result
+        add_chat("assistant", f"[초안 생성: {sec.title}] 후보 {len(run.candidates)}개 중 {run.chosen + 1}번 선택")
+        st.session_state.pop(key, None)
+        st.session_state.pop(f"draft_{idx}", None)
+        st.rerun()
+    if live and run.finished:
+        st.rerun()  # 모두 끝났으면 전체를 다시 그려 주기적 갱신을 멈춘다
+
+    if run.choice_error:
+        st.warning(f"고른 후보의 생성이 실패했습니다: {run.choice_error}"
+                   + (" 다른 후보를 골라 주세요." if run.selectable else ""))
+    columns = st.columns(len(run.candidates))
+    for i, (col, candidate) in enumerate(zip(columns, run.candidates)):
+        with col:
+            st.caption(candidate.label)
+            with st.container(height=300):
+                if candidate.error:
+                    st.error(candidate.error)
+                elif candidate.cancelled:
+                    st.caption("취소됨")
+                else:
+                    st.markdown(candidate.text + ("" if candidate.done else " ▌"))
+            # 콜백은 다음 실행 전에 불리므로 위의 result()가 바로 선택을 반영한다
+            st.button("선택됨 — 마무리 중" if run.chosen == i else "이 초안 선택", key=f"cand_pick_{idx}_{i}",
+                      on_click=run.choose, args=(i,),
+                      disabled=run.chosen is not None or candidate.cancelled or bool(candidate.error))
+    st.button("닫기" if run.finished else "모두 취소", key=f"cand_cancel_{idx}", on_click=_drop_candidates, args=(idx,))
+
+
+def _drop_candidates(idx: int) -> None:
+    run = st.session_state.pop(f"candidates_{idx}", None)
+    if run is not None:
+        run.cancel()
@@ -2,11 +2,26 @@
 
 from __future__ import annotations
 
+import queue
+
 import streamlit as st
 
-from src.paper_state import get_paper_state, get_mode, set_stage, add_chat
-from src.llm_client import call_llm, is_llm_configured
-from src.prompts import SYSTEM_PROMPTS, FINALIZE_PROMPTS, REFINE_PROMPT
+from components.history_view import render_revision_history
+from src import finalize
+from src.async_bridge import submit_async
+from src.pipeline import finalize_map_reduce, refine_prompt, single_pass_prompt
+from src.prompts import SYSTEM_PROMPTS
+from src.st_session import (
+    add_chat,
+    get_llm_config,
+    get_mode,
+    get_paper_state,
+    is_llm_configured,
+    record_change,
+    session_llm_labels,
+    set_stage,
+    stream_llm,
+)
 
 
 def render() -> None:
@@ -26,27 +41,27 @@ def render() -> None:
     written_sections = {k: v for k, v in ps.draft_sections.items() if v.strip()}
     st.info(f"작성된 섹션: {len(written_sections)}개")
 
+    use_map_reduce = finalize.needs_map_reduce(list(written_sections.values()))
+    for title, err in st.session_state.pop("finalize_errors", {}).items():
+        st.warning(f"'{title}' 통합 실패 — 원본 초안을 사용했습니다: {err}")
+
     # 통합 버튼
     if is_llm_configured():
+        if use_map_reduce:
+            st.caption("초안이 길어 섹션별로 나누어 병렬 통합한 뒤 Abstract, 전환 문장, 결론을 작성합니다.")
         if st.button("AI로 전체 논문 통합하기", type="secondary"):
-            with st.spinner("AI가 논문을 통합하고 있습니다..."):
-                all_sections_text = ""
-                for sec in ps.sections:
-                    content = ps.draft_sections.get(sec.title, "")
-                    if content.strip():
-                        all_sections_text += f"\n\n## {sec.title}\n\n{content}"
-
-                prompt_tpl = FINALIZE_PROMPTS[mode]
-                fmt_kwargs = dict(topic=ps.topic, all_sections=all_sections_text)
-                if mode != "quick":
-                    fmt_kwargs["research_question"] = ps.research_question
-
-                prompt = prompt_tpl.format(**fmt_kwargs)
-                result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-                if result:
-                    ps.final_paper = result
-                    add_chat("assistant", "[최종 논문 통합 완료]")
-                    st.rerun()
+            if use_map_reduce:
+                result = _finalize_map_reduce(ps)
+            else:
+                stream = stream_llm(SYSTEM_PROMPTS[mode], single_pass_prompt(ps, mode), template="finalize")
+                result = st.write_stream(stream)
+                if not stream.completed:
+                    result = None  # 도중에 실패한 결과는 반영하지 않는다
+            if result:
+                record_change("final", ps.final_paper, result, "AI 통합")
+                ps.final_paper = result
+                add_chat("assistant", "[최종 논문 통합 완료]")
+                st.rerun()
     else:
         if st.button("초안들을 단순 결합하기"):
             parts = [f"# {ps.topic}\n"]
@@ -54,7 +69,9 @@ def render() -> None:
                 content = ps.draft_sections.get(sec.title, "")
                 if content.strip():
                     parts.append(f"\n## {sec.title}\n\n{content}")
-            ps.final_paper = "\n".join(parts)
+            combined = "\n".join(parts)
+            record_change("final", ps.final_paper, combined, "단순 결합")
+            ps.final_paper = combined
             st.rerun()
 
     st.divider()
@@ -75,13 +92,21 @@ def render() -> None:
             feedback = st.text_input("전체 논문에 대한 피드백", placeholder="예: 서론을 더 구체적으로, 결론에 향후 연구 방향 추가")
             if st.button("AI로 피드백 반영"):
                 if feedback.strip():
-                    with st.spinner("개선 중..."):
-                        prompt = REFINE_PROMPT.format(current_content=ps.final_paper, feedback=feedback)
-                        result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-                        if result:
-                            ps.final_paper = result
-                            add_chat("assistant", f"[최종 논문 개선] 피드백: {feedback}")
-                            st.rerun()
+                    prompt = refine_prompt(ps, "final", ps.final_paper, feedback)
+                    stream = stream_llm(SYSTEM_PROMPTS[mode], prompt, template="refine")
+                    result = st.write_stream(stream)
+                    if result and stream.completed:
+                        record_change("final", ps.final_paper, result, f"AI 개선: {feedback}")
+                        ps.final_paper = result
+                        add_chat("assistant", f"[최종 논문 개선] 피드백: {feedback}")
+                        st.rerun()
+
+        restored = render_revision_history("final", ps.final_paper, key="final_hist")
+        if restored is not None:
+            record_change("final", ps.final_paper, restored, "버전 복원")
+            ps.final_paper = restored
+            st.session_state.pop("final_editor", None)
+            st.rerun()
 
         st.divider()
         st.success("논문이 완성되었습니다! 사이드바에서 Markdown 또는 Word 파일로 내보낼 수 있습니다.")
@@ -94,3 +119,33 @@ def render() -> None:
         if st.button("← 초안 작성", use_container_width=True):
             set_stage("draft")
             st.rerun()
+
+
+def _finalize_map_reduce(ps) -> str | None:
+    """src.pipeline.finalize_map_reduce를 백그라운드 루프에서 돌리며 섹션별 진행 상황을 보여준다.
+
+    다듬기에 실패한 섹션은 원본 초안을 쓰고 다음 화면에서 경고로 알린다.
+    """
+    progress_bar = st.progress(0.0, text="섹션별 통합 중...")
+    updates: queue.Queue = queue.Queue()  # 진행 콜백은 이벤트 루프 스레드에서 불리므로 화면 갱신은 여기서 한다
+    with session_llm_labels():
+        future = submit_async(finalize_map_reduce(ps, get_llm_config(), lambda *update: updates.put(update)))
+    errors: dict[str, str] = {}
+    while not (future.done() and updates.empty()):
+        try:
+            done, total, title, error = updates.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if error is not None:
+            errors[title] = str(error)
+        text = f"섹션별 통합: {done}/{total}" if done < total else "Abstract, 전환 문장, 결론 작성 중..."
+        progress_bar.progress(done / (total + 1), text=text)
+    try:
+        result = future.result()
+    except Exception as e:
+        st.error(f"LLM API 호출 실패: {e}")
+        return None
+    progress_bar.progress(1.0, text="통합 완료")
+    if errors:
+        st.session_state["finalize_errors"] = errors
+    return result
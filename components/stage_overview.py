@@ -4,9 +4,9 @@ from __future__ import annotations
 
 import streamlit as st
 
-from src.paper_state import get_paper_state, get_mode, set_stage, add_chat
-from src.llm_client import call_llm, is_llm_configured
-from src.prompts import SYSTEM_PROMPTS, OVERVIEW_PROMPTS
+from src.pipeline import overview_prompt
+from src.st_session import add_chat, get_mode, get_paper_state, is_llm_configured, set_stage, stream_llm
+from src.prompts import SYSTEM_PROMPTS
 
 
 PAPER_TYPES = [
@@ -46,16 +46,13 @@ def _render_quick() -> None:
 
     if is_llm_configured() and not ps.overview.strip():
         if st.button("AI로 개요 자동 생성", type="secondary"):
-            with st.spinner("개요 생성 중..."):
-                prompt = OVERVIEW_PROMPTS["quick"].format(
-                    topic=ps.topic,
-                    keywords=ps.keywords,
-                )
-                result = call_llm(SYSTEM_PROMPTS["quick"], prompt)
-                if result:
-                    ps.overview = result
-                    add_chat("assistant", f"[개요 생성]\n{result}")
-                    st.rerun()
+            prompt = overview_prompt(ps, "quick")
+            stream = stream_llm(SYSTEM_PROMPTS["quick"], prompt, template="overview")
+            result = st.write_stream(stream)
+            if result and stream.completed:
+                ps.overview = result
+                add_chat("assistant", f"[개요 생성]\n{result}")
+                st.rerun()
 
     ps.overview = st.text_area("개요", value=ps.overview, height=200, placeholder="AI가 생성하거나 직접 작성하세요...")
 
@@ -87,19 +84,13 @@ def _render_standard() -> None:
 
     if is_llm_configured():
         if st.button("AI로 개요 생성하기", type="secondary"):
-            with st.spinner("AI가 개요를 생성하고 있습니다..."):
-                prompt = OVERVIEW_PROMPTS["standard"].format(
-                    topic=ps.topic,
-                    research_question=ps.research_question,
-                    scope=ps.scope,
-                    keywords=ps.keywords,
-                    paper_type=ps.paper_type,
-                )
-                result = call_llm(SYSTEM_PROMPTS["standard"], prompt)
-                if result:
-                    ps.overview = result
-                    add_chat("assistant", f"[개요 생성]\n{result}")
-                    st.rerun()
+            prompt = overview_prompt(ps, "standard")
+            stream = stream_llm(SYSTEM_PROMPTS["standard"], prompt, template="overview")
+            result = st.write_stream(stream)
+            if result and stream.completed:
+                ps.overview = result
+                add_chat("assistant", f"[개요 생성]\n{result}")
+                st.rerun()
 
     ps.overview = st.text_area("논문 개요", value=ps.overview, height=300, placeholder="논문의 전체적인 방향, 배경, 목적, 기여점 등을 기술합니다...")
     ps.target_audience = st.text_input("대상 독자", value=ps.target_audience, placeholder="예: NLP 연구자, AI 엔지니어, 대학원생")
@@ -137,23 +128,13 @@ def _render_expert() -> None:
 
     if is_llm_configured():
         if st.button("AI로 심층 개요 생성", type="secondary"):
-            with st.spinner("AI가 심층 개요를 생성하고 있습니다..."):
-                prompt = OVERVIEW_PROMPTS["expert"].format(
-                    topic=ps.topic,
-                    research_question=ps.research_question,
-                    scope=ps.scope,
-                    keywords=ps.keywords,
-                    paper_type=ps.paper_type,
-                    motivation=ps.motivation,
-                    exclusion_criteria=ps.exclusion_criteria,
-                    time_range=ps.time_range,
-                    databases=ps.databases,
-                )
-                result = call_llm(SYSTEM_PROMPTS["expert"], prompt)
-                if result:
-                    ps.overview = result
-                    add_chat("assistant", f"[심층 개요 생성]\n{result}")
-                    st.rerun()
+            prompt = overview_prompt(ps, "expert")
+            stream = stream_llm(SYSTEM_PROMPTS["expert"], prompt, template="overview")
+            result = st.write_stream(stream)
+            if result and stream.completed:
+                ps.overview = result
+                add_chat("assistant", f"[심층 개요 생성]\n{result}")
+                st.rerun()
 
     ps.overview = st.text_area("논문 개요", value=ps.overview, height=350, placeholder="연구 배경, 간극, 기여점을 포함한 상세 개요...")
 
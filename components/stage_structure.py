@@ -2,49 +2,15 @@
 
 from __future__ import annotations
 
+import copy
+
 import streamlit as st
 
-from src.paper_state import get_paper_state, get_mode, set_stage, add_chat, Section
-from src.llm_client import call_llm, is_llm_configured
-from src.prompts import SYSTEM_PROMPTS, STRUCTURE_PROMPTS
-
-
-def _default_sections_quick() -> list[Section]:
-    return [
-        Section(title="Abstract", description="논문 요약"),
-        Section(title="1. Introduction", description="배경 및 목적"),
-        Section(title="2. Literature Review", description="핵심 문헌 리뷰"),
-        Section(title="3. Discussion", description="주요 발견과 시사점"),
-        Section(title="4. Conclusion", description="결론"),
-        Section(title="References", description="참고문헌"),
-    ]
-
-
-def _default_sections_standard() -> list[Section]:
-    return [
-        Section(title="Abstract", description="논문의 요약"),
-        Section(title="1. Introduction", description="연구 배경, 목적, 논문 구성 소개"),
-        Section(title="2. Background", description="주요 개념 및 관련 연구 정리"),
-        Section(title="3. Methodology", description="리뷰 방법론 (검색 전략, 선정 기준 등)"),
-        Section(title="4. Main Review", description="주제별 핵심 리뷰 내용", subsections=[{"title": "4.1 Sub-topic A"}, {"title": "4.2 Sub-topic B"}]),
-        Section(title="5. Discussion", description="주요 발견, 연구 간극, 향후 연구 방향"),
-        Section(title="6. Conclusion", description="핵심 결론 요약"),
-        Section(title="References", description="참고문헌 목록"),
-    ]
-
-
-def _default_sections_expert() -> list[Section]:
-    return [
-        Section(title="Abstract", description="구조화된 초록 (배경, 목적, 방법, 결과, 결론)"),
-        Section(title="1. Introduction", description="연구 배경, 동기, 연구 질문, 기여점, 논문 구성", subsections=[{"title": "1.1 Background and Motivation"}, {"title": "1.2 Research Questions"}, {"title": "1.3 Contributions"}, {"title": "1.4 Paper Organization"}]),
-        Section(title="2. Research Methodology", description="체계적 리뷰 방법론", subsections=[{"title": "2.1 Search Strategy"}, {"title": "2.2 Inclusion/Exclusion Criteria"}, {"title": "2.3 Quality Assessment"}, {"title": "2.4 Data Extraction"}]),
-        Section(title="3. Taxonomy and Classification", description="연구 분류 체계", subsections=[{"title": "3.1 Classification Framework"}, {"title": "3.2 Category A"}, {"title": "3.3 Category B"}]),
-        Section(title="4. Detailed Analysis", description="주제별 심층 분석", subsections=[{"title": "4.1 Topic A: Analysis"}, {"title": "4.2 Topic B: Analysis"}, {"title": "4.3 Comparative Analysis"}]),
-        Section(title="5. Discussion", description="종합 논의", subsections=[{"title": "5.1 Key Findings"}, {"title": "5.2 Research Gaps"}, {"title": "5.3 Implications"}, {"title": "5.4 Limitations"}]),
-        Section(title="6. Future Research Directions", description="향후 연구 방향"),
-        Section(title="7. Conclusion", description="핵심 결론 요약"),
-        Section(title="References", description="참고문헌 목록"),
-    ]
+from src.paper_state import Section
+from src.pipeline import default_sections, sections_from, structure_prompt
+from src.st_session import add_chat, get_mode, get_paper_state, is_llm_configured, set_stage, stream_llm
+from src.prompts import SYSTEM_PROMPTS, STRUCTURE_SCHEMA
+from src.structured import JsonStream
 
 
 def render() -> None:
@@ -54,56 +20,47 @@ def render() -> None:
     if mode == "quick":
         st.header("구조 설계")
         st.info("**Quick Start** — 기본 구조를 자동 적용합니다. 필요시 수정하세요.")
-        default_fn = _default_sections_quick
     elif mode == "expert":
         st.header("3. 상세 구조 설계 — Expert")
         st.markdown("학술지 수준의 체계적 논문 구조를 설계합니다.")
-        default_fn = _default_sections_expert
     else:
         st.header("3. 상세 구조 설계")
         st.markdown("논문의 섹션 구조를 설계합니다. 섹션을 추가/수정/삭제할 수 있습니다.")
-        default_fn = _default_sections_standard
 
     # Quick 모드: 구조가 없으면 자동 적용
     if mode == "quick" and not ps.sections:
-        ps.sections = default_fn()
+        ps.sections = default_sections(mode)
 
     # 구조 생성 버튼
     col_ai, col_default = st.columns(2)
     with col_ai:
         if is_llm_configured():
             if st.button("AI로 구조 생성", type="secondary", use_container_width=True):
-                with st.spinner("AI가 논문 구조를 설계하고 있습니다..."):
-                    prompt_tpl = STRUCTURE_PROMPTS[mode]
-                    fmt_kwargs = dict(
-                        topic=ps.topic,
-                        research_question=ps.research_question,
-                        overview=ps.overview,
-                    )
-                    if mode == "expert":
-                        fmt_kwargs.update(
-                            theoretical_framework=ps.theoretical_framework,
-                            gap_analysis=ps.gap_analysis,
-                            methodology_notes=ps.methodology_notes,
-                        )
-                    prompt = prompt_tpl.format(**fmt_kwargs)
-                    result = call_llm(SYSTEM_PROMPTS[mode], prompt)
-                    if result:
-                        st.session_state["ai_structure_suggestion"] = result
-                        add_chat("assistant", f"[구조 제안]\n{result}")
+                _generate_structure(ps, mode)
     with col_default:
         if st.button("기본 구조 불러오기", use_container_width=True):
-            ps.sections = default_fn()
+            ps.sections = default_sections(mode)
+            _reset_section_inputs()
             st.rerun()
 
-    # AI 제안 표시
+    # AI 제안 표시: 섹션으로 읽혔으면 바로 적용할 수 있고, 아니면 원문을 참고용으로 보여준다
     ai_suggestion = st.session_state.get("ai_structure_suggestion")
     if ai_suggestion:
-        with st.expander("AI 구조 제안 (참고용)", expanded=True):
-            st.markdown(ai_suggestion)
-            if st.button("제안 닫기"):
-                st.session_state.pop("ai_structure_suggestion", None)
-                st.rerun()
+        parsed = isinstance(ai_suggestion, list)
+        with st.expander("AI 구조 제안" if parsed else "AI 구조 제안 (참고용)", expanded=True):
+            st.markdown(_outline(ai_suggestion) if parsed else ai_suggestion)
+            col_apply, col_close = st.columns(2)
+            with col_apply:
+                if parsed and st.button("이 구조 적용", type="primary", use_container_width=True):
+                    ps.sections = copy.deepcopy(ai_suggestion)
+                    _reset_section_inputs()
+                    st.session_state.pop("ai_structure_suggestion", None)
+                    add_chat("assistant", f"[구조 적용] {len(ps.sections)}개 섹션")
+                    st.rerun()
+            with col_close:
+                if st.button("제안 닫기", use_container_width=True):
+                    st.session_state.pop("ai_structure_suggestion", None)
+                    st.rerun()
 
     st.divider()
 
@@ -166,3 +123,46 @@ def render() -> None:
         if st.button("다음: 초안 작성 →", type="primary", use_container_width=True, disabled=len(ps.sections) == 0):
             set_stage("draft")
             st.rerun()
+
+
+def _generate_structure(ps, mode: str) -> None:
+    """구조 제안을 스트리밍으로 받으며 지금까지 읽힌 섹션 목록을 미리 보여준다.
+
+    응답이 끝까지 오고 JSON이 닫혔을 때만 섹션 목록으로 저장한다. 중간에 끊긴 응답은 미리보기로 읽힌
+    섹션이 있더라도 적용할 수 없도록 원문을 참고용으로만 남긴다.
+    """
+    preview = st.empty()
+    json_stream = JsonStream("{")
+    parts: list[str] = []
+    llm = stream_llm(SYSTEM_PROMPTS[mode], structure_prompt(ps, mode), template="structure", schema=STRUCTURE_SCHEMA)
+    with st.spinner("AI가 논문 구조를 설계하고 있습니다..."):
+        for delta in llm:
+            parts.append(delta)
+            sections = sections_from(json_stream.feed(delta))
+            if sections:
+                preview.markdown(_outline(sections))
+    result = "".join(parts)
+    preview.empty()
+    if not result:
+        return
+    complete = llm.completed and json_stream.done
+    sections = sections_from(json_stream.value) if complete else []
+    if not complete:
+        result = f"*응답이 끝까지 오지 않아 받은 부분만 표시합니다.*\n\n{result}"
+    st.session_state["ai_structure_suggestion"] = sections or result
+    add_chat("assistant", f"[구조 제안]\n{_outline(sections) if sections else result}")
+
+
+def _outline(sections: list[Section]) -> str:
+    lines = []
+    for sec in sections:
+        lines.append(f"- **{sec.title}**" + (f" — {sec.description}" if sec.description else ""))
+        for sub in sec.subsections:
+            lines.append(f"    - {sub['title']}" + (f": {sub['description']}" if sub.get("description") else ""))
+    return "\n".join(lines)
+
+
+def _reset_section_inputs() -> None:
+    """섹션 편집 입력 칸의 이전 상태를 지워 새 구조의 값이 보이게 한다."""
+    for key in [k for k in st.session_state if k.startswith(("sec_title_", "sec_desc_", "sub_"))]:
+        del st.session_state[key]
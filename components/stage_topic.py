@@ -4,9 +4,9 @@ from __future__ import annotations
 
 import streamlit as st
 
-from src.paper_state import get_paper_state, get_mode, set_stage, add_chat
-from src.llm_client import call_llm, is_llm_configured
-from src.prompts import SYSTEM_PROMPTS, QUICK_AUTOFILL_TOPIC, EXPERT_WORKSHOP_TOPIC
+from src.pipeline import apply_autofill
+from src.st_session import add_chat, call_llm, get_mode, get_paper_state, is_llm_configured, set_stage
+from src.prompts import SYSTEM_PROMPTS, AUTOFILL_SCHEMA, QUICK_AUTOFILL_TOPIC, EXPERT_WORKSHOP_TOPIC
 
 
 def render() -> None:
@@ -39,12 +39,18 @@ def _render_quick() -> None:
                 result = call_llm(
                     SYSTEM_PROMPTS["quick"],
                     QUICK_AUTOFILL_TOPIC.format(topic=ps.topic),
+                    template="autofill_topic",
+                    schema=AUTOFILL_SCHEMA,
                 )
-                if result:
+            if result:
+                add_chat("assistant", result)
+                if apply_autofill(ps, result):
+                    # 아래 입력 칸이 새 값을 보이도록 이전 입력 상태를 지운다
+                    for key in ("q_rq", "q_scope", "q_kw"):
+                        st.session_state.pop(key, None)
+                else:
+                    st.warning("응답에서 연구 질문/범위/키워드를 찾지 못했습니다.")
                     st.info(result)
-                    add_chat("assistant", result)
-                    # 사용자가 확인할 수 있도록 표시
-                    _try_parse_autofill(ps, result)
 
     # 자동완성 결과 확인/수정
     if ps.research_question or ps.scope or ps.keywords:
@@ -90,6 +96,7 @@ def _render_standard() -> None:
                 suggestion = call_llm(
                     SYSTEM_PROMPTS["standard"],
                     f"다음 주제에 대한 리뷰 논문의 연구 질문, 범위, 키워드를 각각 3개씩 제안해 주세요.\n\n주제: {ps.topic}",
+                    template="topic_suggestion",
                 )
                 if suggestion:
                     st.info(suggestion)
@@ -177,6 +184,7 @@ def _render_expert() -> None:
                         scope=ps.scope,
                         keywords=ps.keywords,
                     ),
+                    template="expert_workshop",
                 )
                 if result:
                     st.session_state["expert_workshop_guide"] = result
@@ -197,20 +205,3 @@ def _render_expert() -> None:
     if not ps.topic.strip():
         st.caption("주제를 입력하면 다음 단계로 진행할 수 있습니다.")
 
-
-# ── 유틸 ──
-
-def _try_parse_autofill(ps, text: str) -> None:
-    """AI 응답에서 JSON 파싱을 시도한다."""
-    import json
-    try:
-        # JSON 블록 추출 시도
-        start = text.find("{")
-        end = text.rfind("}") + 1
-        if start >= 0 and end > start:
-            data = json.loads(text[start:end])
-            ps.research_question = data.get("research_question", ps.research_question)
-            ps.scope = data.get("scope", ps.scope)
-            ps.keywords = data.get("keywords", ps.keywords)
-    except (json.JSONDecodeError, ValueError):
-        pass
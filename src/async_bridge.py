@@ -0,0 +1,59 @@
+"""동기 코드(Streamlit 스크립트/콜백)에서 asyncio 코루틴을 실행하기 위한 브리지.
+
+프로세스 전체에서 백그라운드 스레드 하나가 이벤트 루프를 계속 돌리고,
+동기 코드는 코루틴을 제출한 뒤 concurrent.futures.Future로 결과를 기다린다.
+루프가 계속 살아 있으므로 루프에 묶인 비동기 SDK 클라이언트와 연결 풀도 재사용된다.
+제출하는 쪽의 contextvars(예: src.llm_client.llm_labels)는 코루틴에 그대로 전달된다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Coroutine, Iterable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """백그라운드 이벤트 루프를 가져온다 (처음 호출 시 시작)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+
+async def _in_context(coro: Coroutine[Any, Any, T], context: contextvars.Context) -> T:
+    # 루프 스레드에서 만든 태스크는 루프 스레드의 컨텍스트를 물려받으므로, 제출한 쪽의 값을 다시 설정한다.
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def submit_async(coro: Coroutine[Any, Any, T]) -> Future[T]:
+    """코루틴을 백그라운드 루프에 제출하고 Future를 반환한다 (as_completed와 함께 사용 가능)."""
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, contextvars.copy_context()), get_loop())
+
+
+def run_async(coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """코루틴을 백그라운드 루프에서 실행하고 결과를 기다린다."""
+    return submit_async(coro).result(timeout)
+
+
+def submit_all(coros: Iterable[Coroutine[Any, Any, T]], limit: int) -> list[Future[T]]:
+    """코루틴들을 최대 limit개씩 동시에 실행하도록 제출한다. 반환 순서는 입력 순서와 같다."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro: Coroutine[Any, Any, T]) -> T:
+        async with semaphore:
+            return await coro
+
+    return [submit_async(bounded(coro)) for coro in coros]
@@ -0,0 +1,123 @@
+"""여러 후보 초안 동시 생성 (best of N).
+
+같은 섹션 프롬프트를 온도(와 선택적으로 모델)를 바꿔 N개 동시에 스트리밍한다. 사용자가 하나를 고르면
+아직 생성 중인 나머지는 바로 취소해 연결을 끊으므로 그 뒤의 출력 토큰은 더 생성되지 않는다.
+후보들은 동시에 진행되므로 "선택지 N개"를 받는 시간은 요청 한 번과 거의 같다.
+
+요청은 src.async_bridge의 백그라운드 루프에서 실행되고, 화면은 text/done 상태를 주기적으로 읽어 그린다.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+
+from src.async_bridge import submit_async
+from src.config import LLMConfig
+from src.llm_client import astream_llm, default_model, fast_model
+
+# 후보 i의 온도 = 설정 온도 + 이 값 (0~1로 자른다). 첫 후보는 설정 그대로다.
+TEMPERATURE_OFFSETS = (0.0, 0.3, -0.3, 0.5)
+MAX_CANDIDATES = len(TEMPERATURE_OFFSETS)
+
+
+def candidate_configs(cfg: LLMConfig, n: int, mix_models: bool = False) -> list[LLMConfig]:
+    """후보별 설정. mix_models면 홀수 번째 후보는 빠른 모델(src.routing)로 만든다.
+
+    후보마다 모델을 정해 두었으므로 라우팅은 끄고, 같은 프롬프트라 응답 캐시도 쓰지 않는다.
+    """
+    main = cfg.model or default_model(cfg.provider)
+    fast = fast_model(cfg)
+    configs = []
+    for i in range(min(n, MAX_CANDIDATES)):
+        temperature = round(min(1.0, max(0.0, cfg.temperature + TEMPERATURE_OFFSETS[i])), 2)
+        model = fast if mix_models and fast and i % 2 == 1 else main
+        configs.append(replace(cfg, model=model, temperature=temperature, fast_routes=(), use_cache=False))
+    return configs
+
+
+@dataclass
+class Candidate:
+    cfg: LLMConfig
+    parts: list[str] = field(default_factory=list)
+    done: bool = False
+    cancelled: bool = False
+    error: str = ""
+    future: Future | None = None
+
+    def _settle(self, future: Future) -> None:
+        # 시작하기 전에 취소된 요청은 코루틴이 실행되지 않으므로 완료 표시를 Future 콜백에서 한다.
+        self.cancelled = future.cancelled()
+        self.done = True
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def label(self) -> str:
+        return f"{self.cfg.model} · T={self.cfg.temperature:g}"
+
+
+class CandidateRun:
+    """후보 N개의 동시 생성. 만들자마자 요청을 시작한다.
+
+    요청의 계측 라벨(src.llm_client.llm_labels)은 만드는 쪽의 컨텍스트를 그대로 따른다.
+    """
+
+    def __init__(self, configs: list[LLMConfig], system_prompt: str, user_prompt: str,
+                 template: str = "draft_section") -> None:
+        self.candidates = [Candidate(cfg) for cfg in configs]
+        self.chosen: int | None = None
+        self.choice_error = ""  # 고른 후보가 오류로 끝났을 때의 메시지 (다시 고르면 지운다)
+        for candidate in self.candidates:
+            candidate.future = submit_async(self._consume(candidate, system_prompt, user_prompt, template))
+            candidate.future.add_done_callback(candidate._settle)
+
+    @staticmethod
+    async def _consume(candidate: Candidate, system_prompt: str, user_prompt: str, template: str) -> None:
+        try:
+            async for delta in astream_llm(candidate.cfg, system_prompt, user_prompt, use_cache=False,
+                                           template=template):
+                candidate.parts.append(delta)
+        except Exception as e:
+            candidate.error = str(e)
+
+    @property
+    def finished(self) -> bool:
+        return all(c.done for c in self.candidates)
+
+    def choose(self, index: int) -> None:
+        """index 후보를 고른다. 아직 생성 중인 다른 후보는 취소한다 (고른 후보는 끝까지 받는다)."""
+        self.chosen = index
+        self.choice_error = ""
+        for i, candidate in enumerate(self.candidates):
+            if i != index and not candidate.done:
+                candidate.future.cancel()
+
+    def cancel(self) -> None:
+        """모든 후보를 취소한다."""
+        for candidate in self.candidates:
+            if not candidate.done:
+                candidate.future.cancel()
+
+    def result(self) -> str | None:
+        """고른 후보가 끝났으면 그 텍스트, 아니면 None.
+
+        고른 후보가 오류로 끝났으면 선택을 풀고 choice_error에 남긴다. 이미 끝난 다른 후보는 다시 고를 수 있다.
+        """
+        if self.chosen is None:
+            return None
+        candidate = self.candidates[self.chosen]
+        if not candidate.done:
+            return None
+        if candidate.error or candidate.cancelled:
+            self.chosen = None
+            self.choice_error = candidate.error or "취소됨"
+            return None
+        return candidate.text
+
+    @property
+    def selectable(self) -> bool:
+        """고를 수 있는(오류나 취소로 끝나지 않은) 후보가 남아 있는지."""
+        return any(not c.error and not c.cancelled for c in self.candidates)
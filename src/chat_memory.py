@@ -0,0 +1,98 @@
+"""대화형 도우미의 대화 기억 — 최근 메시지 원문 + 이전 대화의 누적 요약.
+
+PaperState.chat_history에는 요약되지 않은 메시지만 원문으로 남고, 그보다 오래된 대화는
+chat_summary 한 덩어리로 접힌다. 요약할 메시지가 SUMMARY_BATCH개 쌓일 때마다 (이전 요약 + 새 메시지)를
+다시 요약하므로 LLM 호출은 몇 턴에 한 번이고, 프롬프트·메모리·저장 크기는 대화 길이와 무관하게 일정하다.
+
+- 메시지 하나는 MESSAGE_TOKEN_LIMIT 토큰으로 잘라서 보관한다 (초안/개선 결과도 기록되기 때문).
+- 요약을 못 하는 동안(API 키 없음, 실패)에도 HISTORY_LIMIT개를 넘으면 오래된 것부터 버린다.
+  버려지는 것은 대부분 초안/개선 결과라 본문은 draft_sections와 버전 기록에 그대로 남아 있다.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.prompts import CHAT_PROMPT, CHAT_SUMMARY_PROMPT
+from src.retrieval import related_context
+from src.tokens import count_tokens, fit_text
+
+if TYPE_CHECKING:
+    from src.paper_state import PaperState
+
+RECENT_MESSAGES = 6
+SUMMARY_BATCH = 6
+HISTORY_LIMIT = 40
+MESSAGE_TOKEN_LIMIT = 600
+SUMMARY_TOKEN_LIMIT = 500
+
+_ROLE_LABELS = {"user": "사용자", "assistant": "도우미"}
+
+
+def append(history: list[dict], role: str, content: str) -> None:
+    """메시지를 잘라서 추가하고, HISTORY_LIMIT개를 넘는 오래된 메시지는 버린다."""
+    history.append({"role": role, "content": fit_text(content, MESSAGE_TOKEN_LIMIT)})
+    if len(history) > HISTORY_LIMIT:
+        del history[:len(history) - HISTORY_LIMIT]
+
+
+def trim(history: list[dict]) -> list[dict]:
+    """저장된 기록을 현재 한도에 맞춘다 (한도가 생기기 전에 저장된 논문을 열 때)."""
+    return [{"role": m["role"], "content": fit_text(m["content"], MESSAGE_TOKEN_LIMIT)}
+            for m in history[-HISTORY_LIMIT:]]
+
+
+def _format(messages: list[dict]) -> str:
+    return "\n\n".join(f"[{_ROLE_LABELS.get(m['role'], m['role'])}] {m['content']}" for m in messages)
+
+
+def summary_prompt(ps: PaperState) -> tuple[str, int] | None:
+    """요약할 때가 되었으면 (요약 프롬프트, 접을 메시지 수), 아니면 None."""
+    folded = len(ps.chat_history) - RECENT_MESSAGES
+    if folded < SUMMARY_BATCH:
+        return None
+    prompt = CHAT_SUMMARY_PROMPT.format(
+        summary=ps.chat_summary or "(없음)",
+        messages=_format(ps.chat_history[:folded]),
+        limit=SUMMARY_TOKEN_LIMIT,
+    )
+    return prompt, folded
+
+
+def apply_summary(ps: PaperState, summary: str, folded: int) -> None:
+    """summary_prompt의 결과를 반영한다 — 요약을 바꾸고 접은 메시지를 기록에서 뺀다."""
+    ps.chat_summary = fit_text(summary.strip(), SUMMARY_TOKEN_LIMIT)
+    del ps.chat_history[:folded]
+
+
+def chat_prompt(ps: PaperState, stage_label: str, question: str, budget: int, model: str = "") -> str:
+    """CHAT_PROMPT를 채운다. 논문 정보·관련 본문·요약·최근 대화를 합쳐 budget 토큰 안에 맞춘다.
+
+    예산의 1/8은 연구 질문과 범위, 1/3은 질문으로 검색한 개요/초안/최종 논문의 관련 조각
+    (src.retrieval), 나머지는 요약과 최근 대화에 쓴다. 최근 대화는 가장 최근 메시지부터 남은 예산만큼 넣는다.
+    """
+    facts = [f"연구 질문: {ps.research_question}" if ps.research_question else "",
+             f"범위: {ps.scope}" if ps.scope else ""]
+    context = fit_text("\n".join(f for f in facts if f) or "(없음)", budget // 8, model)
+    excerpts = related_context(ps, question, budget // 3, model=model) or "(없음)"
+
+    summary = ps.chat_summary or "(없음)"
+    remaining = (budget - count_tokens(context, model) - count_tokens(excerpts, model)
+                 - count_tokens(summary, model))
+    recent: list[dict] = []
+    for message in reversed(ps.chat_history[-RECENT_MESSAGES:]):
+        cost = count_tokens(message["content"], model) + 4
+        if cost > remaining:
+            break
+        recent.insert(0, message)
+        remaining -= cost
+
+    return CHAT_PROMPT.format(
+        topic=ps.topic or "(미설정)",
+        stage=stage_label,
+        context=context,
+        excerpts=excerpts,
+        summary=summary,
+        history=_format(recent) or "(없음)",
+        question=question,
+    )
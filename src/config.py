@@ -0,0 +1,46 @@
+"""LLM 호출 설정.
+
+화면(세션), 배치 실행기, 워커 스레드가 모두 같은 설정 객체를 주고받는다.
+불변 객체이므로 스레드/이벤트 루프 사이에 그대로 넘겨도 안전하고, 일부만 바꿀 때는
+dataclasses.replace를 쓴다.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, fields
+
+from src.routing import DEFAULT_FAST_ROUTES
+from src.tokens import DEFAULT_CONTEXT_BUDGET
+
+# 여러 섹션을 한 번에 생성할 때의 기본 동시 요청 수.
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    provider: str = "OpenAI"
+    model: str = ""  # 비어 있으면 제공자의 첫 번째 모델
+    api_key: str = ""
+    base_url: str | None = None  # 여러 줄이면 엔드포인트 풀 (src.endpoints)
+    temperature: float = 0.7
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    context_budget: int = DEFAULT_CONTEXT_BUDGET
+    use_cache: bool = True
+    fast_model: str = ""  # 가벼운 요청용 모델. 비어 있으면 제공자의 기본 빠른 모델 (src.routing)
+    fast_routes: tuple[str, ...] = DEFAULT_FAST_ROUTES  # 빠른 모델로 보낼 요청. 비우면 라우팅하지 않는다
+
+    @property
+    def is_configured(self) -> bool:
+        # 자체 호스팅 서버나 프록시는 키 없이 base_url만으로 쓸 수 있다.
+        return bool(self.api_key.strip() or (self.base_url or "").strip())
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> LLMConfig:
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in d.items() if k in known}
+        if "fast_routes" in values:
+            values["fast_routes"] = tuple(values["fast_routes"])
+        return cls(**values)
@@ -0,0 +1,219 @@
+"""엔드포인트 풀 — 여러 추론 서버(vLLM, llama.cpp 등)에 호출을 나누고, 죽은 서버는 건너뛴다.
+
+LLMConfig.base_url에 URL을 여러 개 넣으면(줄바꿈이나 쉼표로 구분) 호출마다 그중 하나를 고른다.
+URL 뒤에 공백과 숫자를 붙이면 가중치가 된다 (기본 1).
+
+    http://gpu1:8000/v1 3
+    http://gpu2:8000/v1
+
+- 분산: 정상인 엔드포인트 사이에서 가중치 비율대로 고르게 돌아가며 보낸다 (smooth weighted round-robin).
+- 장애 조치: 일시적 오류(연결 실패, 타임아웃, 429, 5xx)가 나면 그 엔드포인트를 잠시 제외한다.
+  src.scheduler가 재시도하면 다른 엔드포인트로 간다. 제외 시간은 연속 실패마다 두 배로 늘어난다.
+  모두 제외되어 있으면 가장 먼저 풀리는 엔드포인트로 보낸다.
+- 상태 확인: check()가 모든 엔드포인트의 모델 목록을 동시에 조회해 응답 여부와 지연 시간을 기록한다.
+
+base_url이 비어 있거나 하나뿐이어도 같은 경로를 거친다 (엔드포인트 하나짜리 풀).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from src.scheduler import is_retryable
+
+T = TypeVar("T")
+
+# 일시적 오류 뒤 엔드포인트를 제외하는 시간(초). 연속 실패마다 두 배, 최대 DOWN_MAX까지.
+DOWN_COOLDOWN = 10.0
+DOWN_MAX = 300.0
+
+# 상태 확인 요청의 제한 시간(초).
+HEALTH_TIMEOUT = 5.0
+
+_SEPARATORS = re.compile(r"[\n,]+")
+
+
+def parse_endpoints(base_url: str | None) -> list[tuple[str | None, float]]:
+    """base_url 문자열을 (URL, 가중치) 목록으로 바꾼다. 비어 있으면 [(None, 1.0)] (제공자 기본 URL)."""
+    endpoints: list[tuple[str | None, float]] = []
+    for entry in _SEPARATORS.split(base_url or ""):
+        parts = entry.split()
+        if not parts:
+            continue
+        weight = 1.0
+        if len(parts) > 1:
+            try:
+                weight = float(parts[1])
+            except ValueError:
+                raise ValueError(f"엔드포인트 가중치가 숫자가 아닙니다: {entry.strip()!r}") from None
+        if weight > 0:
+            endpoints.append((parts[0].rstrip("/"), weight))
+    return endpoints or [(None, 1.0)]
+
+
+@dataclass
+class Endpoint:
+    url: str | None
+    weight: float = 1.0
+    current: float = 0.0  # smooth weighted round-robin 점수
+    inflight: int = 0
+    calls: int = 0
+    failures: int = 0  # 연속 실패 수
+    down_until: float = 0.0
+    latency: float | None = None  # 최근 호출(또는 상태 확인)의 지연 시간(초)
+    last_error: str = ""
+    models: list[str] = field(default_factory=list)  # 마지막 상태 확인에서 받은 모델 목록
+
+
+class EndpointPool:
+    """엔드포인트 선택과 상태 기록. 여러 스레드/이벤트 루프에서 사용해도 안전하다.
+
+    call/stream/acall/astream은 fn(url)을 고른 엔드포인트로 실행하고 결과를 기록한다.
+    재시도는 하지 않는다 — src.scheduler가 감싸서 재시도하면 그때 다시 고른다.
+    """
+
+    def __init__(self, endpoints: list[tuple[str | None, float]], cooldown: float = DOWN_COOLDOWN) -> None:
+        self.endpoints = [Endpoint(url, weight) for url, weight in endpoints]
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self) -> str:
+        """엔드포인트 URL 묶음을 나타내는 문자열. 순서, 가중치, 끝의 '/'가 달라도 같은 서버들이면 같다."""
+        return " ".join(sorted({(e.url or "").rstrip("/") for e in self.endpoints}))
+
+    def _take(self) -> Endpoint:
+        now = time.monotonic()
+        with self._lock:
+            up = [e for e in self.endpoints if e.down_until <= now]
+            if up:
+                for e in up:
+                    e.current += e.weight
+                endpoint = max(up, key=lambda e: e.current)
+                endpoint.current -= sum(e.weight for e in up)
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.down_until)
+            endpoint.inflight += 1
+            endpoint.calls += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, error: BaseException | None, started: float) -> None:
+        with self._lock:
+            endpoint.inflight -= 1
+            if error is None:
+                endpoint.failures = 0
+                endpoint.down_until = 0.0
+                endpoint.latency = time.perf_counter() - started
+                endpoint.last_error = ""
+            elif isinstance(error, Exception) and is_retryable(error):
+                self._mark_down(endpoint, str(error))
+
+    def _mark_down(self, endpoint: Endpoint, reason: str) -> None:
+        """_lock을 잡은 상태에서 호출한다."""
+        endpoint.failures += 1
+        delay = min(DOWN_MAX, self.cooldown * 2 ** (endpoint.failures - 1))
+        endpoint.down_until = time.monotonic() + delay
+        endpoint.last_error = reason
+
+    def call(self, fn: Callable[[str | None], T]) -> T:
+        endpoint, started = self._take(), time.perf_counter()
+        try:
+            result = fn(endpoint.url)
+        except BaseException as e:
+            self._release(endpoint, e, started)
+            raise
+        self._release(endpoint, None, started)
+        return result
+
+    def stream(self, fn: Callable[[str | None], Iterator[T]]) -> Iterator[T]:
+        endpoint, started = self._take(), time.perf_counter()
+        error: BaseException | None = None
+        try:
+            yield from fn(endpoint.url)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # 호출한 쪽이 중간에 닫은 스트림(GeneratorExit)은 실패로 치지 않는다.
+            self._release(endpoint, None if isinstance(error, GeneratorExit) else error, started)
+
+    async def acall(self, fn: Callable[[str | None], Awaitable[T]]) -> T:
+        endpoint, started = self._take(), time.perf_counter()
+        try:
+            result = await fn(endpoint.url)
+        except BaseException as e:
+            self._release(endpoint, e, started)
+            raise
+        self._release(endpoint, None, started)
+        return result
+
+    async def astream(self, fn: Callable[[str | None], AsyncIterator[T]]) -> AsyncIterator[T]:
+        endpoint, started = self._take(), time.perf_counter()
+        error: BaseException | None = None
+        try:
+            async for item in fn(endpoint.url):
+                yield item
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            closed = isinstance(error, (GeneratorExit, asyncio.CancelledError))
+            self._release(endpoint, None if closed else error, started)
+
+    def check(self, probe: Callable[[str | None], list[str]]) -> None:
+        """모든 엔드포인트에 probe(url)(모델 목록 조회)를 동시에 보내 상태를 갱신한다."""
+
+        def run(endpoint: Endpoint) -> None:
+            started = time.perf_counter()
+            try:
+                models = probe(endpoint.url)
+            except Exception as e:
+                with self._lock:
+                    self._mark_down(endpoint, str(e) or type(e).__name__)
+                return
+            with self._lock:
+                endpoint.models = list(models)
+                endpoint.latency = time.perf_counter() - started
+                endpoint.failures = 0
+                endpoint.down_until = 0.0
+                endpoint.last_error = ""
+
+        with ThreadPoolExecutor(max_workers=min(8, len(self.endpoints))) as pool:
+            list(pool.map(run, self.endpoints))
+
+    def status(self) -> list[dict]:
+        """엔드포인트별 상태 (화면/로그 표시용)."""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "url": e.url,
+                "weight": e.weight,
+                "up": e.down_until <= now,
+                "inflight": e.inflight,
+                "calls": e.calls,
+                "latency": e.latency,
+                "error": e.last_error,
+                "models": list(e.models),
+            } for e in self.endpoints]
+
+
+_pools: dict[tuple, EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(provider: str, api_key: str, base_url: str | None) -> EndpointPool:
+    """(provider, API 키, base_url)별 엔드포인트 풀. 상태는 프로세스 전체에서 공유한다."""
+    key = (provider, api_key, base_url or None)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = EndpointPool(parse_endpoints(base_url))
+            _pools[key] = pool
+        return pool
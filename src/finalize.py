@@ -0,0 +1,131 @@
+"""긴 논문용 단계별(map-reduce) 최종 통합.
+
+한 번의 호출로 모든 섹션을 통합하면 컨텍스트 한도와 출력 토큰 한도(max_tokens)에 걸려 결과가 잘린다.
+대신 각 섹션을 전체 구조와 함께 병렬로 다듬고(map), 섹션 앞부분과 결론 초안을 모아 한 번의 마무리 호출로
+Abstract, 섹션 사이 전환 문장, 논문 전체를 종합하는 결론을 쓴 뒤(reduce) 원래 섹션 순서대로 조립한다.
+호출당 입력/출력 크기가 섹션 하나 분량으로 유지된다.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from src.prompts import FINALIZE_SECTION_PROMPT, FINALIZE_STITCH_PROMPTS
+from src.references import is_reference_section
+from src.structured import parse_json
+
+# 작성된 섹션 본문의 합이 이 글자 수를 넘으면 단계별 통합을 사용한다.
+SINGLE_PASS_MAX_CHARS = 12_000
+
+# Abstract 작성 시 섹션마다 넘기는 앞부분 길이.
+DIGEST_CHARS = 600
+
+
+def is_abstract(title: str) -> bool:
+    return "abstract" in title.lower() or "초록" in title
+
+
+def is_conclusion(title: str) -> bool:
+    return "conclusion" in title.lower() or "결론" in title
+
+
+def split_sections(written: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
+    """작성된 (제목, 본문)을 (다듬을 섹션, 결론 초안)으로 나눈다.
+
+    Abstract와 결론은 마무리 단계에서 전체를 보고 다시 쓰므로 다듬기 대상에서 뺀다.
+    """
+    conclusion = next((content for title, content in written if is_conclusion(title)), "")
+    body = [(t, c) for t, c in written if not is_abstract(t) and not is_conclusion(t)]
+    return body, conclusion
+
+
+def needs_map_reduce(contents: list[str]) -> bool:
+    return sum(len(c) for c in contents) > SINGLE_PASS_MAX_CHARS
+
+
+def global_outline(sections: list[tuple[str, str]]) -> str:
+    """(제목, 설명) 목록으로 모든 섹션 프롬프트에 공통으로 넣을 간결한 구조 요약을 만든다."""
+    return "\n".join(f"- {title}: {desc}" if desc else f"- {title}" for title, desc in sections)
+
+
+def harmonize_prompts(topic: str, research_question: str, outline: str,
+                      written: list[tuple[str, str]]) -> list[str]:
+    """작성된 (제목, 본문) 섹션마다 다듬기 프롬프트를 만든다 (Abstract 섹션은 제외하고 호출한다)."""
+    prompts = []
+    for i, (title, content) in enumerate(written):
+        prompts.append(FINALIZE_SECTION_PROMPT.format(
+            topic=topic,
+            research_question=research_question or "(미설정)",
+            outline=outline,
+            prev_title=written[i - 1][0] if i > 0 else "(없음 — 첫 섹션)",
+            next_title=written[i + 1][0] if i + 1 < len(written) else "(없음 — 마지막 섹션)",
+            section_title=title,
+            content=content,
+        ))
+    return prompts
+
+
+def stitch_prompt(mode: str, topic: str, research_question: str, harmonized: list[tuple[str, str]],
+                  conclusion: str = "") -> str:
+    """다듬어진 섹션들의 앞부분과 결론 초안으로 마무리(Abstract, 전환 문장, 결론) 프롬프트를 만든다.
+
+    참고문헌 섹션은 요약과 전환 대상에서 뺀다. 응답 형식은 src.prompts.STITCH_SCHEMA다.
+    """
+    digests = "\n\n".join(f"## {title}\n{content[:DIGEST_CHARS]}" for title, content in harmonized
+                          if not is_reference_section(title))
+    fmt_kwargs = dict(topic=topic, section_digests=digests, conclusion=conclusion.strip() or "(없음)")
+    if mode != "quick":
+        fmt_kwargs["research_question"] = research_question or "(미설정)"
+    return FINALIZE_STITCH_PROMPTS[mode].format(**fmt_kwargs)
+
+
+@dataclass
+class Stitch:
+    abstract: str = ""
+    transitions: dict[str, str] = field(default_factory=dict)  # 섹션 제목 -> 그 섹션 끝에 붙일 전환 문장
+    conclusion: str = ""
+
+
+def _text(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def parse_stitch(text: str) -> Stitch:
+    """마무리 응답을 읽는다. JSON이 아니면(형식을 따르지 않은 응답) 전체를 Abstract로 쓴다."""
+    data = parse_json(text or "", "{")
+    if not isinstance(data, dict):
+        return Stitch(abstract=(text or "").strip())
+    transitions = {}
+    for item in data.get("transitions") or []:
+        if isinstance(item, dict) and _text(item.get("after")) and _text(item.get("text")):
+            transitions[_text(item["after"])] = _text(item["text"])
+    return Stitch(_text(data.get("abstract")), transitions, _text(data.get("conclusion")))
+
+
+def assemble_paper(topic: str, titles: list[str], harmonized: dict[str, str], stitch: Stitch) -> str:
+    """섹션 순서대로 최종 논문을 조립한다.
+
+    Abstract와 결론은 stitch의 것을 쓴다 (결론이 비어 있으면 harmonized의 초안). 해당 섹션이 없으면
+    Abstract는 맨 앞에, 결론은 참고문헌 앞(없으면 맨 끝)에 넣는다. 전환 문장은 그 섹션 본문 끝에 붙인다.
+    """
+    parts = [f"# {topic}"]
+    if stitch.abstract and not any(is_abstract(t) for t in titles):
+        parts.append(f"## Abstract\n\n{stitch.abstract}")
+    conclusion_placed = not stitch.conclusion or any(is_conclusion(t) for t in titles)
+    for title in titles:
+        if not conclusion_placed and is_reference_section(title):
+            parts.append(f"## Conclusion\n\n{stitch.conclusion}")
+            conclusion_placed = True
+        if is_abstract(title):
+            body = stitch.abstract
+        elif is_conclusion(title):
+            body = stitch.conclusion or harmonized.get(title, "")
+        else:
+            body = harmonized.get(title, "")
+            if body and stitch.transitions.get(title) and not is_reference_section(title):
+                body = f"{body.rstrip()}\n\n{stitch.transitions[title]}"
+        if body:
+            parts.append(f"## {title}\n\n{body}")
+    if not conclusion_placed:
+        parts.append(f"## Conclusion\n\n{stitch.conclusion}")
+    return "\n\n".join(parts) + "\n"
@@ -0,0 +1,86 @@
+"""문서별 버전 기록 — 줄 단위 델타 + 주기적 스냅샷.
+
+한 문서(섹션 초안, 최종 논문)의 기록은 JSON으로 저장 가능한 dict의 리스트다.
+
+    {"ts": 1700000000.0, "label": "AI 개선", "snapshot": "전체 텍스트"}
+    {"ts": 1700000100.0, "label": "수동 편집", "delta": [[0, 12], "새 줄\\n", [14, 30]]}
+
+delta는 바로 앞 버전의 줄 범위 복사([시작, 끝])와 새로 들어간 텍스트(문자열)의 나열이다.
+SNAPSHOT_EVERY 버전마다 전체 스냅샷을 두므로 어떤 버전이든 최대 SNAPSHOT_EVERY - 1개의
+델타만 적용하면 복원되고, 문서당 MAX_REVISIONS개를 넘으면 오래된 버전부터 버린다.
+"""
+
+from __future__ import annotations
+
+import difflib
+import time
+
+SNAPSHOT_EVERY = 8
+MAX_REVISIONS = 30
+
+
+def make_delta(old: str, new: str) -> list:
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    delta: list = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append("".join(new_lines[j1:j2]))
+    return delta
+
+
+def apply_delta(old: str, delta: list) -> str:
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def restore(revisions: list[dict], index: int) -> str:
+    """index번째 버전의 전체 텍스트를 복원한다."""
+    start = index
+    while "snapshot" not in revisions[start]:
+        start -= 1
+    text = revisions[start]["snapshot"]
+    for rev in revisions[start + 1:index + 1]:
+        text = apply_delta(text, rev["delta"])
+    return text
+
+
+def record(revisions: list[dict], text: str, label: str) -> bool:
+    """새 버전을 추가한다. 마지막 버전과 같으면 아무것도 하지 않고 False를 반환한다."""
+    if revisions:
+        latest = restore(revisions, len(revisions) - 1)
+        if latest == text:
+            return False
+        since_snapshot = next(i for i, rev in enumerate(reversed(revisions)) if "snapshot" in rev)
+        if since_snapshot + 1 < SNAPSHOT_EVERY:
+            revisions.append({"ts": time.time(), "label": label, "delta": make_delta(latest, text)})
+            _trim(revisions)
+            return True
+    revisions.append({"ts": time.time(), "label": label, "snapshot": text})
+    _trim(revisions)
+    return True
+
+
+def _trim(revisions: list[dict]) -> None:
+    """MAX_REVISIONS를 넘는 오래된 버전을 버린다. 새 첫 버전은 스냅샷으로 바꾼다."""
+    excess = len(revisions) - MAX_REVISIONS
+    if excess <= 0:
+        return
+    first = restore(revisions, excess)
+    del revisions[:excess]
+    revisions[0] = {"ts": revisions[0]["ts"], "label": revisions[0]["label"], "snapshot": first}
+
+
+def unified_diff(old: str, new: str, old_label: str = "이전", new_label: str = "현재") -> str:
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True), fromfile=old_label, tofile=new_label,
+    ))
@@ -0,0 +1,121 @@
+"""LLM 응답 캐시 — 메모리 LRU 계층 + 선택적 SQLite 디스크 계층."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(provider: str, model: str, temperature: float, system_prompt: str, user_prompt: str,
+                   endpoint: str = "") -> str:
+    """요청 내용으로부터 캐시 키(SHA-256)를 만든다.
+
+    endpoint는 요청을 받을 서버 묶음(EndpointPool.identity)이다. 같은 모델 이름이라도 Base URL이 다르면
+    (다른 로컬 서버, 다른 프록시) 다른 모델일 수 있으므로 키에 넣는다.
+    """
+    payload = json.dumps([provider, model, round(float(temperature), 3), system_prompt, user_prompt, endpoint],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """내용 주소 기반(content-addressed) 응답 캐시.
+
+    메모리 계층은 항목 수 기준 LRU, 디스크 계층(disk_path 지정 시)은 총 바이트 수 기준으로
+    오래 사용되지 않은 항목부터 지운다. 두 계층 모두 ttl(초)이 지난 항목은 무시한다.
+    여러 스레드에서 동시에 사용해도 안전하다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 24 * 3600,
+        disk_path: str | None = None,
+        max_disk_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()  # key -> (value, created)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                size = len(value.encode("utf-8"))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._memory)}
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
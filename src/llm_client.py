@@ -1,73 +1,800 @@
-"""LLM API 클라이언트 - OpenAI 및 Anthropic API 지원."""
+"""LLM API 클라이언트 - OpenAI, Anthropic 및 OpenAI 호환 자체 호스팅 서버(vLLM, llama.cpp 등) 지원.
+
+제공자는 PROVIDERS에 등록된 항목이다. register_provider()로 새 제공자를 추가할 수 있고,
+환경 변수 LLM_PROVIDER_PLUGINS에 모듈 이름을 쉼표로 나열하면 시작할 때 import해 등록하게 한다.
+"""
 
 from __future__ import annotations
 
-import streamlit as st
+import asyncio
+import atexit
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.config import LLMConfig
+from src.endpoints import HEALTH_TIMEOUT, EndpointPool, pool_for
+from src.llm_cache import ResponseCache, make_cache_key
+from src.prompt_cache import cacheable_prefix, prefix_key, prefix_tracker
+from src.routing import FAST, MAIN, route_tier
+from src.scheduler import ProviderScheduler, get_scheduler
+from src.tokens import approx_tokens, choose_max_tokens, count_tokens
+
+# 이 시간(초) 동안 사용되지 않은 클라이언트는 연결 풀과 함께 닫는다.
+CLIENT_IDLE_TTL = 600.0
+
+# 프로세스 전체에서 공유하는 응답 캐시. 환경 변수 LLM_CACHE_DB에 SQLite 파일 경로를 지정하면
+# 메모리 계층 뒤에 디스크 계층을 추가로 사용한다.
+response_cache = ResponseCache(disk_path=os.environ.get("LLM_CACHE_DB") or None)
+
+# 응답 캐시는 모든 세션이 함께 쓰므로 UI에서 비우기는 환경 변수 LLM_CACHE_ADMIN=1로 띄운 서버에서만 허용한다.
+CACHE_ADMIN = os.environ.get("LLM_CACHE_ADMIN", "").strip() not in ("", "0")
+
+# 요청 하나의 제한 시간(초). 환경 변수 LLM_REQUEST_TIMEOUT으로 정하며, 비워 두면 SDK 기본값(10분)을 쓴다.
+# 시간이 지나면 APITimeoutError로 끝나고 src.scheduler가 (다른 엔드포인트로) 재시도한다.
+REQUEST_TIMEOUT = float(os.environ["LLM_REQUEST_TIMEOUT"]) if os.environ.get("LLM_REQUEST_TIMEOUT") else None
 
 
-def _call_openai(api_key: str, model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+def _sdk_options() -> dict:
+    # 재시도는 src.scheduler가 담당하므로 SDK 자체 재시도는 끈다.
+    options: dict = {"max_retries": 0}
+    if REQUEST_TIMEOUT:
+        options["timeout"] = REQUEST_TIMEOUT
+    return options
+
+
+def _new_openai_client(api_key: str, base_url: str | None):
     from openai import OpenAI
 
-    client = OpenAI(api_key=api_key)
+    return OpenAI(api_key=api_key, base_url=base_url, **_sdk_options())
+
+
+def _new_anthropic_client(api_key: str, base_url: str | None):
+    import anthropic
+
+    return anthropic.Anthropic(api_key=api_key, base_url=base_url, **_sdk_options())
+
+
+def _new_async_openai_client(api_key: str, base_url: str | None):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, **_sdk_options())
+
+
+def _new_async_anthropic_client(api_key: str, base_url: str | None):
+    import anthropic
+
+    return anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, **_sdk_options())
+
+
+def _keyless(factory: Callable[[str, str | None], object]) -> Callable[[str, str | None], object]:
+    # 자체 호스팅 서버는 대개 키를 검사하지 않지만 SDK는 빈 키를 거부한다.
+    return lambda api_key, base_url: factory(api_key or "local", base_url)
+
+
+# ── 요청 구성 ──
+# prefix는 user_prompt의 캐시할 앞부분(src.prompt_cache.cacheable_prefix, 없으면 "")이다.
+# usage는 호출의 계측 이벤트다. 응답이 보고한 입력(캐시 포함)/출력 토큰 수와 캐시 읽기/쓰기 토큰 수를
+# input_tokens / output_tokens / cache_read_tokens / cache_write_tokens로 기록한다.
+# usage["schema"]가 있으면 그 JSON 스키마({"name", "description", "schema"})로 구조화 출력을 요청하고
+# 응답으로 JSON 텍스트를 돌려준다 (OpenAI: response_format, Anthropic: 강제 도구 호출의 입력).
+
+def _openai_messages(system_prompt: str, user_prompt: str) -> list[dict]:
+    # OpenAI는 앞부분이 같으면 자동으로 캐시하므로 메시지를 나누지 않는다.
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _openai_options(prefix: str, max_tokens: int, usage: dict) -> dict:
+    # 예전 vLLM/llama.cpp 서버는 max_completion_tokens를 거부하므로 제공자 능력에 적힌 이름으로 보낸다.
+    options: dict = {PROVIDERS[usage["provider"]]["capabilities"]["max_tokens_param"]: max_tokens}
+    schema = usage.get("schema")
+    if prefix:
+        # 같은 접두사의 요청을 같은 캐시 서버로 보내도록 하는 힌트. 구버전 SDK도 받도록 extra_body로 넘긴다.
+        options["extra_body"] = {"prompt_cache_key": hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]}
+    if schema:
+        options["response_format"] = {"type": "json_schema", "json_schema": {
+            "name": schema["name"], "schema": schema["schema"], "strict": True}}
+    return options
+
+
+def _openai_usage(usage, out: dict) -> None:
+    out["input_tokens"] = getattr(usage, "prompt_tokens", None) or out["input_tokens"]
+    out["output_tokens"] = getattr(usage, "completion_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    out["cache_read_tokens"] = getattr(details, "cached_tokens", None) or 0
+
+
+def _anthropic_messages(prefix: str, user_prompt: str) -> list[dict]:
+    if not prefix:
+        return [{"role": "user", "content": user_prompt}]
+    return [{"role": "user", "content": [
+        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": user_prompt[len(prefix):]},
+    ]}]
+
+
+def _anthropic_options(schema: dict | None) -> dict:
+    if not schema:
+        return {}
+    # 스키마를 도구 하나로 정의하고 그 도구를 반드시 부르게 하면 도구 입력이 스키마에 맞는 JSON이 된다.
+    return {"tools": [{"name": schema["name"], "description": schema.get("description", ""),
+                       "input_schema": schema["schema"]}],
+            "tool_choice": {"type": "tool", "name": schema["name"]}}
+
+
+def _anthropic_text(resp) -> str:
+    for block in resp.content:
+        if block.type == "tool_use":
+            return json.dumps(block.input, ensure_ascii=False)
+    return "".join(block.text for block in resp.content if block.type == "text")
+
+
+def _anthropic_usage(usage, out: dict) -> None:
+    out["cache_read_tokens"] = getattr(usage, "cache_read_input_tokens", None) or 0
+    out["cache_write_tokens"] = getattr(usage, "cache_creation_input_tokens", None) or 0
+    # Anthropic의 input_tokens에는 캐시에서 읽거나 캐시에 쓴 토큰이 빠져 있다.
+    uncached = getattr(usage, "input_tokens", None)
+    if uncached is not None:
+        out["input_tokens"] = uncached + out["cache_read_tokens"] + out["cache_write_tokens"]
+    out["output_tokens"] = getattr(usage, "output_tokens", None) or 0
+
+
+def _call_openai(client, model: str, system_prompt: str, user_prompt: str,
+                 temperature: float, max_tokens: int, prefix: str, usage: dict) -> str:
     resp = client.chat.completions.create(
         model=model,
         temperature=temperature,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
+        messages=_openai_messages(system_prompt, user_prompt),
+        **_openai_options(prefix, max_tokens, usage),
     )
+    _openai_usage(resp.usage, usage)
     return resp.choices[0].message.content
 
 
-def _call_anthropic(api_key: str, model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
-    import anthropic
-
-    client = anthropic.Anthropic(api_key=api_key)
+def _call_anthropic(client, model: str, system_prompt: str, user_prompt: str,
+                    temperature: float, max_tokens: int, prefix: str, usage: dict) -> str:
     resp = client.messages.create(
         model=model,
-        max_tokens=8192,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system_prompt,
+        messages=_anthropic_messages(prefix, user_prompt),
+        **_anthropic_options(usage.get("schema")),
+    )
+    _anthropic_usage(resp.usage, usage)
+    return _anthropic_text(resp)
+
+
+def _stream_openai(client, model: str, system_prompt: str, user_prompt: str,
+                   temperature: float, max_tokens: int, prefix: str, usage: dict) -> Iterator[str]:
+    stream = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=_openai_messages(system_prompt, user_prompt),
+        stream=True,
+        stream_options={"include_usage": True},  # 마지막 조각에 usage가 온다
+        **_openai_options(prefix, max_tokens, usage),
+    )
+    with stream:  # 중간에 닫히면(취소) 연결을 바로 끊어 더 생성되지 않게 한다
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                _openai_usage(chunk.usage, usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def _stream_anthropic(client, model: str, system_prompt: str, user_prompt: str,
+                      temperature: float, max_tokens: int, prefix: str, usage: dict) -> Iterator[str]:
+    with client.messages.stream(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system_prompt,
+        messages=_anthropic_messages(prefix, user_prompt),
+        **_anthropic_options(usage.get("schema")),
+    ) as stream:
+        if usage.get("schema"):
+            # 도구 입력(JSON)이 조각으로 온다
+            for event in stream:
+                if event.type == "input_json":
+                    yield event.partial_json
+        else:
+            yield from stream.text_stream
+        _anthropic_usage(stream.get_final_message().usage, usage)
+
+
+async def _acall_openai(client, model: str, system_prompt: str, user_prompt: str,
+                        temperature: float, max_tokens: int, prefix: str, usage: dict) -> str:
+    resp = await client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=_openai_messages(system_prompt, user_prompt),
+        **_openai_options(prefix, max_tokens, usage),
+    )
+    _openai_usage(resp.usage, usage)
+    return resp.choices[0].message.content
+
+
+async def _acall_anthropic(client, model: str, system_prompt: str, user_prompt: str,
+                           temperature: float, max_tokens: int, prefix: str, usage: dict) -> str:
+    resp = await client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
         temperature=temperature,
         system=system_prompt,
-        messages=[{"role": "user", "content": user_prompt}],
+        messages=_anthropic_messages(prefix, user_prompt),
+        **_anthropic_options(usage.get("schema")),
     )
-    return resp.content[0].text
+    _anthropic_usage(resp.usage, usage)
+    return _anthropic_text(resp)
+
+
+async def _astream_openai(client, model: str, system_prompt: str, user_prompt: str,
+                          temperature: float, max_tokens: int, prefix: str, usage: dict) -> AsyncIterator[str]:
+    stream = await client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=_openai_messages(system_prompt, user_prompt),
+        stream=True,
+        stream_options={"include_usage": True},
+        **_openai_options(prefix, max_tokens, usage),
+    )
+    async with stream:
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                _openai_usage(chunk.usage, usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+async def _astream_anthropic(client, model: str, system_prompt: str, user_prompt: str,
+                             temperature: float, max_tokens: int, prefix: str, usage: dict) -> AsyncIterator[str]:
+    async with client.messages.stream(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system_prompt,
+        messages=_anthropic_messages(prefix, user_prompt),
+        **_anthropic_options(usage.get("schema")),
+    ) as stream:
+        if usage.get("schema"):
+            async for event in stream:
+                if event.type == "input_json":
+                    yield event.partial_json
+        else:
+            async for text in stream.text_stream:
+                yield text
+        _anthropic_usage((await stream.get_final_message()).usage, usage)
+
+
+def _list_models(provider: str, api_key: str, base_url: str | None, timeout: float) -> list[str]:
+    """엔드포인트의 모델 목록을 조회한다 (상태 확인). 두 SDK 모두 models.list()를 제공한다."""
+    client = get_client(provider, api_key, base_url).with_options(timeout=timeout)
+    return [m.id for m in client.models.list().data]
+
+
+# 제공자 항목의 키:
+#   sdk            예열 때 미리 import할 모듈 이름
+#   client / async_client       (api_key, base_url) -> SDK 클라이언트
+#   call / stream / acall / astream  요청 함수 (위의 _call_openai 등과 같은 시그니처)
+#   health         (provider, api_key, base_url, timeout) -> 모델 id 목록, 실패하면 예외
+#   models         화면에서 고를 모델 목록. 비어 있으면 모델 이름을 직접 입력한다
+#   fast_model     가벼운 요청에 쓸 기본 빠른 모델 (src.routing). 없으면 모든 요청이 주 모델로 간다
+#   capabilities   streaming(스트리밍 지원), prompt_cache(접두사 캐시 힌트/primer 사용),
+#                  structured_output(usage["schema"]로 구조화 출력 요청. False면 스키마를 넘기지 않고
+#                  프롬프트의 형식 안내만으로 JSON을 받는다),
+#                  max_context(컨텍스트 윈도우 토큰 수, None이면 src.tokens의 모델 표),
+#                  max_tokens_param(OpenAI 호환 요청에서 출력 길이 제한을 보낼 인자 이름)
+#   requires_key   False면 API 키 없이 base_url만으로 호출한다
+#   api_key_env    API 키를 읽을 환경 변수 이름 (batch.py). 없거나 비어 있으면 --api-key로만 받는다
+DEFAULT_CAPABILITIES = {"streaming": True, "prompt_cache": True, "structured_output": True, "max_context": None,
+                        "max_tokens_param": "max_completion_tokens"}
+
+_REQUIRED_KEYS = ("sdk", "client", "async_client", "call", "stream", "acall", "astream")
+
+# 모델 목록이 없는 제공자에서 모델 이름을 비워 두었을 때 보낼 이름 (llama.cpp 서버는 무시한다).
+DEFAULT_LOCAL_MODEL = "default"
+
+PROVIDERS: dict[str, dict] = {}
+
+
+def register_provider(name: str, spec: dict, base: str | None = None) -> None:
+    """제공자를 등록한다 (같은 이름이면 덮어쓴다).
+
+    base를 주면 그 제공자의 항목을 복사한 뒤 spec으로 덮어쓴다. capabilities는 키 단위로 합친다.
 
+        register_provider("vLLM 70B", {"models": ["llama-3.3-70b"], "capabilities": {"max_context": 131_072}},
+                          base="Local")
+    """
+    entry = {"health": _list_models, "models": [], "requires_key": True}
+    capabilities = dict(DEFAULT_CAPABILITIES)
+    if base is not None:
+        entry.update(PROVIDERS[base])
+        capabilities.update(PROVIDERS[base]["capabilities"])
+    entry.update(spec)
+    capabilities.update(spec.get("capabilities", {}))
+    entry["capabilities"] = capabilities
+    missing = [k for k in _REQUIRED_KEYS if k not in entry]
+    if missing:
+        raise ValueError(f"제공자 {name!r}에 {', '.join(missing)} 항목이 없습니다.")
+    PROVIDERS[name] = entry
+
+
+def default_model(provider: str) -> str:
+    models = PROVIDERS[provider]["models"]
+    return models[0] if models else DEFAULT_LOCAL_MODEL
+
+
+def fast_model(cfg: LLMConfig) -> str:
+    """cfg의 빠른 모델. 다른 제공자의 모델이 남아 있으면 무시하고 제공자 기본값을 쓴다. 없으면 ""."""
+    spec = PROVIDERS[cfg.provider]
+    if cfg.fast_model and (not spec["models"] or cfg.fast_model in spec["models"]):
+        return cfg.fast_model
+    return spec.get("fast_model", "")
+
+
+def load_provider_plugins(modules: str | None = None) -> None:
+    """쉼표로 구분한 모듈들을 import한다. 각 모듈은 import될 때 register_provider()를 부른다."""
+    for name in (modules or "").split(","):
+        if name.strip():
+            importlib.import_module(name.strip())
+
+
+register_provider("OpenAI", {
+    "sdk": "openai",
+    "client": _new_openai_client,
+    "async_client": _new_async_openai_client,
+    "call": _call_openai,
+    "stream": _stream_openai,
+    "acall": _acall_openai,
+    "astream": _astream_openai,
+    "api_key_env": "OPENAI_API_KEY",
+    "models": ["gpt-5.2", "gpt-4o", "gpt-4o-mini", "o3", "o4-mini", "gpt-4.1", "gpt-4.1-mini"],
+    "fast_model": "gpt-4o-mini",
+})
+register_provider("Anthropic", {
+    "sdk": "anthropic",
+    "client": _new_anthropic_client,
+    "async_client": _new_async_anthropic_client,
+    "call": _call_anthropic,
+    "stream": _stream_anthropic,
+    "acall": _acall_anthropic,
+    "astream": _astream_anthropic,
+    "api_key_env": "ANTHROPIC_API_KEY",
+    "models": ["claude-sonnet-4-6", "claude-opus-4-6", "claude-haiku-4-5-20251001"],
+    "fast_model": "claude-haiku-4-5-20251001",
+})
+# OpenAI 호환 자체 호스팅 서버 (vLLM, llama.cpp server, ...). base_url에 여러 서버를 넣으면 나눠 보낸다.
+# 접두사 캐시는 서버가 알아서 하므로(vLLM automatic prefix caching) 힌트와 primer는 쓰지 않는다.
+register_provider("Local", {
+    "client": _keyless(_new_openai_client),
+    "async_client": _keyless(_new_async_openai_client),
+    "models": [],
+    "fast_model": "",
+    "requires_key": False,
+    "api_key_env": "",  # OpenAI 키를 자체 호스팅 서버로 보내지 않는다
+    "capabilities": {"prompt_cache": False, "max_context": 32_768, "max_tokens_param": "max_tokens"},
+}, base="OpenAI")
+
+
+# ── 클라이언트 풀 ──
+# (provider, api_key, base_url) 별로 하나의 SDK 클라이언트를 프로세스 전체에서 공유한다.
+# SDK 클라이언트는 스레드 안전하므로 여러 Streamlit 세션/스레드가 같은 keep-alive 연결을 재사용한다.
+# 비동기 클라이언트의 연결은 이벤트 루프에 묶이므로 루프별로 따로 보관한다.
+
+_clients: dict[tuple, list] = {}  # (provider, api_key, base_url, loop) -> [client, last_used]
+_clients_lock = threading.Lock()
+
+
+def _close_quietly(client, loop: asyncio.AbstractEventLoop | None) -> None:
+    try:
+        if loop is None:
+            client.close()
+        elif not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.close(), loop)
+    except Exception:
+        pass
+
+
+def _evict_idle_clients(now: float) -> None:
+    """CLIENT_IDLE_TTL 이상 사용되지 않은 클라이언트를 닫는다. _clients_lock을 잡은 상태에서 호출한다."""
+    expired = [key for key, (_, last_used) in _clients.items() if now - last_used > CLIENT_IDLE_TTL]
+    for key in expired:
+        client, _ = _clients.pop(key)
+        _close_quietly(client, key[3])
+
+
+def _pooled_client(provider: str, api_key: str, base_url: str | None, loop: asyncio.AbstractEventLoop | None):
+    key = (provider, api_key, base_url or None, loop)
+    now = time.monotonic()
+    with _clients_lock:
+        _evict_idle_clients(now)
+        entry = _clients.get(key)
+        if entry is None:
+            factory = PROVIDERS[provider]["client" if loop is None else "async_client"]
+            entry = [factory(api_key, base_url or None), now]
+            _clients[key] = entry
+        else:
+            entry[1] = now
+        return entry[0]
+
+
+def get_client(provider: str, api_key: str, base_url: str | None = None):
+    """풀에서 provider 클라이언트를 가져오거나 새로 생성한다."""
+    return _pooled_client(provider, api_key, base_url, None)
 
-PROVIDERS = {
-    "OpenAI": {
-        "call": _call_openai,
-        "models": ["gpt-5.2", "gpt-4o", "gpt-4o-mini", "o3", "o4-mini", "gpt-4.1", "gpt-4.1-mini"],
-    },
-    "Anthropic": {
-        "call": _call_anthropic,
-        "models": ["claude-sonnet-4-6", "claude-opus-4-6", "claude-haiku-4-5-20251001"],
-    },
-}
 
+def get_async_client(provider: str, api_key: str, base_url: str | None = None):
+    """현재 실행 중인 이벤트 루프용 비동기 클라이언트를 풀에서 가져온다."""
+    return _pooled_client(provider, api_key, base_url, asyncio.get_running_loop())
 
-def call_llm(system_prompt: str, user_prompt: str) -> str | None:
-    """session_state에 저장된 설정으로 LLM을 호출한다.
 
-    API 키가 설정되지 않았으면 None을 반환한다.
+def close_clients() -> None:
+    """풀에 있는 모든 클라이언트를 닫는다 (API 키 변경, 프로세스 종료 시)."""
+    with _clients_lock:
+        entries = [(client, key[3]) for key, (client, _) in _clients.items()]
+        _clients.clear()
+    for client, loop in entries:
+        _close_quietly(client, loop)
+
+
+atexit.register(close_clients)
+
+
+# ── 계측 훅 ──
+# 각 호출이 끝날 때 이벤트 dict를 받아 처리하는 함수들 (src.telemetry가 기록한다).
+# 이벤트 키: provider, model, tier(src.routing의 fast/main), stream, template, cache_hit, retries,
+#           max_tokens, input_tokens, output_tokens(응답의 usage, 없으면 추정),
+#           prefix_tokens(캐시 대상 앞부분, 추정), cache_read_tokens, cache_write_tokens(제공자 보고),
+#           ttft(초, 스트리밍만), latency(초), output_chars, endpoint(보낸 엔드포인트 URL, 기본 URL이면 None),
+#           schema(구조화 출력 스키마, 없으면 None), cancelled(스트리밍 도중 취소), error, 그리고 llm_labels()로 지정한 라벨(stage, mode, session 등)
+
+_llm_hooks: list[Callable[[dict], None]] = []
+_llm_labels: ContextVar[dict] = ContextVar("llm_labels", default={})
+
+
+@contextmanager
+def llm_labels(**labels):
+    """블록 안에서 시작한 호출의 이벤트에 라벨을 붙인다 (바깥 라벨에 덧붙음).
+
+    contextvars로 전달되므로 블록 안에서 만든 asyncio 태스크와 src.async_bridge로 제출한 코루틴에도 적용된다.
     """
-    cfg = st.session_state.get("llm_config", {})
-    api_key = cfg.get("api_key", "").strip()
-    if not api_key:
+    token = _llm_labels.set({**_llm_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _llm_labels.reset(token)
+
+
+def add_llm_hook(hook: Callable[[dict], None]) -> None:
+    """LLM 호출 완료 시 실행할 계측 훅을 등록한다."""
+    if hook not in _llm_hooks:
+        _llm_hooks.append(hook)
+
+
+def remove_llm_hook(hook: Callable[[dict], None]) -> None:
+    if hook in _llm_hooks:
+        _llm_hooks.remove(hook)
+
+
+def _emit_llm_event(event: dict) -> None:
+    for hook in list(_llm_hooks):
+        try:
+            hook(event)
+        except Exception:
+            pass
+
+
+def _resolve(cfg: LLMConfig) -> tuple[str, str, float, str, EndpointPool]:
+    provider = cfg.provider
+    api_key = cfg.api_key.strip()
+    model = cfg.model or default_model(provider)
+    return provider, model, cfg.temperature, api_key, pool_for(provider, api_key, cfg.base_url)
+
+
+def _scheduler(provider: str, api_key: str, pool: EndpointPool) -> ProviderScheduler:
+    """호출에 쓸 스케줄러. 키 없이 쓰는 제공자는 모두 같은 (빈) 키이므로 서버 묶음별로 나눈다."""
+    scope = "" if PROVIDERS[provider]["requires_key"] else pool.identity
+    return get_scheduler(provider, api_key, scope)
+
+
+def _route(cfg: LLMConfig, model: str, template: str, system_prompt: str, user_prompt: str) -> tuple[str, str]:
+    """요청을 보낼 (모델, 등급). 템플릿과 모드(llm_labels)가 빠른 모델 대상이면 빠른 모델을 쓴다 (src.routing)."""
+    fast = fast_model(cfg)
+    if not fast or fast == model:
+        return model, MAIN
+    mode = _llm_labels.get().get("mode")
+    if route_tier(cfg.fast_routes, template, mode) == MAIN:
+        return model, MAIN
+    # 길이 조건은 대상일 때만 센다 (근사치로 충분하다).
+    tier = route_tier(cfg.fast_routes, template, mode, approx_tokens(system_prompt) + approx_tokens(user_prompt))
+    return (fast, FAST) if tier == FAST else (model, MAIN)
+
+
+def _on_endpoint(provider: str, kind: str, api_key: str, event: dict, *args) -> Callable[[str | None], object]:
+    """엔드포인트 URL을 받아 그 엔드포인트의 클라이언트로 PROVIDERS[provider][kind](..., *args, event)를
+    부르는 함수 — EndpointPool.call/stream/acall/astream에 넘긴다."""
+    get = get_async_client if kind in ("acall", "astream") else get_client
+    fn = PROVIDERS[provider][kind]
+
+    def run(url: str | None):
+        event["endpoint"] = url
+        return fn(get(provider, api_key, url), *args, event)
+
+    return run
+
+
+def check_endpoints(cfg: LLMConfig) -> list[dict]:
+    """cfg의 모든 엔드포인트에 상태 확인을 보내고 엔드포인트별 상태를 반환한다 (src.endpoints)."""
+    provider, _, _, api_key, pool = _resolve(cfg)
+    health = PROVIDERS[provider]["health"]
+    pool.check(lambda url: health(provider, api_key, url, HEALTH_TIMEOUT))
+    return pool.status()
+
+
+def endpoint_status(cfg: LLMConfig) -> list[dict]:
+    """cfg의 엔드포인트별 상태 (처리 중/누적 호출 수, 최근 지연 시간, 제외 여부)."""
+    return _resolve(cfg)[4].status()
+
+
+def _new_event(provider: str, model: str, stream: bool, template: str, tier: str,
+               schema: dict | None = None) -> dict:
+    if not PROVIDERS[provider]["capabilities"]["structured_output"]:
+        schema = None
+    return {**_llm_labels.get(), "provider": provider, "model": model, "tier": tier, "stream": stream,
+            "template": template, "schema": schema,
+            "cache_hit": False, "retries": 0, "input_tokens": 0, "output_tokens": 0, "max_tokens": 0,
+            "prefix_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0, "ttft": None,
+            "output_chars": 0, "endpoint": None, "cancelled": False, "error": None}
+
+
+def _finish(event: dict, text: str) -> None:
+    """응답 크기를 기록한다. 캐시 적중이나 usage가 없는 응답은 출력 토큰을 직접 센다."""
+    event["output_chars"] = len(text)
+    if not event["output_tokens"]:
+        event["output_tokens"] = count_tokens(text, event["model"])
+
+
+def _budget(event: dict, system_prompt: str, user_prompt: str) -> tuple[int, str]:
+    """입력 토큰 수를 세어 이벤트에 기록하고, (max_tokens, 캐시할 앞부분)을 반환한다."""
+    model = event["model"]
+    capabilities = PROVIDERS[event["provider"]]["capabilities"]
+    event["input_tokens"] = count_tokens(system_prompt, model) + count_tokens(user_prompt, model)
+    event["max_tokens"] = choose_max_tokens(model, event["input_tokens"], event["stream"],
+                                            capabilities["max_context"])
+    prefix = cacheable_prefix(model, system_prompt, user_prompt) if capabilities["prompt_cache"] else ""
+    if prefix:
+        event["prefix_tokens"] = count_tokens(system_prompt, model) + count_tokens(prefix, model)
+    return event["max_tokens"], prefix
+
+
+async def _aprime(deltas: AsyncIterator[str], key: str) -> str:
+    """접두사를 처음 보내는 요청. 스트리밍으로 보내 응답이 시작되는 즉시(캐시가 쓰인 시점에)
+    기다리던 같은 접두사의 요청들을 풀어 주고, 전체 텍스트를 모아 반환한다."""
+    parts: list[str] = []
+    async for delta in deltas:
+        if not parts:
+            prefix_tracker.warmed(key)
+        parts.append(delta)
+    return "".join(parts)
+
+
+def _cache_key(cfg: LLMConfig, provider: str, model: str, temperature: float, pool: EndpointPool,
+               system_prompt: str, user_prompt: str, use_cache: bool, schema: dict | None) -> str | None:
+    if not (use_cache and cfg.use_cache):
         return None
+    if schema:
+        # 같은 프롬프트라도 스키마가 다르면 응답 형식이 다르다
+        user_prompt += "\n" + json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    return make_cache_key(provider, model, temperature, system_prompt, user_prompt, pool.identity)
 
-    provider = cfg.get("provider", "OpenAI")
-    model = cfg.get("model", PROVIDERS[provider]["models"][0])
-    temperature = cfg.get("temperature", 0.7)
 
+def invoke_llm(cfg: LLMConfig, system_prompt: str, user_prompt: str, use_cache: bool = True,
+               template: str = "", schema: dict | None = None) -> str:
+    """명시적으로 전달된 설정으로 LLM을 호출한다.
+
+    설정을 인자로만 받고 전역 UI 상태에 접근하지 않으므로 워커 스레드에서 호출해도 안전하다.
+    429/5xx/타임아웃은 src.scheduler가 백오프 후 재시도하고(엔드포인트가 여럿이면 다른 엔드포인트로),
+    최종 실패 시 예외를 그대로 전달한다.
+    use_cache=False이면 응답 캐시를 건너뛴다. template은 계측 이벤트에 남길 프롬프트 템플릿 이름이다.
+    schema(src.prompts의 *_SCHEMA)를 주면 제공자의 구조화 출력으로 JSON 텍스트를 받는다 (src.structured로 파싱).
+    """
+    provider, model, temperature, api_key, pool = _resolve(cfg)
+    model, tier = _route(cfg, model, template, system_prompt, user_prompt)
+    cache_key = _cache_key(cfg, provider, model, temperature, pool, system_prompt, user_prompt, use_cache, schema)
+    event = _new_event(provider, model, stream=False, template=template, tier=tier, schema=schema)
+    start = time.perf_counter()
     try:
-        return PROVIDERS[provider]["call"](api_key, model, system_prompt, user_prompt, temperature)
+        max_tokens, prefix = _budget(event, system_prompt, user_prompt)
+        text = response_cache.get(cache_key) if cache_key else None
+        if text is not None:
+            event["cache_hit"] = True
+        else:
+            run = _on_endpoint(provider, "call", api_key, event, model, system_prompt, user_prompt,
+                               temperature, max_tokens, prefix)
+            text = _scheduler(provider, api_key, pool).call(
+                lambda: pool.call(run),
+                est_tokens=event["input_tokens"],
+                on_retry=lambda: event.update(retries=event["retries"] + 1),
+            )
+            if cache_key and text:
+                response_cache.put(cache_key, text)
+        _finish(event, text or "")
+        return text
     except Exception as e:
-        st.error(f"LLM API 호출 실패: {e}")
-        return None
+        event["error"] = str(e)
+        raise
+    finally:
+        event["latency"] = time.perf_counter() - start
+        _emit_llm_event(event)
+
+
+def iter_llm(cfg: LLMConfig, system_prompt: str, user_prompt: str, use_cache: bool = True,
+             template: str = "", schema: dict | None = None) -> Iterator[str]:
+    """invoke_llm의 스트리밍 버전 — 텍스트 조각(delta)을 생성되는 대로 yield한다.
+
+    첫 토큰까지의 시간(ttft)과 전체 지연 시간을 계측 훅으로 보고한다.
+    캐시에 응답이 있거나 제공자가 스트리밍을 지원하지 않으면 전체 텍스트를 한 번에 yield한다.
+    """
+    provider, model, temperature, api_key, pool = _resolve(cfg)
+    model, tier = _route(cfg, model, template, system_prompt, user_prompt)
+    cache_key = _cache_key(cfg, provider, model, temperature, pool, system_prompt, user_prompt, use_cache, schema)
+    event = _new_event(provider, model, stream=True, template=template, tier=tier, schema=schema)
+    start = time.perf_counter()
+    try:
+        max_tokens, prefix = _budget(event, system_prompt, user_prompt)
+        cached = response_cache.get(cache_key) if cache_key else None
+        scheduler = _scheduler(provider, api_key, pool)
+        on_retry = lambda: event.update(retries=event["retries"] + 1)  # noqa: E731
+        args = (model, system_prompt, user_prompt, temperature, max_tokens, prefix)
+        if cached is not None:
+            event["cache_hit"] = True
+            deltas = iter([cached])
+        elif not PROVIDERS[provider]["capabilities"]["streaming"]:
+            run = _on_endpoint(provider, "call", api_key, event, *args)
+            deltas = iter([scheduler.call(lambda: pool.call(run), est_tokens=event["input_tokens"],
+                                          on_retry=on_retry)])
+        else:
+            run = _on_endpoint(provider, "stream", api_key, event, *args)
+            deltas = scheduler.stream(lambda: pool.stream(run), est_tokens=event["input_tokens"], on_retry=on_retry)
+
+        parts: list[str] = []
+        for delta in deltas:
+            if event["ttft"] is None:
+                event["ttft"] = time.perf_counter() - start
+            event["output_chars"] += len(delta)
+            parts.append(delta)
+            yield delta
+
+        _finish(event, "".join(parts))
+        if cache_key and cached is None and parts:
+            response_cache.put(cache_key, "".join(parts))
+    except Exception as e:
+        event["error"] = str(e)
+        raise
+    finally:
+        event["latency"] = time.perf_counter() - start
+        _emit_llm_event(event)
+
+
+async def acall_llm(cfg: LLMConfig, system_prompt: str, user_prompt: str, use_cache: bool = True,
+                    template: str = "", schema: dict | None = None) -> str:
+    """invoke_llm의 asyncio 버전 (AsyncOpenAI / AsyncAnthropic 사용).
+
+    클라이언트 풀, 엔드포인트 풀, 재시도 스케줄러, 응답 캐시, 계측 훅을 동기 경로와 공유한다.
+    Streamlit 코드에서는 src.async_bridge의 run_async/submit_async로 실행한다.
+    """
+    provider, model, temperature, api_key, pool = _resolve(cfg)
+    model, tier = _route(cfg, model, template, system_prompt, user_prompt)
+    cache_key = _cache_key(cfg, provider, model, temperature, pool, system_prompt, user_prompt, use_cache, schema)
+    event = _new_event(provider, model, stream=False, template=template, tier=tier, schema=schema)
+    start = time.perf_counter()
+    key = primer = None
+    try:
+        max_tokens, prefix = _budget(event, system_prompt, user_prompt)
+        text = response_cache.get(cache_key) if cache_key else None
+        if text is not None:
+            event["cache_hit"] = True
+        else:
+            args = (model, system_prompt, user_prompt, temperature, max_tokens, prefix)
+            if prefix and PROVIDERS[provider]["capabilities"]["streaming"]:
+                key = prefix_key(provider, model, system_prompt, prefix)
+                primer = await prefix_tracker.claim(key)
+            if primer:
+                run = _on_endpoint(provider, "astream", api_key, event, *args)
+                fn = lambda: _aprime(pool.astream(run), key)  # noqa: E731
+            else:
+                run = _on_endpoint(provider, "acall", api_key, event, *args)
+                fn = lambda: pool.acall(run)  # noqa: E731
+            text = await _scheduler(provider, api_key, pool).acall(
+                fn,
+                est_tokens=event["input_tokens"],
+                on_retry=lambda: event.update(retries=event["retries"] + 1),
+            )
+            if cache_key and text:
+                response_cache.put(cache_key, text)
+        _finish(event, text or "")
+        return text
+    except Exception as e:
+        event["error"] = str(e)
+        raise
+    finally:
+        if primer:
+            prefix_tracker.release(key)
+        event["latency"] = time.perf_counter() - start
+        _emit_llm_event(event)
+
+
+async def astream_llm(cfg: LLMConfig, system_prompt: str, user_prompt: str, use_cache: bool = True,
+                      template: str = "", schema: dict | None = None) -> AsyncIterator[str]:
+    """iter_llm의 asyncio 버전 — 텍스트 조각을 생성되는 대로 yield한다."""
+    provider, model, temperature, api_key, pool = _resolve(cfg)
+    model, tier = _route(cfg, model, template, system_prompt, user_prompt)
+    cache_key = _cache_key(cfg, provider, model, temperature, pool, system_prompt, user_prompt, use_cache, schema)
+    event = _new_event(provider, model, stream=True, template=template, tier=tier, schema=schema)
+    start = time.perf_counter()
+    key = primer = None
+    try:
+        max_tokens, prefix = _budget(event, system_prompt, user_prompt)
+        cached = response_cache.get(cache_key) if cache_key else None
+        parts: list[str] = []
+        scheduler = _scheduler(provider, api_key, pool)
+        on_retry = lambda: event.update(retries=event["retries"] + 1)  # noqa: E731
+        args = (model, system_prompt, user_prompt, temperature, max_tokens, prefix)
+        if cached is not None:
+            event["cache_hit"] = True
+            event["ttft"] = time.perf_counter() - start
+            _finish(event, cached)
+            yield cached
+        elif not PROVIDERS[provider]["capabilities"]["streaming"]:
+            run = _on_endpoint(provider, "acall", api_key, event, *args)
+            text = await scheduler.acall(lambda: pool.acall(run), est_tokens=event["input_tokens"],
+                                         on_retry=on_retry)
+            event["ttft"] = time.perf_counter() - start
+            parts.append(text or "")
+            _finish(event, text or "")
+            yield text or ""
+        else:
+            if prefix:
+                key = prefix_key(provider, model, system_prompt, prefix)
+                primer = await prefix_tracker.claim(key)
+            run = _on_endpoint(provider, "astream", api_key, event, *args)
+            deltas = scheduler.astream(lambda: pool.astream(run), est_tokens=event["input_tokens"],
+                                       on_retry=on_retry)
+            async for delta in deltas:
+                if event["ttft"] is None:
+                    event["ttft"] = time.perf_counter() - start
+                    if primer:
+                        prefix_tracker.warmed(key)
+                event["output_chars"] += len(delta)
+                parts.append(delta)
+                yield delta
+            _finish(event, "".join(parts))
+
+        if cache_key and cached is None and parts:
+            response_cache.put(cache_key, "".join(parts))
+    except asyncio.CancelledError:
+        # 취소된 요청도 그때까지 받은 출력만큼 비용이 든다.
+        event["cancelled"] = True
+        _finish(event, "".join(parts))
+        raise
+    except Exception as e:
+        event["error"] = str(e)
+        raise
+    finally:
+        if primer:
+            prefix_tracker.release(key)
+        event["latency"] = time.perf_counter() - start
+        _emit_llm_event(event)
 
 
-def is_llm_configured() -> bool:
-    """LLM API 키가 설정되어 있는지 확인한다."""
-    cfg = st.session_state.get("llm_config", {})
-    return bool(cfg.get("api_key", "").strip())
+load_provider_plugins(os.environ.get("LLM_PROVIDER_PLUGINS"))
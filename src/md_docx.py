@@ -0,0 +1,413 @@
+"""Markdown → Word(.docx) 변환기.
+
+입력 줄을 한 번만 훑으며 블록 토큰(제목, 문단, 목록 항목, 표, 인용, 코드, 각주 정의)으로 나누고,
+토큰이 나오는 즉시 python-docx 구조로 옮긴다. 문단 안의 굵게/기울임/코드/링크/각주 참조는
+정규식 하나로 토큰화해 서식이 다른 run들로 만든다.
+
+python-docx에는 각주 API가 없으므로 각주는 본문에 위첨자 번호로 표시하고 문서 끝 '각주' 절에 모은다.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.oxml.table import CT_Tbl
+from docx.shared import Emu, Pt, RGBColor
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+from lxml.etree import SubElement
+
+CODE_FONT = "Consolas"
+FOOTNOTE_HEADING = "각주"
+
+_HEADING = re.compile(r"(#{1,6})\s+(.*?)(?:\s+#+)?\s*$")
+_ITEM = re.compile(r"( *)([-*+]|(\d{1,9})[.)])\s+(.*)")
+_FENCE = re.compile(r"\s*(`{3,}|~{3,})")
+_RULE = re.compile(r"\s*([-*_])(?:\s*\1){2,}\s*$")
+_SETEXT = re.compile(r"(=+|-+)\s*$")
+_TABLE_SEP = re.compile(r"\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+_QUOTE = re.compile(r"\s*>\s?(.*)")
+_FOOTNOTE_DEF = re.compile(r"\[\^([^\]]+)\]:\s*(.*)")
+
+_INLINE = re.compile(
+    r"\\(?P<esc>[\\`*_{}\[\]()#+\-.!|>~])"
+    r"|`(?P<code>[^`]+)`"
+    r"|\[\^(?P<fn>[^\]]+)\]"
+    r"|\[(?P<link>[^\]]+)\]\((?P<url>[^)\s]+)\)"
+    r"|(?P<bi>\*\*\*|___)(?P<bi_body>.+?)(?P=bi)"
+    r"|(?P<b>\*\*|__)(?P<b_body>.+?)(?P=b)"
+    r"|\*(?P<i_star>[^\s*](?:.*?[^\s*])?)\*"
+    r"|(?<!\w)_(?P<i_under>[^\s_](?:.*?[^\s_])?)_(?!\w)"
+    r"|~~(?P<strike>.+?)~~"
+)
+
+# 문단/run은 수천 개씩 만들어지므로 태그 이름을 미리 풀어 둔다.
+_TAG = {name: qn(f"w:{name}") for name in ("p", "r", "rPr", "b", "i", "strike", "t")}
+_XML_SPACE = qn("xml:space")
+
+_ALIGN = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+}
+
+
+# ── 블록 토큰화 ──────────────────────────────────────
+
+def _split_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", line)]
+
+
+def _alignments(sep: str) -> list[str | None]:
+    aligns: list[str | None] = []
+    for cell in _split_row(sep):
+        if cell.startswith(":") and cell.endswith(":"):
+            aligns.append("center")
+        elif cell.endswith(":"):
+            aligns.append("right")
+        elif cell.startswith(":"):
+            aligns.append("left")
+        else:
+            aligns.append(None)
+    return aligns
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[tuple]:
+    """줄들을 블록 토큰으로 나눈다.
+
+    토큰은 다음 튜플 중 하나다.
+        ("heading", level, text)      ("para", text)         ("quote", text)
+        ("item", depth, start, text)  ("code", text)         ("rule",)
+        ("table", header, rows, aligns)                       ("footnote", label, text)
+    item의 start는 번호 목록이면 항목 번호, 글머리표 목록이면 None이다.
+    여러 줄에 걸친 문단/인용/목록 항목은 한 토큰으로 합쳐진다.
+    """
+    pending: list | None = None  # [kind, *args, parts] — 다음 줄이 이어질 수 있는 블록
+    table: tuple | None = None
+    fence: str | None = None
+    code: list[str] = []
+    indents: list[int] = []  # 현재 목록의 들여쓰기 단계
+
+    def flush():
+        nonlocal pending
+        if pending is not None:
+            *head, parts = pending
+            pending = None
+            return (*head, " ".join(parts))
+        return None
+
+    for raw in lines:
+        line = raw.rstrip("\r\n").expandtabs(4)
+
+        if fence is not None:
+            if line.strip().startswith(fence):
+                yield ("code", "\n".join(code))
+                fence, code = None, []
+            else:
+                code.append(line)
+            continue
+
+        stripped = line.strip()
+        if table is not None:
+            if "|" in stripped:
+                table[2].append(_split_row(stripped))
+                continue
+            yield table
+            table = None
+
+        if not stripped:
+            if (tok := flush()) is not None:
+                yield tok
+            continue
+
+        if m := _FENCE.match(line):
+            if (tok := flush()) is not None:
+                yield tok
+            indents.clear()
+            fence = m.group(1)
+            continue
+
+        if pending is not None and pending[0] == "para":
+            # 한 줄짜리 문단 + 구분선 → 표 머리글 / 밑줄형 제목
+            if len(pending[-1]) == 1 and "|" in pending[-1][0] and "-" in stripped and _TABLE_SEP.match(stripped):
+                header = _split_row(pending[-1][0])
+                pending = None
+                table = ("table", header, [], _alignments(stripped))
+                continue
+            if _SETEXT.match(stripped):
+                yield ("heading", 1 if stripped[0] == "=" else 2, " ".join(pending[-1]))
+                pending = None
+                continue
+
+        if _RULE.match(line):
+            if (tok := flush()) is not None:
+                yield tok
+            indents.clear()
+            yield ("rule",)
+            continue
+
+        if m := _HEADING.match(stripped):
+            if (tok := flush()) is not None:
+                yield tok
+            indents.clear()
+            yield ("heading", len(m.group(1)), m.group(2))
+            continue
+
+        if m := _ITEM.match(line):
+            if (tok := flush()) is not None:
+                yield tok
+            indent = len(m.group(1))
+            while indents and indents[-1] > indent:
+                indents.pop()
+            if not indents or indents[-1] < indent:
+                indents.append(indent)
+            start = int(m.group(3)) if m.group(3) else None
+            pending = ["item", len(indents) - 1, start, [m.group(4).strip()]]
+            continue
+
+        if m := _QUOTE.match(line):
+            if pending is None or pending[0] != "quote":
+                if (tok := flush()) is not None:
+                    yield tok
+                indents.clear()
+                pending = ["quote", []]
+            if m.group(1).strip():
+                pending[-1].append(m.group(1).strip())
+            continue
+
+        if m := _FOOTNOTE_DEF.match(stripped):
+            if (tok := flush()) is not None:
+                yield tok
+            yield ("footnote", m.group(1), m.group(2))
+            continue
+
+        if pending is not None and pending[0] in ("para", "item"):
+            pending[-1].append(stripped)  # 이어지는 줄
+            continue
+
+        if (tok := flush()) is not None:
+            yield tok
+        indents.clear()
+        pending = ["para", [stripped]]
+
+    if fence is not None:
+        yield ("code", "\n".join(code))
+    if table is not None:
+        yield table
+    if (tok := flush()) is not None:
+        yield tok
+
+
+# ── 문서 생성 ────────────────────────────────────────
+
+class _Renderer:
+    def __init__(self, doc) -> None:
+        self.doc = doc
+        self.footnote_refs: dict[str, int] = {}  # 라벨 -> 본문에 처음 나온 순서대로 매긴 번호
+        self.footnote_defs: dict[str, str] = {}
+        self.list_nums: dict[int, str] = {}  # 깊이 -> 진행 중인 번호 목록의 numId
+        self._abstract_ids: dict[str, str] = {}
+        self._style_ids: dict[str, str] = {}
+        self._body = doc.element.body
+        self._sect_pr = self._body.sectPr
+        section = doc.sections[-1]
+        self._block_width = Emu(section.page_width - section.left_margin - section.right_margin)
+
+    # Document.add_paragraph()/add_table()은 호출할 때마다 본문 전체에서 sectPr과 구역 너비를 찾고
+    # 스타일 이름으로 전체 스타일 목록을 훑기 때문에 문서가 길어질수록 느려진다.
+    # 이 값들을 한 번만 찾아 두고 요소를 직접 끼워 넣는다.
+
+    def _append(self, element) -> None:
+        if self._sect_pr is not None:
+            self._sect_pr.addprevious(element)
+        else:
+            self._body.append(element)
+
+    def _style_id(self, style: str) -> str:
+        style_id = self._style_ids.get(style)
+        if style_id is None:
+            style_id = self._style_ids[style] = self.doc.styles[style].style_id
+        return style_id
+
+    def paragraph(self, style: str | None = None) -> Paragraph:
+        p = self._body.makeelement(_TAG["p"])
+        self._append(p)
+        if style is not None:
+            p.style = self._style_id(style)
+        return Paragraph(p, self.doc._body)
+
+    def render(self, tokens: Iterable[tuple]) -> None:
+        for tok in tokens:
+            kind = tok[0]
+            if kind != "item":
+                self.list_nums.clear()
+
+            if kind == "para":
+                self.inline(self.paragraph(), tok[1])
+            elif kind == "heading":
+                self.inline(self.paragraph(f"Heading {tok[1]}"), tok[2])
+            elif kind == "item":
+                self.item(tok[1], tok[2], tok[3])
+            elif kind == "quote":
+                self.inline(self.paragraph("Quote"), tok[1])
+            elif kind == "code":
+                self.code(tok[1])
+            elif kind == "table":
+                self.table(tok[1], tok[2], tok[3])
+            elif kind == "footnote":
+                self.footnote_defs[tok[1]] = tok[2]
+            elif kind == "rule":
+                self.rule()
+        self.footnotes()
+
+    # 블록
+
+    def item(self, depth: int, start: int | None, text: str) -> None:
+        # 기본 템플릿의 목록 스타일은 3단계까지 있으므로 더 깊은 항목은 3단계로 표시한다.
+        level = min(depth, 2)
+        suffix = f" {level + 1}" if level else ""
+        for deeper in [d for d in self.list_nums if d > depth]:
+            del self.list_nums[deeper]
+
+        if start is None:
+            self.list_nums.pop(depth, None)
+            p = self.paragraph(f"List Bullet{suffix}")
+        else:
+            style = f"List Number{suffix}"
+            p = self.paragraph(style)
+            num_id = self.list_nums.get(depth)
+            if num_id is None:
+                # 목록마다 번호를 새로 시작하도록 같은 번호 정의를 가리키는 새 numId를 만든다.
+                num_id = self.list_nums[depth] = self._new_num(style, start)
+            num_pr = p._p.get_or_add_pPr().get_or_add_numPr()
+            num_pr.get_or_add_ilvl().val = 0
+            num_pr.get_or_add_numId().val = num_id
+        self.inline(p, text)
+
+    def _new_num(self, style: str, start: int) -> str:
+        numbering = self.doc.part.numbering_part.element
+        abstract_id = self._abstract_ids.get(style)
+        if abstract_id is None:
+            style_num = self.doc.styles[style].element.pPr.numPr.numId.val
+            abstract_id = self._abstract_ids[style] = numbering.num_having_numId(style_num).abstractNumId.val
+        num = numbering.add_num(abstract_id)
+        num.add_lvlOverride(ilvl=0).add_startOverride(start)
+        return num.numId
+
+    def code(self, text: str) -> None:
+        p = self.paragraph()
+        for i, line in enumerate(text.split("\n")):
+            run = self._run(p, line, False, False, False)
+            run.font.name = CODE_FONT
+            run.font.size = Pt(9)
+            if i:
+                run._r.t_lst[0].addprevious(OxmlElement("w:br"))  # rPr 뒤, 텍스트 앞
+
+    def table(self, header: list[str], rows: list[list[str]], aligns: list[str | None]) -> None:
+        cols = len(header)
+        tbl = CT_Tbl.new_tbl(0, cols, self._block_width)
+        tbl.tblStyle_val = self._style_id("Table Grid")
+        self._append(tbl)
+        table = Table(tbl, self.doc._body)
+        for r, cells in enumerate([header, *rows]):
+            row_cells = table.add_row().cells
+            for c in range(cols):
+                p = row_cells[c].paragraphs[0]
+                align = aligns[c] if c < len(aligns) else None
+                if align:
+                    p.alignment = _ALIGN[align]
+                if c < len(cells):
+                    self.inline(p, cells[c], bold=r == 0)
+
+    def rule(self) -> None:
+        p = self.paragraph()
+        border = OxmlElement("w:pBdr")
+        bottom = OxmlElement("w:bottom")
+        for attr, value in (("val", "single"), ("sz", "6"), ("space", "1"), ("color", "auto")):
+            bottom.set(qn(f"w:{attr}"), value)
+        border.append(bottom)
+        p._p.get_or_add_pPr().append(border)
+
+    def footnotes(self) -> None:
+        labels = list(self.footnote_refs) + [k for k in self.footnote_defs if k not in self.footnote_refs]
+        if not labels:
+            return
+        self.inline(self.paragraph("Heading 2"), FOOTNOTE_HEADING)
+        for label in labels:
+            number = self.footnote_refs.setdefault(label, len(self.footnote_refs) + 1)
+            p = self.paragraph()
+            self._run(p, f"{number}. ", False, False, False)
+            self.inline(p, self.footnote_defs.get(label, ""))
+
+    # 인라인
+
+    def inline(self, p, text: str, bold: bool = False, italic: bool = False, strike: bool = False) -> None:
+        pos = 0
+        for m in _INLINE.finditer(text):
+            if m.start() > pos:
+                self._run(p, text[pos:m.start()], bold, italic, strike)
+            pos = m.end()
+            kind = m.lastgroup
+            if kind == "esc":
+                self._run(p, m.group("esc"), bold, italic, strike)
+            elif kind == "code":
+                run = self._run(p, m.group("code"), bold, italic, strike)
+                run.font.name = CODE_FONT
+            elif kind == "fn":
+                label = m.group("fn")
+                number = self.footnote_refs.setdefault(label, len(self.footnote_refs) + 1)
+                self._run(p, str(number), bold, italic, strike).font.superscript = True
+            elif kind == "url":
+                self._hyperlink(p, m.group("link"), m.group("url"), bold, italic)
+            elif kind == "bi_body":
+                self.inline(p, m.group("bi_body"), True, True, strike)
+            elif kind == "b_body":
+                self.inline(p, m.group("b_body"), True, italic, strike)
+            elif kind in ("i_star", "i_under"):
+                self.inline(p, m.group(kind), bold, True, strike)
+            elif kind == "strike":
+                self.inline(p, m.group("strike"), bold, italic, True)
+        if pos < len(text):
+            self._run(p, text[pos:], bold, italic, strike)
+
+    @staticmethod
+    def _run(p, text: str, bold: bool, italic: bool, strike: bool) -> Run:
+        # Paragraph.add_run()은 탭/줄바꿈 처리와 속성별 스키마 검사를 거치므로 run 요소를 직접 만든다.
+        r = SubElement(p._p, _TAG["r"])
+        if bold or italic or strike:
+            rpr = SubElement(r, _TAG["rPr"])
+            if bold:
+                SubElement(rpr, _TAG["b"])
+            if italic:
+                SubElement(rpr, _TAG["i"])
+            if strike:
+                SubElement(rpr, _TAG["strike"])
+        t = SubElement(r, _TAG["t"])
+        t.text = text
+        t.set(_XML_SPACE, "preserve")
+        return Run(r, p)
+
+    def _hyperlink(self, p, text: str, url: str, bold: bool, italic: bool) -> None:
+        link = OxmlElement("w:hyperlink")
+        link.set(qn("r:id"), p.part.relate_to(url, RT.HYPERLINK, is_external=True))
+        run = self._run(p, text, bold, italic, False)
+        run.underline = True
+        run.font.color.rgb = RGBColor(0x05, 0x63, 0xC1)
+        link.append(run._r)  # 문단 끝에 추가된 run을 하이퍼링크 요소 안으로 옮긴다.
+        p._p.append(link)
+
+
+def render_markdown(doc, lines: Iterable[str]) -> None:
+    """Markdown 줄들을 doc(python-docx Document) 끝에 이어서 그린다."""
+    _Renderer(doc).render(tokenize(lines))
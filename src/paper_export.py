@@ -0,0 +1,71 @@
+"""PaperState → Markdown / Word(.docx) 변환. 화면 내보내기와 배치 실행이 함께 쓴다."""
+
+from __future__ import annotations
+
+import io
+from collections.abc import Iterable, Iterator
+
+
+def iter_markdown(ps) -> Iterator[str]:
+    """논문을 Markdown 조각 단위로 생성한다. 조각을 "\\n"으로 이으면 전체 문서가 된다."""
+    if ps.final_paper:
+        yield ps.final_paper
+        return
+
+    yield f"# {ps.topic}\n"
+    if ps.research_question:
+        yield f"**연구 질문**: {ps.research_question}\n"
+
+    if ps.overview:
+        yield f"\n## 개요\n\n{ps.overview}\n"
+
+    for sec in ps.sections:
+        title = sec.title if isinstance(sec, object) and hasattr(sec, "title") else sec.get("title", "")
+        yield f"\n## {title}\n"
+        desc = sec.description if hasattr(sec, "description") else sec.get("description", "")
+        if desc:
+            yield f"*{desc}*\n"
+
+        content = ps.draft_sections.get(title, "")
+        if content:
+            yield f"\n{content}\n"
+
+        subs = sec.subsections if hasattr(sec, "subsections") else sec.get("subsections", [])
+        for sub in subs:
+            sub_title = sub.get("title", "") if isinstance(sub, dict) else sub
+            yield f"\n### {sub_title}\n"
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    for chunk in chunks:
+        yield from chunk.split("\n")
+
+
+def build_markdown(ps) -> str:
+    """논문을 Markdown 문자열로 변환한다."""
+    return "\n".join(iter_markdown(ps))
+
+
+def build_docx(ps) -> io.BytesIO:
+    """논문을 Word 문서(.docx)로 변환한다. python-docx가 없으면 ImportError가 난다.
+
+    Markdown 전체 문자열을 만들지 않고 줄 단위로 읽어 변환한다. 결과는 bytes로 한 번 더 복사하지 않고
+    처음으로 되감은 버퍼로 돌려준다 (st.download_button에 그대로 넘기거나 getbuffer()로 쓴다).
+    """
+    from docx import Document
+    from docx.shared import Pt
+
+    from src.md_docx import render_markdown
+
+    doc = Document()
+
+    style = doc.styles["Normal"]
+    style.font.size = Pt(11)
+    style.font.name = "Malgun Gothic"
+
+    render_markdown(doc, iter_lines(iter_markdown(ps)))
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    buf.seek(0)
+    return buf
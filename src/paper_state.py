@@ -1,12 +1,20 @@
-"""리뷰 논문 작성 상태 관리."""
+"""리뷰 논문 작성 상태 관리.
+
+Streamlit에 의존하지 않는 코어 모듈이다. 세션 상태는 Session이 임의의 MutableMapping
+(Streamlit의 session_state, 일반 dict 등) 위에서 다루고, 화면 쪽 연결은 src.st_session이 맡는다.
+"""
 
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, field, asdict
-from typing import Literal
+import uuid
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field, fields, asdict
+from typing import Any, Literal
 
-import streamlit as st
+from src import chat_memory, history
+from src.config import LLMConfig
+from src.storage import PaperStore, get_store
 
 Stage = Literal["topic", "overview", "structure", "draft", "finalize"]
 Mode = Literal["quick", "standard", "expert"]
@@ -85,9 +93,14 @@ class PaperState:
     # Stage 5 - 최종
     final_paper: str = ""
 
+    # 버전 기록 — 문서 키("draft:<섹션 제목>", "final") → src.history 형식의 버전 리스트
+    revisions: dict[str, list[dict]] = field(default_factory=dict)
+
     # 메타
     current_stage: Stage = "topic"
-    chat_history: list[dict] = field(default_factory=list)
+    chat_history: list[dict] = field(default_factory=list)  # 요약되지 않은 최근 메시지 (src.chat_memory)
+    chat_summary: str = ""
+    paper_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
 
     def to_dict(self) -> dict:
         d = asdict(self)
@@ -95,28 +108,98 @@ class PaperState:
 
     @classmethod
     def from_dict(cls, d: dict) -> PaperState:
+        known = {f.name for f in fields(cls)}
+        d = {k: v for k, v in d.items() if k in known}
         sections = [Section(**s) for s in d.pop("sections", [])]
-        return cls(sections=sections, **d)
-
-
-def get_paper_state() -> PaperState:
-    """session_state에서 PaperState를 가져오거나 새로 생성한다."""
-    if "paper_state" not in st.session_state:
-        st.session_state.paper_state = PaperState()
-    return st.session_state.paper_state
-
-
-def get_mode() -> Mode:
-    return get_paper_state().mode
-
-
-def set_stage(stage: Stage) -> None:
-    get_paper_state().current_stage = stage
-
-
-def add_chat(role: str, content: str) -> None:
-    get_paper_state().chat_history.append({"role": role, "content": content})
-
-
-def export_state_json() -> str:
-    return json.dumps(get_paper_state().to_dict(), ensure_ascii=False, indent=2)
+        chat_history = chat_memory.trim(d.pop("chat_history", []))
+        return cls(sections=sections, chat_history=chat_history, **d)
+
+    def add_chat(self, role: str, content: str) -> None:
+        chat_memory.append(self.chat_history, role, content)
+
+    def record_change(self, doc_key: str, old: str, new: str, label: str) -> None:
+        """문서가 old에서 new로 바뀌기 직전/직후를 버전 기록에 남긴다.
+
+        old가 마지막 기록과 다르면(직접 편집한 내용) 먼저 "직접 편집" 버전으로 남긴다.
+        """
+        revisions = self.revisions.setdefault(doc_key, [])
+        if old.strip():
+            history.record(revisions, old, "직접 편집")
+        if new.strip():
+            history.record(revisions, new, label)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+
+class Session:
+    """한 사용자 세션의 상태 — 현재 논문, LLM 설정, 소유자.
+
+    state는 세션 동안 유지되는 MutableMapping(Streamlit이면 st.session_state),
+    params는 새로고침 후에도 남는 문자열 매핑(Streamlit이면 st.query_params — ?paper=, ?user=)이다.
+    """
+
+    PAPER_KEY = "paper_state"
+    LLM_CONFIG_KEY = "llm_config"
+    SESSION_ID_KEY = "session_id"
+
+    def __init__(self, state: MutableMapping[str, Any], params: MutableMapping[str, str],
+                 store: PaperStore | None = None) -> None:
+        self.state = state
+        self.params = params
+        self._store = store
+
+    @property
+    def store(self) -> PaperStore:
+        return self._store or get_store()
+
+    @property
+    def owner(self) -> str:
+        """논문 소유자 — params의 user 값 (없으면 "default")."""
+        return self.params.get("user", "default")
+
+    @property
+    def paper(self) -> PaperState:
+        """현재 논문. 새 세션이면 params의 paper 값으로 저장소에서 복원하거나 새로 만든다.
+
+        다른 사용자(owner)의 논문 id면 열지 않고 새 논문을 시작한다 — 링크만으로 남의 논문을 가져오지 않도록.
+        """
+        if self.PAPER_KEY not in self.state:
+            paper_id = self.params.get("paper")
+            saved = self.store.load(paper_id, self.owner) if paper_id else None
+            ps = PaperState.from_dict(saved) if saved else PaperState()
+            self.state[self.PAPER_KEY] = ps
+            self.params["paper"] = ps.paper_id
+        return self.state[self.PAPER_KEY]
+
+    def open_paper(self, paper_id: str) -> None:
+        """저장된 다른 논문으로 전환한다. LLM 설정과 세션 id는 유지한다."""
+        for key in list(self.state.keys()):
+            if key not in (self.LLM_CONFIG_KEY, self.SESSION_ID_KEY):
+                del self.state[key]
+        self.params["paper"] = paper_id
+
+    def autosave(self) -> int:
+        """바뀐 필드만 저장소에 저장하고 기록한 행 수를 반환한다.
+
+        주제를 입력하기 전의 빈 논문은 목록을 어지럽히지 않도록 저장하지 않는다.
+        """
+        ps = self.paper
+        if not ps.topic.strip():
+            return 0
+        return self.store.save(ps.paper_id, self.owner, ps.to_dict())
+
+    @property
+    def session_id(self) -> str:
+        """계측(src.telemetry)에서 이 세션의 호출을 묶는 id. 세션 상태를 비우면 새로 만든다."""
+        if self.SESSION_ID_KEY not in self.state:
+            self.state[self.SESSION_ID_KEY] = uuid.uuid4().hex[:12]
+        return self.state[self.SESSION_ID_KEY]
+
+    @property
+    def llm_config(self) -> LLMConfig:
+        return self.state.get(self.LLM_CONFIG_KEY) or LLMConfig()
+
+    @llm_config.setter
+    def llm_config(self, cfg: LLMConfig) -> None:
+        self.state[self.LLM_CONFIG_KEY] = cfg
@@ -0,0 +1,433 @@
+"""화면 없이 실행하는 논문 작성 파이프라인 — Topic → Overview → Structure → Draft → Finalize.
+
+Streamlit 단계 화면과 같은 프롬프트 템플릿(src/prompts.py)과 모드별 분기를 사용하며,
+화면 쪽도 이 모듈의 프롬프트 빌더와 기본 구조를 가져다 쓰므로 두 경로의 결과가 어긋나지 않는다.
+
+각 단계는 결과가 이미 있으면 건너뛰고(초안은 비어 있는 섹션만 작성), 단계/섹션이 끝날 때마다
+checkpoint 콜백을 부른다. 중간에 멈춘 논문을 저장된 상태에서 다시 실행하면 남은 작업만 이어서 한다.
+LLM 호출은 모두 명시적으로 전달된 설정(cfg)으로 acall_llm을 통해 이루어지고, 단계별로 stage/mode/paper 계측 라벨이 붙는다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from src import finalize, history
+from src.config import LLMConfig
+from src.llm_client import acall_llm, llm_labels
+from src.paper_state import STAGES, Mode, PaperState, Section, Stage
+from src.prompts import (
+    AUTOFILL_SCHEMA,
+    DRAFT_SECTION_PROMPTS,
+    FINALIZE_PROMPTS,
+    OVERVIEW_PROMPTS,
+    QUICK_AUTOFILL_TOPIC,
+    REFINE_PROMPT,
+    STITCH_SCHEMA,
+    STRUCTURE_PROMPTS,
+    STRUCTURE_SCHEMA,
+    SYSTEM_PROMPTS,
+)
+from src.references import bibliography, is_reference_section, library_for, prompt_references
+from src.retrieval import related_context
+from src.structured import parse_json
+from src.tokens import DEFAULT_CONTEXT_BUDGET, fit_text
+
+Checkpoint = Callable[[PaperState], None]
+SectionProgress = Callable[[int, int, str, "BaseException | None"], None]
+
+
+class PipelineError(RuntimeError):
+    """단계를 끝낼 수 없을 때 발생한다. 그때까지의 결과는 checkpoint로 이미 저장되어 있다."""
+
+    def __init__(self, stage: Stage, message: str) -> None:
+        super().__init__(f"[{stage}] {message}")
+        self.stage = stage
+
+
+# ── 기본 구조 ──
+
+def _default_sections_quick() -> list[Section]:
+    return [
+        Section(title="Abstract", description="논문 요약"),
+        Section(title="1. Introduction", description="배경 및 목적"),
+        Section(title="2. Literature Review", description="핵심 문헌 리뷰"),
+        Section(title="3. Discussion", description="주요 발견과 시사점"),
+        Section(title="4. Conclusion", description="결론"),
+        Section(title="References", description="참고문헌"),
+    ]
+
+
+def _default_sections_standard() -> list[Section]:
+    return [
+        Section(title="Abstract", description="논문의 요약"),
+        Section(title="1. Introduction", description="연구 배경, 목적, 논문 구성 소개"),
+        Section(title="2. Background", description="주요 개념 및 관련 연구 정리"),
+        Section(title="3. Methodology", description="리뷰 방법론 (검색 전략, 선정 기준 등)"),
+        Section(title="4. Main Review", description="주제별 핵심 리뷰 내용", subsections=[{"title": "4.1 Sub-topic A"}, {"title": "4.2 Sub-topic B"}]),
+        Section(title="5. Discussion", description="주요 발견, 연구 간극, 향후 연구 방향"),
+        Section(title="6. Conclusion", description="핵심 결론 요약"),
+        Section(title="References", description="참고문헌 목록"),
+    ]
+
+
+def _default_sections_expert() -> list[Section]:
+    return [
+        Section(title="Abstract", description="구조화된 초록 (배경, 목적, 방법, 결과, 결론)"),
+        Section(title="1. Introduction", description="연구 배경, 동기, 연구 질문, 기여점, 논문 구성", subsections=[{"title": "1.1 Background and Motivation"}, {"title": "1.2 Research Questions"}, {"title": "1.3 Contributions"}, {"title": "1.4 Paper Organization"}]),
+        Section(title="2. Research Methodology", description="체계적 리뷰 방법론", subsections=[{"title": "2.1 Search Strategy"}, {"title": "2.2 Inclusion/Exclusion Criteria"}, {"title": "2.3 Quality Assessment"}, {"title": "2.4 Data Extraction"}]),
+        Section(title="3. Taxonomy and Classification", description="연구 분류 체계", subsections=[{"title": "3.1 Classification Framework"}, {"title": "3.2 Category A"}, {"title": "3.3 Category B"}]),
+        Section(title="4. Detailed Analysis", description="주제별 심층 분석", subsections=[{"title": "4.1 Topic A: Analysis"}, {"title": "4.2 Topic B: Analysis"}, {"title": "4.3 Comparative Analysis"}]),
+        Section(title="5. Discussion", description="종합 논의", subsections=[{"title": "5.1 Key Findings"}, {"title": "5.2 Research Gaps"}, {"title": "5.3 Implications"}, {"title": "5.4 Limitations"}]),
+        Section(title="6. Future Research Directions", description="향후 연구 방향"),
+        Section(title="7. Conclusion", description="핵심 결론 요약"),
+        Section(title="References", description="참고문헌 목록"),
+    ]
+
+
+_DEFAULT_SECTIONS: dict[Mode, Callable[[], list[Section]]] = {
+    "quick": _default_sections_quick,
+    "standard": _default_sections_standard,
+    "expert": _default_sections_expert,
+}
+
+
+def default_sections(mode: Mode) -> list[Section]:
+    """모드별 기본 논문 구조 (호출할 때마다 새 객체)."""
+    return _DEFAULT_SECTIONS[mode]()
+
+
+# ── 구조화 응답 ──
+
+def _as_text(value) -> str:
+    if isinstance(value, list):
+        return ", ".join(str(v).strip() for v in value if str(v).strip())
+    return value.strip() if isinstance(value, str) else ""
+
+
+def apply_autofill(ps: PaperState, text: str) -> bool:
+    """자동 완성 응답(AUTOFILL_SCHEMA JSON)으로 연구 질문/범위/키워드를 채운다.
+
+    응답에 있는 항목만 바꾸고, 하나라도 채웠으면 True를 반환한다. 중간에 끊긴 응답은 쓰지 않는다.
+    """
+    data = parse_json(text or "", "{", complete=True)
+    if not isinstance(data, dict):
+        return False
+    filled = False
+    for name in ("research_question", "scope", "keywords"):
+        value = _as_text(data.get(name))
+        if value:
+            setattr(ps, name, value)
+            filled = True
+    return filled
+
+
+def sections_from(data) -> list[Section]:
+    """구조 제안 JSON 값(STRUCTURE_SCHEMA)을 Section 목록으로 바꾼다.
+
+    스트리밍 중의 부분 값(src.structured.JsonStream)도 받으며, 제목이 없는 항목은 건너뛴다.
+    """
+    items = data.get("sections") if isinstance(data, dict) else data
+    sections = []
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, str):
+            item = {"title": item}
+        if not isinstance(item, dict) or not _as_text(item.get("title")):
+            continue
+        subsections = []
+        for sub in item.get("subsections") or []:
+            if isinstance(sub, str):
+                sub = {"title": sub}
+            if isinstance(sub, dict) and _as_text(sub.get("title")):
+                entry = {"title": _as_text(sub["title"])}
+                if _as_text(sub.get("description")):
+                    entry["description"] = _as_text(sub["description"])
+                subsections.append(entry)
+        sections.append(Section(title=_as_text(item["title"]), description=_as_text(item.get("description")),
+                                subsections=subsections))
+    return sections
+
+
+def parse_structure(text: str) -> list[Section]:
+    """구조 제안 응답 텍스트를 Section 목록으로. JSON을 찾지 못하거나 중간에 끊겼으면 빈 목록.
+
+    끊긴 응답을 닫아 읽으면 일부 섹션만 논문 전체 구조로 쓰게 되므로 받지 않는다.
+    """
+    return sections_from(parse_json(text or "", "{", complete=True))
+
+
+# ── 프롬프트 빌더 ──
+
+
+def overview_prompt(ps: PaperState, mode: Mode) -> str:
+    if mode == "quick":
+        return OVERVIEW_PROMPTS["quick"].format(topic=ps.topic, keywords=ps.keywords)
+    fmt_kwargs = dict(
+        topic=ps.topic,
+        research_question=ps.research_question,
+        scope=ps.scope,
+        keywords=ps.keywords,
+        paper_type=ps.paper_type,
+    )
+    if mode == "expert":
+        fmt_kwargs.update(
+            motivation=ps.motivation,
+            exclusion_criteria=ps.exclusion_criteria,
+            time_range=ps.time_range,
+            databases=ps.databases,
+        )
+    return OVERVIEW_PROMPTS[mode].format(**fmt_kwargs)
+
+
+def structure_prompt(ps: PaperState, mode: Mode) -> str:
+    fmt_kwargs = dict(topic=ps.topic, research_question=ps.research_question, overview=ps.overview)
+    if mode == "expert":
+        fmt_kwargs.update(
+            theoretical_framework=ps.theoretical_framework,
+            gap_analysis=ps.gap_analysis,
+            methodology_notes=ps.methodology_notes,
+        )
+    return STRUCTURE_PROMPTS[mode].format(**fmt_kwargs)
+
+
+def structure_summary(ps: PaperState) -> str:
+    lines = []
+    for sec in ps.sections:
+        lines.append(f"- {sec.title}: {sec.description}")
+        for sub in sec.subsections:
+            lines.append(f"  - {sub.get('title', '')}")
+    return "\n".join(lines)
+
+
+def section_prompt(ps: PaperState, sec: Section, mode: Mode, structure_sum: str,
+                   context_budget: int = DEFAULT_CONTEXT_BUDGET) -> str:
+    """섹션 초안 프롬프트를 만든다. 개요와 전체 구조는 합쳐서 context_budget 토큰 안으로 줄인다."""
+    subs_text = ""
+    if sec.subsections:
+        subs_text = "**하위 섹션**:\n" + "\n".join(
+            f"- {s.get('title', '')}" + (f": {s['description']}" if s.get("description") else "") for s in sec.subsections
+        )
+
+    refs_text = ""
+    query = " ".join([ps.topic, ps.keywords, sec.title, sec.description, *(s.get("title", "") for s in sec.subsections)])
+    candidates = prompt_references(ps.paper_id, query)
+    if candidates:
+        refs_text = ("**인용할 수 있는 문헌** (이 목록의 문헌만 인용하고 대괄호 안의 표기를 그대로 쓰세요. "
+                     "목록에 없는 문헌은 만들어 내지 마세요):\n" + candidates)
+
+    prompt_tpl = DRAFT_SECTION_PROMPTS[mode]
+    fmt_kwargs = dict(
+        topic=ps.topic,
+        section_title=sec.title,
+        section_description=sec.description,
+        subsections_text=subs_text,
+        references_text=refs_text,
+    )
+    if mode != "quick":
+        fmt_kwargs["overview"] = fit_text(ps.overview, context_budget // 2)
+        fmt_kwargs["structure_summary"] = fit_text(structure_sum, context_budget // 2)
+
+    return prompt_tpl.format(**fmt_kwargs)
+
+
+def refine_prompt(ps: PaperState, doc_key: str, current: str, feedback: str,
+                  context_budget: int = DEFAULT_CONTEXT_BUDGET, model: str = "") -> str:
+    """개선 프롬프트를 만든다. 섹션 초안이면 피드백과 관련된 다른 섹션/개요 조각을 함께 넣는다.
+
+    최종 논문은 본문 전체가 이미 현재 내용이므로 검색 결과를 넣지 않는다.
+    """
+    context = ""
+    if doc_key.startswith("draft:"):
+        query = f"{doc_key.removeprefix('draft:')}\n{feedback}"
+        context = related_context(ps, query, context_budget // 2, k=4, exclude={doc_key, "final"}, model=model)
+    return REFINE_PROMPT.format(current_content=current, feedback=feedback, context=context or "(없음)")
+
+
+def uses_bibliography(ps: PaperState, sec: Section) -> bool:
+    """References 섹션이고 참고문헌 라이브러리가 있으면 LLM 대신 인용 목록으로 채운다."""
+    return is_reference_section(sec.title) and len(library_for(ps.paper_id)) > 0
+
+
+def build_bibliography(ps: PaperState) -> str:
+    """References 섹션을 제외한 초안에서 인용된 라이브러리 문헌의 목록."""
+    return bibliography(ps.paper_id, (text for title, text in ps.draft_sections.items()
+                                      if not is_reference_section(title)))
+
+
+def single_pass_prompt(ps: PaperState, mode: Mode) -> str:
+    all_sections_text = ""
+    for sec in ps.sections:
+        content = ps.draft_sections.get(sec.title, "")
+        if content.strip():
+            all_sections_text += f"\n\n## {sec.title}\n\n{content}"
+
+    prompt_tpl = FINALIZE_PROMPTS[mode]
+    fmt_kwargs = dict(topic=ps.topic, all_sections=all_sections_text)
+    if mode != "quick":
+        fmt_kwargs["research_question"] = ps.research_question
+
+    return prompt_tpl.format(**fmt_kwargs)
+
+
+# ── 단계 실행 ──
+
+def _record(ps: PaperState, doc_key: str, text: str, label: str) -> None:
+    if text.strip():
+        history.record(ps.revisions.setdefault(doc_key, []), text, label)
+
+
+def _limit(cfg: LLMConfig) -> int:
+    return max(1, cfg.max_concurrency)
+
+
+async def _run_topic(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint) -> None:
+    """연구 질문이 비어 있으면 자동 완성 프롬프트로 연구 질문/범위/키워드를 채운다."""
+    if ps.research_question.strip():
+        return
+    result = await acall_llm(cfg, SYSTEM_PROMPTS[ps.mode], QUICK_AUTOFILL_TOPIC.format(topic=ps.topic),
+                             template="autofill_topic", schema=AUTOFILL_SCHEMA)
+    apply_autofill(ps, result)
+
+
+async def _run_overview(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint) -> None:
+    if ps.overview.strip():
+        return
+    ps.overview = await acall_llm(cfg, SYSTEM_PROMPTS[ps.mode], overview_prompt(ps, ps.mode), template="overview")
+
+
+async def _run_structure(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint) -> None:
+    """Standard/Expert는 구조 제안(STRUCTURE_SCHEMA)을 Section 목록으로 받아 쓴다.
+
+    Quick 모드는 화면과 같이 기본 구조를 쓰고, 제안에서 섹션을 얻지 못하면(끊긴 응답 포함) 기본 구조로 대신한다.
+    """
+    if ps.sections:
+        return
+    if ps.mode != "quick":
+        result = await acall_llm(cfg, SYSTEM_PROMPTS[ps.mode], structure_prompt(ps, ps.mode),
+                                 template="structure", schema=STRUCTURE_SCHEMA)
+        ps.sections = parse_structure(result)
+    if not ps.sections:
+        ps.sections = default_sections(ps.mode)
+
+
+async def _run_draft(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint) -> None:
+    """비어 있는 섹션을 동시에 작성한다. 섹션 하나가 끝날 때마다 checkpoint를 부른다."""
+    pending = [sec for sec in ps.sections if not ps.draft_sections.get(sec.title, "").strip()]
+    if not pending:
+        return
+    bibliographies = [sec for sec in pending if uses_bibliography(ps, sec)]
+    pending = [sec for sec in pending if sec not in bibliographies]
+
+    system_prompt = SYSTEM_PROMPTS[ps.mode]
+    structure_sum = structure_summary(ps)
+    budget = cfg.context_budget
+    semaphore = asyncio.Semaphore(_limit(cfg))
+
+    async def write(sec: Section) -> None:
+        async with semaphore:
+            result = await acall_llm(cfg, system_prompt, section_prompt(ps, sec, ps.mode, structure_sum, budget),
+                                     template="draft_section")
+        if result:
+            _record(ps, f"draft:{sec.title}", result, "AI 작성")
+            ps.draft_sections[sec.title] = result
+            checkpoint(ps)
+
+    results = await asyncio.gather(*(write(sec) for sec in pending), return_exceptions=True)
+    if bibliographies:
+        text = build_bibliography(ps)
+        for sec in bibliographies:
+            _record(ps, f"draft:{sec.title}", text, "인용 문헌 목록")
+            ps.draft_sections[sec.title] = text
+        checkpoint(ps)
+    errors = [f"'{sec.title}': {r}" for sec, r in zip(pending, results) if isinstance(r, BaseException)]
+    if errors:
+        raise PipelineError("draft", f"{len(errors)}개 섹션 생성 실패 — " + "; ".join(errors))
+
+
+async def _run_finalize(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint) -> None:
+    if ps.final_paper.strip():
+        return
+    written = [ps.draft_sections.get(sec.title, "") for sec in ps.sections]
+    if not any(c.strip() for c in written):
+        raise PipelineError("finalize", "작성된 섹션이 없습니다.")
+
+    if finalize.needs_map_reduce(written):
+        result = await finalize_map_reduce(ps, cfg)
+    else:
+        result = await acall_llm(cfg, SYSTEM_PROMPTS[ps.mode], single_pass_prompt(ps, ps.mode), template="finalize")
+    if not result:
+        raise PipelineError("finalize", "빈 응답")
+    _record(ps, "final", result, "AI 통합")
+    ps.final_paper = result
+
+
+async def finalize_map_reduce(ps: PaperState, cfg: LLMConfig, on_section: SectionProgress | None = None) -> str:
+    """섹션별 병렬 다듬기 → Abstract/전환 문장/결론 작성 → 조립. 다듬기에 실패한 섹션은 원본 초안을 그대로 쓴다.
+
+    on_section(끝난 수, 전체 수, 섹션 제목, 실패했으면 예외)은 섹션 하나의 다듬기가 끝날 때마다
+    이벤트 루프에서 불린다. 마무리 호출이 실패하면 예외를 그대로 전달한다.
+    """
+    system_prompt = SYSTEM_PROMPTS[ps.mode]
+    outline = finalize.global_outline([(sec.title, sec.description) for sec in ps.sections])
+    titles = [sec.title for sec in ps.sections if ps.draft_sections.get(sec.title, "").strip()]
+    body, conclusion = finalize.split_sections([(t, ps.draft_sections[t]) for t in titles])
+    prompts = finalize.harmonize_prompts(ps.topic, ps.research_question, outline, body)
+
+    semaphore = asyncio.Semaphore(_limit(cfg))
+    done = 0
+
+    async def harmonize(title: str, prompt: str) -> str | None:
+        nonlocal done
+        error = None
+        try:
+            async with semaphore:
+                result = await acall_llm(cfg, system_prompt, prompt, template="finalize_section")
+        except Exception as e:
+            result, error = None, e
+        done += 1
+        if on_section:
+            on_section(done, len(prompts), title, error)
+        return result
+
+    results = await asyncio.gather(*(harmonize(title, p) for (title, _), p in zip(body, prompts)))
+    harmonized = {title: r or content for (title, content), r in zip(body, results)}
+    ordered = [(t, harmonized[t]) for t, _ in body]
+    stitch_prompt = finalize.stitch_prompt(ps.mode, ps.topic, ps.research_question, ordered, conclusion)
+    stitch = finalize.parse_stitch(await acall_llm(cfg, system_prompt, stitch_prompt, template="finalize_stitch",
+                                                   schema=STITCH_SCHEMA))
+    harmonized.update((t, ps.draft_sections[t]) for t in titles if finalize.is_conclusion(t))
+    return finalize.assemble_paper(ps.topic, titles, harmonized, stitch)
+
+
+_RUNNERS: dict[Stage, Callable[[PaperState, LLMConfig, Checkpoint], Awaitable[None]]] = {
+    "topic": _run_topic,
+    "overview": _run_overview,
+    "structure": _run_structure,
+    "draft": _run_draft,
+    "finalize": _run_finalize,
+}
+
+
+def is_complete(ps: PaperState) -> bool:
+    return bool(ps.final_paper.strip())
+
+
+async def run_pipeline(ps: PaperState, cfg: LLMConfig, checkpoint: Checkpoint | None = None,
+                       on_stage: Callable[[PaperState, Stage], None] | None = None) -> PaperState:
+    """ps를 마지막 단계까지 진행한다. 각 단계가 끝날 때마다 checkpoint(ps)를 부른다.
+
+    실패하면 예외를 그대로 전달한다. 그때까지 끝난 단계/섹션은 이미 checkpoint로 넘어가 있다.
+    """
+    checkpoint = checkpoint or (lambda _ps: None)
+    if not ps.topic.strip():
+        raise PipelineError("topic", "주제가 비어 있습니다.")
+
+    for stage in STAGES:
+        ps.current_stage = stage
+        if on_stage:
+            on_stage(ps, stage)
+        with llm_labels(stage=stage, mode=ps.mode, paper=ps.paper_id):
+            await _RUNNERS[stage](ps, cfg, checkpoint)
+        checkpoint(ps)
+    return ps
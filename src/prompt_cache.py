@@ -0,0 +1,115 @@
+"""프롬프트 접두사 캐싱 — 여러 요청이 공유하는 긴 앞부분을 제공자 쪽 캐시에 올린다.
+
+섹션 초안/통합 프롬프트는 같은 논문의 시스템 프롬프트, 개요, 전체 구조를 섹션마다 다시 보낸다.
+템플릿(src/prompts.py)은 이 공통 부분을 앞에 두고 PREFIX_BREAK로 섹션별 부분과 나눈다.
+
+- Anthropic: 공통 부분을 별도 텍스트 블록으로 보내고 cache_control을 붙인다.
+  캐시 읽기는 입력 가격의 0.1배, 쓰기는 1.25배이고 마지막 사용 후 약 5분간 유지된다.
+- OpenAI: CACHE_MIN_TOKENS 이상 같은 접두사는 자동으로 캐시된다. 메시지 순서를 그대로 두고
+  같은 접두사의 요청이 같은 서버로 가도록 prompt_cache_key만 붙인다.
+
+캐시는 첫 요청의 응답이 시작된 뒤에야 쓰이므로, 같은 접두사의 요청을 한꺼번에 보내면 모두 캐시를
+새로 쓴다. PrefixTracker는 접두사별로 첫 요청(primer)만 먼저 보내고 나머지는 그 응답이 시작될 때까지
+기다리게 한다 (src.llm_client.acall_llm).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+
+from src.prompts import PREFIX_BREAK
+from src.tokens import count_tokens
+
+# 이보다 짧은 접두사는 두 제공자 모두 캐시하지 않는다.
+CACHE_MIN_TOKENS = 1024
+
+# 제공자 쪽 캐시가 유지된다고 보는 시간(초). 지나면 다음 요청이 다시 primer가 된다.
+PREFIX_TTL = 300.0
+
+# primer의 응답 시작을 기다리는 최대 시간(초). 넘으면 캐시 없이 그냥 보낸다.
+PRIME_WAIT = 20.0
+
+
+def cacheable_prefix(model: str, system_prompt: str, user_prompt: str) -> str:
+    """user_prompt에서 캐시할 공통 앞부분(PREFIX_BREAK 포함)을 돌려준다. 없거나 너무 짧으면 ""."""
+    head, sep, rest = user_prompt.partition(PREFIX_BREAK)
+    if not sep or not rest.strip():
+        return ""
+    if count_tokens(system_prompt, model) + count_tokens(head, model) < CACHE_MIN_TOKENS:
+        return ""
+    return head + sep
+
+
+def prefix_key(provider: str, model: str, system_prompt: str, prefix: str) -> str:
+    payload = "\0".join([provider, model, system_prompt, prefix])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class _PrefixState:
+    loop: asyncio.AbstractEventLoop
+    started: asyncio.Event = field(default_factory=asyncio.Event)
+    warmed_at: float | None = None  # primer의 응답이 시작된(캐시가 쓰인) 시각
+
+
+class PrefixTracker:
+    """접두사별로 캐시가 이미 쓰였는지, 쓰는 중인지 기록한다. 여러 스레드/이벤트 루프에서 사용해도 안전하다."""
+
+    def __init__(self, ttl: float = PREFIX_TTL, wait: float = PRIME_WAIT) -> None:
+        self.ttl = ttl
+        self.wait = wait
+        self._states: dict[str, _PrefixState] = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [k for k, s in self._states.items() if s.warmed_at is not None and now - s.warmed_at > self.ttl]
+        for k in expired:
+            del self._states[k]
+
+    async def claim(self, key: str) -> bool:
+        """True면 이 요청이 primer다 — 보내고 응답이 시작되면 warmed(), 끝나면 release()를 부른다.
+
+        다른 요청이 같은 접두사를 쓰는 중이면 그 응답이 시작될 때까지(최대 wait초) 기다린 뒤 False.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            state = self._states.get(key)
+            if state is None:
+                self._states[key] = _PrefixState(loop)
+                return True
+            if state.warmed_at is not None:
+                state.warmed_at = now  # 캐시를 읽으면 제공자 쪽 유지 시간도 늘어난다
+                return False
+        if state.loop is loop:  # Event는 만든 루프에서만 기다릴 수 있다
+            try:
+                await asyncio.wait_for(state.started.wait(), self.wait)
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    def warmed(self, key: str) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.warmed_at is not None:
+                return
+            state.warmed_at = time.monotonic()
+        state.started.set()
+
+    def release(self, key: str) -> None:
+        """primer가 끝났다. 응답이 시작되지 못했으면(실패, 취소) 기다리던 요청을 풀어 주고
+        다음 요청이 다시 primer가 되게 한다."""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.warmed_at is not None:
+                return
+            del self._states[key]
+        state.started.set()
+
+
+prefix_tracker = PrefixTracker()
@@ -1,4 +1,13 @@
-"""LLM 프롬프트 템플릿 모음 — 모드별 분기 포함."""
+"""LLM 프롬프트 템플릿 모음 — 모드별 분기 포함.
+
+여러 요청이 같은 내용을 공유하는 템플릿은 바뀌지 않는 부분(논문 정보, 개요, 전체 구조)을 앞에,
+요청마다 달라지는 부분을 뒤에 둔다. 같은 논문의 섹션 요청끼리 앞부분이 글자 단위로 같아야
+제공자 쪽 프롬프트 캐시가 재사용된다 (src/prompt_cache.py).
+"""
+
+# 공통 앞부분과 요청별 부분의 경계. 이 앞까지가 캐시 대상이다.
+# 개요 등 본문에 흔한 "---"와 겹치지 않도록 문구를 붙인다.
+PREFIX_BREAK = "\n\n--- 여기까지 공통 정보 ---\n\n"
 
 # ── 시스템 프롬프트 (모드별) ──
 
@@ -82,6 +91,13 @@ OVERVIEW_PROMPTS = {
 
 # ── 구조 프롬프트 ──
 
+# 구조 제안의 응답 형식. 제공자가 구조화 출력을 지원하면 STRUCTURE_SCHEMA로 강제되고,
+# 지원하지 않아도 이 안내대로 온 JSON을 src.structured가 파싱한다. (format() 전이므로 중괄호를 두 번 쓴다)
+_STRUCTURE_JSON = """
+다음 JSON 형식으로만 답해 주세요. 하위 섹션이 없으면 빈 목록으로 둡니다:
+{{"sections": [{{"title": "1. 섹션 제목", "description": "설명", "subsections": [{{"title": "1.1 하위 섹션 제목", "description": "초점"}}]}}]}}
+"""
+
 STRUCTURE_PROMPTS = {
     "quick": """\
 다음 리뷰 논문의 기본 구조(목차)를 간단히 제안해 주세요.
@@ -90,7 +106,7 @@ STRUCTURE_PROMPTS = {
 **개요**: {overview}
 
 5-6개 핵심 섹션만 제안해 주세요. 각 섹션은 제목과 한 줄 설명만.
-""",
+""" + _STRUCTURE_JSON,
     "standard": """\
 다음 리뷰 논문의 상세 구조(목차)를 설계해 주세요.
 
@@ -98,14 +114,14 @@ STRUCTURE_PROMPTS = {
 **연구 질문**: {research_question}
 **개요**: {overview}
 
-각 섹션에 대해 다음 형식으로 제안해 주세요:
+각 섹션에 대해 다음을 제안해 주세요:
 - 섹션 제목
 - 간략한 설명 (2-3문장)
 - 하위 섹션 (있을 경우)
 
 일반적인 리뷰 논문 구조(서론, 배경, 주제별 리뷰, 논의, 결론)를 기반으로 하되,
 주제 특성에 맞게 조정해 주세요.
-""",
+""" + _STRUCTURE_JSON,
     "expert": """\
 다음 리뷰 논문의 상세 구조를 설계해 주세요. 최상위 저널(Nature Reviews, ACM Computing Surveys 등) 수준을 목표합니다.
 
@@ -116,7 +132,7 @@ STRUCTURE_PROMPTS = {
 **연구 간극 분석**: {gap_analysis}
 **방법론 노트**: {methodology_notes}
 
-각 섹션에 대해 다음을 포함해 주세요:
+각 섹션에 대해 다음을 포함해 주세요 (하위 섹션 외의 항목은 섹션 설명에 씁니다):
 1. 섹션 제목 및 학술적 위치 설명
 2. 상세 설명 (목적, 다룰 핵심 논점, 예상 분량)
 3. 하위 섹션 및 각각의 초점
@@ -128,7 +144,40 @@ STRUCTURE_PROMPTS = {
 - 분류 체계(taxonomy)의 명확성
 - 비판적 분석 섹션의 깊이
 - 향후 연구 방향의 구체성
-""",
+""" + _STRUCTURE_JSON,
+}
+
+STRUCTURE_SCHEMA = {
+    "name": "paper_structure",
+    "description": "리뷰 논문의 섹션 구조",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "sections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "subsections": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {"title": {"type": "string"}, "description": {"type": "string"}},
+                                "required": ["title", "description"],
+                                "additionalProperties": False,
+                            },
+                        },
+                    },
+                    "required": ["title", "description", "subsections"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["sections"],
+        "additionalProperties": False,
+    },
 }
 
 # ── 초안 작성 프롬프트 ──
@@ -141,6 +190,7 @@ DRAFT_SECTION_PROMPTS = {
 **작성할 섹션**: {section_title}
 **섹션 설명**: {section_description}
 {subsections_text}
+{references_text}
 
 핵심 내용 위주로 작성하되, 학술적 톤을 유지해 주세요.
 참고문헌은 [Author, Year] 형식으로 표시해 주세요.
@@ -150,13 +200,11 @@ DRAFT_SECTION_PROMPTS = {
 
 **논문 주제**: {topic}
 **논문 개요**: {overview}
-**전체 구조**: {structure_summary}
-
----
-
+**전체 구조**: {structure_summary}""" + PREFIX_BREAK + """\
 **작성할 섹션**: {section_title}
 **섹션 설명**: {section_description}
 {subsections_text}
+{references_text}
 
 학술적 문체로 작성하되, 구체적인 논의와 분석을 포함해 주세요.
 참고문헌이 필요한 부분은 [Author, Year] 형식으로 표시해 주세요.
@@ -166,13 +214,11 @@ DRAFT_SECTION_PROMPTS = {
 
 **논문 주제**: {topic}
 **논문 개요**: {overview}
-**전체 구조**: {structure_summary}
-
----
-
+**전체 구조**: {structure_summary}""" + PREFIX_BREAK + """\
 **작성할 섹션**: {section_title}
 **섹션 설명**: {section_description}
 {subsections_text}
+{references_text}
 
 작성 시 다음을 반드시 포함해 주세요:
 1. 도입부 — 이 섹션의 목적과 전체 논문에서의 위치
@@ -237,6 +283,94 @@ FINALIZE_PROMPTS = {
 """,
 }
 
+# ── 긴 논문용 단계별 통합 프롬프트 (섹션별 정리 → 초록 작성) ──
+
+FINALIZE_SECTION_PROMPT = """\
+다음은 리뷰 논문의 한 섹션 초안입니다. 전체 논문의 일부로 자연스럽게 읽히도록 다듬어 주세요.
+
+**주제**: {topic}
+**연구 질문**: {research_question}
+**전체 구조**:
+{outline}""" + PREFIX_BREAK + """\
+**이전 섹션**: {prev_title}
+**다음 섹션**: {next_title}
+
+---
+
+## {section_title}
+
+{content}
+
+---
+
+다음 사항을 지켜 주세요:
+1. 내용은 유지하되 용어, 약어, 문체를 전체 논문과 일관되게 정리
+2. 다른 섹션에서 다룰 내용과의 중복 제거
+3. 섹션 사이의 전환 문장은 마지막에 따로 작성하므로 덧붙이지 않기
+4. 섹션 제목(## 헤더)은 쓰지 말고 본문만 출력
+"""
+
+# 최종 통합의 마무리(stitch) 단계: 다듬어진 섹션들의 앞부분과 결론 초안을 보고 Abstract, 섹션 사이 전환 문장,
+# 논문 전체를 종합하는 결론을 한 번에 쓴다. 응답 형식은 STITCH_SCHEMA (format() 전이므로 중괄호를 두 번 쓴다).
+_STITCH_TASKS = """
+{section_digests}
+
+**현재 결론 초안** (없으면 새로 작성):
+{conclusion}
+
+다음 세 가지를 작성해 주세요:
+1. abstract: {abstract_style} (제목 없이 본문만)
+2. transitions: 위 섹션 순서에서 각 섹션("after"에 제목을 그대로)의 끝에 붙일, 다음 섹션으로 이어지는 1-2문장
+   (마지막 섹션 뒤에는 쓰지 않습니다)
+3. conclusion: 모든 섹션의 핵심을 종합하고 연구 질문에 답하는 결론 (결론 초안이 있으면 그 내용을 살려 다듬기, 제목 없이)
+
+다음 JSON 형식으로만 답해 주세요:
+{{"abstract": "...", "transitions": [{{"after": "섹션 제목", "text": "전환 문장"}}], "conclusion": "..."}}
+"""
+
+FINALIZE_STITCH_PROMPTS = {
+    "quick": """\
+다음은 리뷰 논문 각 섹션의 앞부분입니다. 이를 바탕으로 논문을 하나로 잇는 마무리 작업을 해 주세요.
+
+**주제**: {topic}
+""" + _STITCH_TASKS.replace("{abstract_style}", "간결한 Abstract"),
+    "standard": """\
+다음은 리뷰 논문 각 섹션의 앞부분입니다. 이를 바탕으로 논문을 하나로 잇는 마무리 작업을 해 주세요.
+
+**주제**: {topic}
+**연구 질문**: {research_question}
+""" + _STITCH_TASKS.replace("{abstract_style}", "연구 질문, 주요 내용, 결론이 드러나는 한 단락의 Abstract"),
+    "expert": """\
+다음은 리뷰 논문 각 섹션의 앞부분입니다. 이를 바탕으로 최상위 저널 수준으로 논문을 하나로 잇는 마무리 작업을 해 주세요.
+
+**주제**: {topic}
+**연구 질문**: {research_question}
+""" + _STITCH_TASKS.replace("{abstract_style}", "구조화된 초록(배경, 목적, 방법, 결과, 결론)"),
+}
+
+STITCH_SCHEMA = {
+    "name": "paper_stitch",
+    "description": "최종 논문의 Abstract, 섹션 사이 전환 문장, 결론",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "abstract": {"type": "string"},
+            "transitions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"after": {"type": "string"}, "text": {"type": "string"}},
+                    "required": ["after", "text"],
+                    "additionalProperties": False,
+                },
+            },
+            "conclusion": {"type": "string"},
+        },
+        "required": ["abstract", "transitions", "conclusion"],
+        "additionalProperties": False,
+    },
+}
+
 # ── 개선 프롬프트 ──
 
 REFINE_PROMPT = """\
@@ -245,6 +379,9 @@ REFINE_PROMPT = """\
 **현재 내용**:
 {current_content}
 
+**논문의 다른 관련 부분** (용어와 내용의 일관성 참고용, 수정 대상 아님):
+{context}
+
 **사용자 피드백**:
 {feedback}
 
@@ -257,12 +394,34 @@ CHAT_PROMPT = """\
 리뷰 논문 작성 맥락에서 사용자의 질문에 답해 주세요.
 
 **현재 논문 주제**: {topic}
-**현재 단계**: {stage}
 **관련 정보**: {context}
+**현재 단계**: {stage}
+
+**이전 대화 요약**: {summary}
+
+**최근 대화**:
+{history}
+
+**논문의 관련 부분**:
+{excerpts}
 
 **사용자 질문**: {question}
 """
 
+CHAT_SUMMARY_PROMPT = """\
+리뷰 논문 작성 도우미와 사용자의 대화 기록을 요약해 주세요.
+
+**기존 요약**:
+{summary}
+
+**새로 추가된 대화**:
+{messages}
+
+기존 요약과 새 대화를 합쳐 하나의 요약으로 갱신해 주세요. 사용자가 내린 결정, 요청한 수정 방향,
+아직 해결되지 않은 질문을 우선 남기고, 생성된 초안 본문은 어떤 섹션을 작성/개선했는지만 적어 주세요.
+약 {limit} 토큰 이내의 개조식으로 작성해 주세요.
+"""
+
 # ── Quick 모드 전용: AI 자동완성 프롬프트 ──
 
 QUICK_AUTOFILL_TOPIC = """\
@@ -278,6 +437,21 @@ QUICK_AUTOFILL_TOPIC = """\
 }}
 """
 
+AUTOFILL_SCHEMA = {
+    "name": "topic_autofill",
+    "description": "리뷰 논문의 연구 질문, 범위, 키워드",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "research_question": {"type": "string"},
+            "scope": {"type": "string"},
+            "keywords": {"type": "string", "description": "쉼표로 구분한 키워드"},
+        },
+        "required": ["research_question", "scope", "keywords"],
+        "additionalProperties": False,
+    },
+}
+
 # ── Expert 모드 전용: 워크숍 질문 프롬프트 ──
 
 EXPERT_WORKSHOP_TOPIC = """\
@@ -0,0 +1,478 @@
+"""참고문헌 라이브러리 — BibTeX / RIS 가져오기, 중복 제거, 키워드·저자 검색.
+
+검색 데이터베이스(Google Scholar, Scopus, IEEE Xplore, Zotero 등)에서 내보낸 파일을 논문별
+라이브러리에 넣고, 섹션 초안 프롬프트에는 섹션과 관련된 문헌만 골라 넣는다. 모델은 목록에 있는
+문헌만 [Author, Year] 형식으로 인용하고, References 섹션은 LLM 대신 본문에서 실제로 인용된
+항목으로 만든다.
+
+- 중복: DOI가 같거나, DOI가 없으면 정규화한 제목이 같으면 같은 문헌으로 보고 빈 필드만 채운다.
+- 색인: 제목·키워드·학술지 용어(src.retrieval.terms)의 역색인과 저자 성(last name) 색인.
+  항목 수와 무관하게 질의 용어의 posting만 훑으므로 1만 건 이상에서도 밀리초 단위로 검색된다.
+- 저장: 논문 상태(PaperState)와 분리해 저장소의 paper_references 테이블에 둔다. 라이브러리가
+  커져도 매 rerun의 자동 저장 비용이 늘지 않는다. 초록은 프롬프트에도 색인에도 쓰지 않으므로
+  보관하지 않는다 (내보내기 파일 크기의 대부분).
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field, fields
+
+from src.retrieval import terms
+from src.storage import PaperStore, get_store
+
+MAX_LIBRARIES = 16  # 프로세스에 보관하는 논문별 라이브러리 수
+TITLE_WEIGHT = 3
+
+REFERENCE_SECTION_TITLES = {"references", "reference", "bibliography", "참고문헌", "참고 문헌"}
+
+
+@dataclass
+class Reference:
+    title: str = ""
+    authors: list[str] = field(default_factory=list)  # "성, 이름" 또는 원문 그대로
+    year: str = ""
+    venue: str = ""
+    doi: str = ""
+    url: str = ""
+    keywords: str = ""
+    entry_type: str = "article"
+    key: str = ""  # 원본 파일의 인용 키
+    source: str = ""  # 가져온 파일 이름
+    label: str = ""  # 라이브러리가 붙이는 인용 표기, 예: "Smith et al., 2020"
+
+    def to_dict(self) -> dict:
+        # asdict()는 필드마다 deepcopy를 해서 1만 건 저장에 1초 넘게 걸린다
+        d = dict(self.__dict__)
+        d["authors"] = list(self.authors)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> Reference:
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in known})
+
+
+# ── 정규화 ──
+
+_DOI_PREFIX_RE = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+_LATEX_CMD_RE = re.compile(r"\\[a-zA-Z]+\s*|\\.")
+_LATEX_ACCENT_RE = re.compile(r"\\([\"'`^~=.c])\s*\{?([a-zA-Z])\}?")
+_ACCENTS = {'"': "\u0308", "'": "\u0301", "`": "\u0300", "^": "\u0302", "~": "\u0303",
+            "=": "\u0304", ".": "\u0307", "c": "\u0327"}
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_doi(doi: str) -> str:
+    return _DOI_PREFIX_RE.sub("", doi.strip()).strip().lower()
+
+
+def _accent(m: re.Match) -> str:
+    return unicodedata.normalize("NFC", m.group(2) + _ACCENTS[m.group(1)])
+
+
+def clean_latex(text: str) -> str:
+    """BibTeX 값의 중괄호와 간단한 LaTeX 명령을 걷어낸다 ({\\"o} → ö, \\& → &)."""
+    if "\\" in text or "~" in text:
+        text = _LATEX_ACCENT_RE.sub(_accent, text)
+        text = _LATEX_CMD_RE.sub("", text.replace("\\&", "&").replace("~", " "))
+    if "{" in text:
+        text = text.replace("{", "").replace("}", "")
+    if "\n" in text or "  " in text or "\t" in text:
+        text = " ".join(text.split())
+    return text.strip()
+
+
+def normalize_title(title: str) -> str:
+    text = clean_latex(title).lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def last_name(author: str) -> str:
+    author = author.strip()
+    if "," in author:
+        return author.split(",", 1)[0].strip()
+    parts = author.split()
+    return parts[-1] if parts else ""
+
+
+# ── BibTeX ──
+
+_BIB_ENTRY_RE = re.compile(r"@\s*(\w+)\s*[{(]")
+_BIB_FIELD_RE = re.compile(r"\s*,?\s*([\w:.-]+)\s*=\s*")
+_BIB_BARE_RE = re.compile(r"[^,})]*")
+_BIB_CLOSE_RE = re.compile(r"[\s,]*[})]")
+_BRACE_RE = re.compile(r"[{}]")
+_BIB_SKIP = {"comment", "preamble", "string"}
+
+_BIB_FIELDS = {
+    "title": "title",
+    "year": "year",
+    "journal": "venue",
+    "booktitle": "venue",
+    "publisher": "venue",
+    "doi": "doi",
+    "url": "url",
+    "keywords": "keywords",
+}
+
+
+def _match_brace(text: str, open_pos: int) -> int:
+    """text[open_pos]의 '{'에 짝이 맞는 '}'의 위치 (없으면 텍스트 끝)."""
+    close = text.find("}", open_pos + 1)
+    if close >= 0 and text.find("{", open_pos + 1, close) < 0:
+        return close  # 중첩 없는 값 (대부분)
+    depth = 0
+    for m in _BRACE_RE.finditer(text, open_pos):
+        depth += 1 if m.group() == "{" else -1
+        if depth == 0:
+            return m.start()
+    return len(text)
+
+
+def _bib_fields(text: str, pos: int) -> tuple[dict[str, str], int]:
+    """pos부터 "name = value" 필드를 읽어 (필드, 마지막 필드 다음 위치)를 반환한다."""
+    values: dict[str, str] = {}
+    while True:
+        m = _BIB_FIELD_RE.match(text, pos)
+        if not m or m.end() >= len(text):
+            return values, pos
+        name, pos = m.group(1).lower(), m.end()
+        first = text[pos]
+        if first == "{":
+            end = _match_brace(text, pos)
+            value, pos = text[pos + 1:end], end + 1
+        elif first == '"':
+            end = text.find('"', pos + 1)
+            end = len(text) if end < 0 else end
+            value, pos = text[pos + 1:end], end + 1
+        else:
+            m = _BIB_BARE_RE.match(text, pos)
+            value, pos = m.group().strip(), m.end()
+        values.setdefault(name, value)
+
+
+def parse_bibtex(text: str, source: str = "") -> Iterator[Reference]:
+    pos = 0
+    while True:
+        m = _BIB_ENTRY_RE.search(text, pos)
+        if not m:
+            return
+        entry_type = m.group(1).lower()
+        if entry_type in _BIB_SKIP:
+            pos = _match_brace(text, m.end() - 1) + 1 if text[m.end() - 1] == "{" else m.end()
+            continue
+
+        comma = text.find(",", m.end())
+        if comma < 0:
+            return
+        values, pos = _bib_fields(text, comma + 1)
+        close = _BIB_CLOSE_RE.match(text, pos)
+        if close:
+            pos = close.end()
+
+        ref = Reference(entry_type=entry_type, key=text[m.end():comma].strip(), source=source)
+        for name, value in values.items():
+            if name == "author":
+                ref.authors = [clean_latex(a) for a in re.split(r"\s+and\s+", value) if a.strip()]
+            elif name in _BIB_FIELDS and not getattr(ref, _BIB_FIELDS[name]):
+                setattr(ref, _BIB_FIELDS[name], clean_latex(value))
+        if ref.title:
+            yield ref
+
+
+# ── RIS ──
+
+_RIS_LINE_RE = re.compile(r"^([A-Z][A-Z0-9])  -(?: (.*))?$", re.MULTILINE)
+_RIS_TYPES = {"JOUR": "article", "CONF": "inproceedings", "CPAPER": "inproceedings", "BOOK": "book",
+              "CHAP": "incollection", "THES": "phdthesis", "RPRT": "techreport", "ELEC": "misc"}
+_RIS_FIELDS = {
+    "TI": "title", "T1": "title",
+    "PY": "year", "Y1": "year", "DA": "year",
+    "JO": "venue", "JF": "venue", "T2": "venue", "JA": "venue", "BT": "venue",
+    "DO": "doi", "UR": "url", "ID": "key",
+}
+
+
+def parse_ris(text: str, source: str = "") -> Iterator[Reference]:
+    ref: Reference | None = None
+    keywords: list[str] = []
+    for m in _RIS_LINE_RE.finditer(text):
+        tag, value = m.group(1), (m.group(2) or "").strip()
+        if tag == "TY":
+            ref, keywords = Reference(entry_type=_RIS_TYPES.get(value, "misc"), source=source), []
+        elif ref is None:
+            continue
+        elif tag == "ER":
+            ref.keywords = ", ".join(keywords)
+            if ref.title:
+                yield ref
+            ref = None
+        elif tag in ("AU", "A1", "A2"):
+            ref.authors.append(value)
+        elif tag == "KW":
+            keywords.append(value)
+        elif tag in _RIS_FIELDS and not getattr(ref, _RIS_FIELDS[tag]):
+            if tag in ("PY", "Y1", "DA"):
+                value = value[:4]
+            setattr(ref, _RIS_FIELDS[tag], value)
+    if ref is not None and ref.title:  # 마지막 ER이 빠진 파일
+        ref.keywords = ", ".join(keywords)
+        yield ref
+
+
+def parse(text: str, source: str = "") -> Iterator[Reference]:
+    """파일 내용으로 형식을 판별해 파싱한다 (확장자 .ris / RIS 태그가 있으면 RIS, 아니면 BibTeX)."""
+    if source.lower().endswith(".ris") or re.search(r"^TY  -", text, re.MULTILINE):
+        return parse_ris(text, source)
+    return parse_bibtex(text, source)
+
+
+# ── 라이브러리 ──
+
+def base_label(ref: Reference) -> str:
+    names = [name for name in map(last_name, ref.authors) if name]
+    if not names:
+        who = "Anon."
+    elif len(names) == 1:
+        who = names[0]
+    elif len(names) == 2:
+        who = f"{names[0]} & {names[1]}"
+    else:
+        who = f"{names[0]} et al."
+    return f"{who}, {ref.year or 'n.d.'}"
+
+
+class ReferenceLibrary:
+    """한 논문의 참고문헌. 추가 시 중복을 합치고 검색 색인을 함께 갱신한다."""
+
+    def __init__(self) -> None:
+        self.entries: list[Reference] = []
+        self._by_doi: dict[str, int] = {}
+        self._by_title: dict[str, int] = {}
+        self._labels: set[str] = set()
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {항목 번호: 가중 빈도}
+        self._authors: dict[str, set[int]] = {}  # 소문자 성 -> 항목 번호
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, ref: Reference) -> tuple[int, bool, bool]:
+        """(항목 번호, 새로 추가되었는지, 바뀌었는지). 중복이면 기존 항목의 빈 필드만 채운다."""
+        with self._lock:
+            doi = normalize_doi(ref.doi)
+            title = normalize_title(ref.title)
+            idx = self._by_doi.get(doi) if doi else None
+            if idx is None and title:
+                idx = self._by_title.get(title)
+                # 제목이 같아도 DOI가 서로 다르면 다른 문헌(예: 같은 제목의 정오표)으로 본다.
+                if idx is not None and doi and normalize_doi(self.entries[idx].doi) not in ("", doi):
+                    idx = None
+            if idx is not None:
+                existing = self.entries[idx]
+                changed = False
+                for f in fields(Reference):
+                    if f.name != "label" and not getattr(existing, f.name) and getattr(ref, f.name):
+                        setattr(existing, f.name, getattr(ref, f.name))
+                        changed = True
+                if doi:
+                    self._by_doi.setdefault(doi, idx)
+                if changed:
+                    self._index(idx, existing)
+                return idx, False, changed
+
+            idx = len(self.entries)
+            if not ref.label or ref.label in self._labels:  # 저장소에서 불러온 항목은 기존 표기를 유지한다
+                ref.label = self._unique_label(base_label(ref))
+            self._labels.add(ref.label)
+            self.entries.append(ref)
+            if doi:
+                self._by_doi[doi] = idx
+            if title:
+                self._by_title.setdefault(title, idx)
+            self._index(idx, ref)
+            return idx, True, True
+
+    def _unique_label(self, base: str) -> str:
+        """같은 저자·연도가 여러 건이면 "Kim, 2020", "Kim, 2020b", ..., "Kim, 2020z", "Kim, 2020aa" 순으로 붙인다."""
+        label, n = base, 1
+        while label in self._labels:
+            n += 1
+            suffix, k = "", n
+            while k:
+                k, r = divmod(k - 1, 26)
+                suffix = chr(ord("a") + r) + suffix
+            label = base + suffix
+        return label
+
+    def _index(self, idx: int, ref: Reference) -> None:
+        weights: dict[str, int] = {}
+        for term in terms(ref.title):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        for term in terms(f"{ref.keywords} {ref.venue}"):
+            weights[term] = weights.get(term, 0) + 1
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[idx] = weight
+        for author in ref.authors:
+            name = last_name(author).lower()
+            if name:
+                self._authors.setdefault(name, set()).add(idx)
+
+    def ingest(self, refs: Iterable[Reference]) -> tuple[list[Reference], int]:
+        """(새로 추가되었거나 중복으로 보강된 항목, 중복 수). 바뀐 것이 없는 중복은 돌려주지 않는다."""
+        touched: dict[int, Reference] = {}
+        duplicates = 0
+        for ref in refs:
+            idx, added, changed = self.add(ref)
+            duplicates += not added
+            if changed:
+                touched[idx] = self.entries[idx]
+        return list(touched.values()), duplicates
+
+    def search(self, query: str = "", k: int = 10, author: str = "") -> list[Reference]:
+        """query 용어와 맞는 항목을 점수 순으로 k개. author를 주면 그 성의 저자가 있는 항목으로 좁힌다."""
+        with self._lock:
+            allowed = None
+            if author.strip():
+                allowed = set()
+                for name in author.lower().replace(",", " ").split():
+                    allowed |= self._authors.get(name, set())
+                if not allowed:
+                    return []
+            n = len(self.entries)
+            scores: dict[int, float] = {}
+            for term in set(terms(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + n / len(posting))
+                for idx, weight in posting.items():
+                    if allowed is None or idx in allowed:
+                        scores[idx] = scores.get(idx, 0.0) + idf * weight
+            if not query.strip() and allowed is not None:
+                scores = {idx: 0.0 for idx in allowed}
+            ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [self.entries[idx] for idx, _ in ranked]
+
+    def by_label(self) -> dict[str, Reference]:
+        with self._lock:
+            return {ref.label: ref for ref in self.entries}
+
+
+# ── 논문별 라이브러리 (저장소 연동) ──
+
+_libraries: OrderedDict[str, ReferenceLibrary] = OrderedDict()
+_libraries_lock = threading.Lock()
+
+
+def library_for(paper_id: str, store: PaperStore | None = None) -> ReferenceLibrary:
+    """paper_id의 라이브러리. 처음 쓸 때 저장소에서 불러오고 최근 MAX_LIBRARIES개를 메모리에 둔다."""
+    with _libraries_lock:
+        library = _libraries.get(paper_id)
+        if library is not None:
+            _libraries.move_to_end(paper_id)
+            return library
+        library = ReferenceLibrary()
+        for d in (store or get_store()).load_references(paper_id):
+            library.add(Reference.from_dict(d))
+        _libraries[paper_id] = library
+        while len(_libraries) > MAX_LIBRARIES:
+            _libraries.popitem(last=False)
+        return library
+
+
+def import_file(paper_id: str, text: str, source: str = "",
+                store: PaperStore | None = None) -> tuple[int, int]:
+    """BibTeX/RIS 파일 내용을 라이브러리에 넣고 저장한다. (새 항목 수, 중복 수)를 반환한다."""
+    library = library_for(paper_id, store)
+    before = len(library)
+    touched, duplicates = library.ingest(parse(text, source))
+    if touched:
+        (store or get_store()).save_references(paper_id, {ref.label: ref.to_dict() for ref in touched})
+    return len(library) - before, duplicates
+
+
+def clear_library(paper_id: str, store: PaperStore | None = None) -> None:
+    (store or get_store()).delete_references(paper_id)
+    with _libraries_lock:
+        _libraries.pop(paper_id, None)
+
+
+# ── 프롬프트 / References 섹션 ──
+
+def is_reference_section(title: str) -> bool:
+    return title.strip().lower() in REFERENCE_SECTION_TITLES
+
+
+def _short_name(author: str) -> str:
+    """"Lewis, Patrick" / "Patrick Lewis" → "Lewis, P."."""
+    if "," in author:
+        last, first = (part.strip() for part in author.split(",", 1))
+    else:
+        *given, last = author.split() or [""]
+        first = " ".join(given)
+    initials = " ".join(f"{name[0]}." for name in first.replace("-", " ").split() if name)
+    return f"{last}, {initials}" if initials else last
+
+
+def format_entry(ref: Reference) -> str:
+    """APA에 가까운 한 줄 서지 정보."""
+    names = [_short_name(a) for a in ref.authors[:6]]
+    if len(ref.authors) > 6:
+        authors = ", ".join(names) + ", et al."
+    elif len(names) > 1:
+        authors = ", ".join(names[:-1]) + ", & " + names[-1]
+    else:
+        authors = "".join(names)
+    parts = [f"{authors or 'Anon.'} ({ref.year or 'n.d.'}). {ref.title.rstrip('.')}."]
+    if ref.venue:
+        parts.append(f"*{ref.venue}*.")
+    if ref.doi:
+        parts.append("https://doi.org/" + _DOI_PREFIX_RE.sub("", ref.doi.strip()))
+    elif ref.url:
+        parts.append(ref.url)
+    return " ".join(parts)
+
+
+def prompt_references(paper_id: str, query: str, k: int = 15) -> str:
+    """query와 관련된 문헌을 프롬프트용 목록으로. 라이브러리가 비었거나 관련 문헌이 없으면 "".
+
+    질의와 겹치는 용어가 없어도(예: 한국어 주제 + 영문 문헌) 라이브러리가 k건 이하이면 전부 넣는다.
+    """
+    library = library_for(paper_id)
+    refs = library.search(query, k)
+    if not refs and len(library) <= k:
+        refs = list(library.entries)
+    return "\n".join(f"- [{ref.label}] {ref.title} ({ref.venue or ref.entry_type})" for ref in refs)
+
+
+def bibliography(paper_id: str, texts: Iterable[str]) -> str:
+    """texts에서 실제로 인용된 [Author, Year] 표기에 해당하는 항목으로 References 본문을 만든다.
+
+    라이브러리가 비어 있으면 ""를 반환한다.
+    """
+    library = library_for(paper_id)
+    if not len(library):
+        return ""
+    labels = library.by_label()
+    cited: dict[str, Reference] = {}
+    for text in texts:
+        for group in re.findall(r"\[([^\[\]]+)\]", text):
+            for label in group.split(";"):
+                ref = labels.get(label.strip())
+                if ref is not None:
+                    cited[ref.label] = ref
+    if not cited:
+        return "_본문에서 라이브러리의 문헌을 인용하지 않았습니다._"
+    entries = sorted(cited.values(), key=lambda ref: (ref.label.lower(), ref.title.lower()))
+    return "\n\n".join(format_entry(ref) for ref in entries)
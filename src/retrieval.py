@@ -0,0 +1,231 @@
+"""논문 본문 검색 — 개요, 섹션 초안, 최종 논문을 BM25로 색인해 질문/피드백과 관련된 부분만 찾는다.
+
+문서(doc_key: "overview", "draft:<섹션 제목>", "final")는 Markdown 제목 단위로, 긴 부분은 다시
+문단 단위로 CHUNK_TOKENS 안팎의 조각으로 나뉜다. 색인은 문서별로 관리되므로 섹션 하나가 바뀌면
+그 섹션의 조각만 빼고 다시 넣는다 (역색인과 문서 빈도도 그만큼만 갱신).
+
+토큰은 영문/숫자는 소문자 단어, 한글은 음절 bigram이다. 형태소 분석기 없이도 조사가 붙은
+어절("모델의", "모델은")이 같은 bigram("모델")을 공유해 서로 맞는다.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.tokens import approx_tokens, count_tokens, fit_text
+
+if TYPE_CHECKING:
+    from src.paper_state import PaperState
+
+CHUNK_TOKENS = 300
+MAX_INDEXES = 16  # 프로세스에 보관하는 논문별 색인 수
+
+K1 = 1.5
+B = 0.75
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+_TERM_RE = re.compile(r"[a-z0-9]+|[가-힣]+")
+
+
+def terms(text: str) -> list[str]:
+    out: list[str] = []
+    for word in _TERM_RE.findall(text.lower()):
+        if word.isascii():
+            out.append(word)
+        elif len(word) == 1:
+            out.append(word)
+        else:
+            out.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return out
+
+
+@dataclass
+class Chunk:
+    doc_key: str
+    heading: str
+    text: str
+
+
+def doc_label(doc_key: str) -> str:
+    if doc_key == "overview":
+        return "개요"
+    if doc_key == "final":
+        return "최종 논문"
+    return "초안: " + doc_key.removeprefix("draft:")
+
+
+def chunk_document(text: str, doc_key: str) -> list[Chunk]:
+    """제목으로 나누고, CHUNK_TOKENS를 넘는 부분은 문단 경계에서 다시 나눈다."""
+    chunks: list[Chunk] = []
+    heading = ""
+    paragraphs: list[str] = []
+    size = 0
+
+    def flush() -> None:
+        nonlocal paragraphs, size
+        body = "\n\n".join(paragraphs).strip()
+        if body:
+            chunks.append(Chunk(doc_key, heading, body))
+        paragraphs, size = [], 0
+
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        first, _, rest = block.partition("\n")
+        match = _HEADING_RE.match(first)
+        if match:
+            flush()
+            heading = match.group(1)
+            block = rest.strip()
+            if not block:
+                continue
+        cost = approx_tokens(block)
+        if paragraphs and size + cost > CHUNK_TOKENS:
+            flush()
+        paragraphs.append(block)
+        size += cost
+    flush()
+    return chunks
+
+
+class DraftIndex:
+    """doc_key별로 갱신할 수 있는 BM25 역색인."""
+
+    def __init__(self) -> None:
+        self._docs: dict[str, tuple[str, list[int]]] = {}  # doc_key -> (색인한 원문, 조각 id)
+        self._chunks: dict[int, Chunk] = {}
+        self._lengths: dict[int, int] = {}
+        self._terms: dict[int, tuple[str, ...]] = {}
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {조각 id: 빈도}
+        self._total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def update(self, doc_key: str, text: str) -> bool:
+        """문서 하나를 (다시) 색인한다. 내용이 그대로면 아무것도 하지 않고 False를 반환한다."""
+        with self._lock:
+            current = self._docs.get(doc_key)
+            if current is not None and current[0] == text:
+                return False
+            self._remove_locked(doc_key)
+            ids = []
+            for chunk in chunk_document(text, doc_key) if text.strip() else []:
+                chunk_id = self._next_id
+                self._next_id += 1
+                counts = Counter(terms(f"{chunk.heading}\n{chunk.text}"))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[chunk_id] = tf
+                length = sum(counts.values())
+                self._chunks[chunk_id] = chunk
+                self._lengths[chunk_id] = length
+                self._terms[chunk_id] = tuple(counts)
+                self._total_length += length
+                ids.append(chunk_id)
+            self._docs[doc_key] = (text, ids)
+            return True
+
+    def remove(self, doc_key: str) -> None:
+        with self._lock:
+            self._remove_locked(doc_key)
+
+    def _remove_locked(self, doc_key: str) -> None:
+        entry = self._docs.pop(doc_key, None)
+        if entry is None:
+            return
+        for chunk_id in entry[1]:
+            del self._chunks[chunk_id]
+            self._total_length -= self._lengths.pop(chunk_id)
+            for term in self._terms.pop(chunk_id):
+                posting = self._postings[term]
+                del posting[chunk_id]
+                if not posting:
+                    del self._postings[term]
+
+    def sync(self, docs: dict[str, str]) -> int:
+        """docs(doc_key → 원문)에 맞춰 바뀐 문서만 다시 색인하고, 다시 색인한 문서 수를 반환한다."""
+        changed = sum(self.update(key, text) for key, text in docs.items())
+        for key in self._docs.keys() - docs.keys():
+            self.remove(key)
+            changed += 1
+        return changed
+
+    def search(self, query: str, k: int = 5, exclude: set[str] | None = None) -> list[Chunk]:
+        """BM25 점수가 높은 조각 k개. exclude에 든 doc_key의 조각은 뺀다."""
+        with self._lock:
+            n = len(self._chunks)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+            scores: dict[int, float] = {}
+            for term in set(terms(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    norm = K1 * (1 - B + B * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+            hits = []
+            for chunk_id in ranked:
+                chunk = self._chunks[chunk_id]
+                if exclude and chunk.doc_key in exclude:
+                    continue
+                hits.append(chunk)
+                if len(hits) == k:
+                    break
+            return hits
+
+
+def paper_documents(ps: PaperState) -> dict[str, str]:
+    docs = {"overview": ps.overview, "final": ps.final_paper}
+    for title, text in ps.draft_sections.items():
+        docs[f"draft:{title}"] = text
+    return docs
+
+
+_indexes: OrderedDict[str, DraftIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def index_for(ps: PaperState) -> DraftIndex:
+    """ps의 색인을 가져와 바뀐 문서만 갱신한다. 최근 MAX_INDEXES개 논문의 색인을 보관한다."""
+    with _indexes_lock:
+        index = _indexes.get(ps.paper_id)
+        if index is None:
+            index = _indexes[ps.paper_id] = DraftIndex()
+            while len(_indexes) > MAX_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(ps.paper_id)
+    index.sync(paper_documents(ps))
+    return index
+
+
+def related_context(ps: PaperState, query: str, budget: int, k: int = 5,
+                    exclude: set[str] | None = None, model: str = "") -> str:
+    """query와 관련된 본문 조각을 관련도 순으로 최대 k개, budget 토큰이 찰 때까지 출처와 함께 이어 붙인다.
+
+    관련된 부분이 없으면 ""를 반환한다.
+    """
+    parts: list[str] = []
+    for chunk in index_for(ps).search(query, k, exclude):
+        source = doc_label(chunk.doc_key) + (f" › {chunk.heading}" if chunk.heading else "")
+        part = f"[{source}]\n{chunk.text}"
+        cost = count_tokens(part, model)
+        if cost > budget:
+            if not parts:
+                parts.append(fit_text(part, budget, model))
+            break
+        parts.append(part)
+        budget -= cost
+    return "\n\n".join(parts)
@@ -0,0 +1,55 @@
+"""모델 라우팅 — 가벼운 요청은 빠르고 싼 모델로, 무거운 요청은 사용자가 고른 주 모델로 보낸다.
+
+요청은 (프롬프트 템플릿, 모드)로 구분한다. LLMConfig.fast_routes에 든 항목과 일치하면 빠른 모델
+(LLMConfig.fast_model, 비어 있으면 제공자의 기본 빠른 모델)을 쓴다. "template"은 모든 모드에,
+"template:mode"는 그 모드에만 적용된다. 프롬프트가 FAST_MAX_INPUT_TOKENS보다 길면 빠른 모델 대상이어도
+주 모델로 보낸다 — 긴 맥락을 요약·종합하는 일은 작은 모델이 약하다.
+
+템플릿 이름은 호출하는 쪽이 src.llm_client의 template 인자로, 모드는 llm_labels(mode=...)로 넘긴다.
+"""
+
+from __future__ import annotations
+
+# (route, 화면 표시 이름). 사이드바에서 빠른 모델로 보낼 요청을 고를 때 이 순서로 보여준다.
+ROUTE_LABELS: dict[str, str] = {
+    "autofill_topic": "주제 자동 채우기",
+    "topic_suggestion": "주제 제안",
+    "chat": "채팅 답변",
+    "chat_summary": "채팅 기록 요약",
+    "overview": "개요 생성",
+    "structure": "구조 제안",
+    "expert_workshop": "Expert 워크숍 질문",
+    "refine": "섹션 수정 반영",
+    "draft_section:quick": "섹션 초안 (Quick)",
+    "draft_section:standard": "섹션 초안 (Standard)",
+    "draft_section:expert": "섹션 초안 (Expert)",
+    "finalize": "최종 통합",
+    "finalize_section": "최종 통합 - 섹션 다듬기",
+    "finalize_stitch": "최종 통합 - 초록/연결",
+}
+
+# 기본으로 빠른 모델을 쓰는 요청: 한두 문단짜리 생성과 대화, 그리고 Quick 모드의 섹션 초안.
+DEFAULT_FAST_ROUTES: tuple[str, ...] = (
+    "autofill_topic",
+    "topic_suggestion",
+    "chat",
+    "chat_summary",
+    "draft_section:quick",
+)
+
+# 빠른 모델로 보낼 프롬프트의 최대 길이(토큰, 근사).
+FAST_MAX_INPUT_TOKENS = 6_000
+
+FAST, MAIN = "fast", "main"
+
+
+def route_tier(fast_routes: tuple[str, ...], template: str, mode: str | None,
+               prompt_tokens: int | None = None) -> str:
+    """요청을 보낼 모델 등급(FAST / MAIN). prompt_tokens를 모르면 None으로 주고 길이 조건은 건너뛴다."""
+    if not template or not fast_routes:
+        return MAIN
+    if template not in fast_routes and f"{template}:{mode}" not in fast_routes:
+        return MAIN
+    if prompt_tokens is not None and prompt_tokens > FAST_MAX_INPUT_TOKENS:
+        return MAIN
+    return FAST
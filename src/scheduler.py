@@ -0,0 +1,294 @@
+"""Provider 호출 스케줄러 — 재시도/백오프, 요청·토큰 속도 제한, 회로 차단기."""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import hashlib
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# provider별 기본 분당 요청 수(RPM)와 분당 토큰 수(TPM). None이면 제한하지 않는다.
+DEFAULT_LIMITS: dict[str, tuple[int | None, int | None]] = {
+    "OpenAI": (500, 200_000),
+    "Anthropic": (50, 40_000),
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(RuntimeError):
+    """회로 차단기가 열려 있어 호출을 보내지 않았을 때 발생한다."""
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째(0부터) 재시도 전 대기 시간 — 지수 백오프 + full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def is_retryable(exc: Exception) -> bool:
+    """일시적인 오류(429, 5xx, 타임아웃, 연결 끊김)인지 판단한다."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # OpenAI/Anthropic SDK의 APIConnectionError(및 하위 APITimeoutError)
+    return any(cls.__name__ == "APIConnectionError" for cls in type(exc).__mro__)
+
+
+def retry_after(exc: Exception) -> float | None:
+    """오류 응답의 Retry-After(-ms) 헤더를 초 단위로 읽는다."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # 숫자도 HTTP 날짜도 아닌 값 — 헤더를 무시하고 기본 백오프를 쓴다
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class TokenBucket:
+    """분당 per_minute 만큼 채워지는 토큰 버킷. acquire는 여유가 생길 때까지 대기한다."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_take(self, amount: float) -> float:
+        """amount만큼 꺼내고 0을 반환한다. 부족하면 더 기다려야 할 시간(초)을 반환한다."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> None:
+        while wait := self._try_take(amount):
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1.0) -> None:
+        while wait := self._try_take(amount):
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold에 도달하면 reset_timeout 동안 호출을 차단한다.
+
+    시간이 지나면 한 번의 시험 호출(half-open)만 허용하고, 성공하면 다시 닫힌다. 시험 호출의 결과가 나오기
+    전의 다른 호출은 CircuitOpenError로 바로 실패한다. 결과를 알리지 못한 시험 호출(취소 등)은
+    reset_timeout이 지나면 없었던 것으로 보고 다음 호출에 시험을 다시 맡긴다.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_at: float | None = None  # half-open 시험 호출을 허용한 시각
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            remaining = self.reset_timeout - (now - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(f"provider 호출이 연속으로 실패해 {remaining:.0f}초 동안 일시 중단되었습니다.")
+            if self._trial_at is not None and now - self._trial_at < self.reset_timeout:
+                raise CircuitOpenError("provider 호출이 연속으로 실패해 일시 중단되었습니다 (복구 확인 중).")
+            self._trial_at = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                # half-open 중의 실패면 곧바로 다시 열린다.
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+
+    def release(self) -> None:
+        """시험 호출이 provider 장애와 무관한 이유(요청 오류, 429)로 끝났을 때 다음 호출에 시험을 넘긴다."""
+        with self._lock:
+            self._trial_at = None
+
+
+class ProviderScheduler:
+    """하나의 provider/API 키에 대한 호출을 속도 제한, 재시도, 회로 차단기로 감싼다."""
+
+    def __init__(
+        self,
+        rpm: int | None = None,
+        tpm: int | None = None,
+        policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+    def _acquire(self, est_tokens: int) -> None:
+        self.breaker.before_call()
+        if self.requests:
+            self.requests.acquire()
+        if self.tokens:
+            self.tokens.acquire(est_tokens)
+
+    async def _acquire_async(self, est_tokens: int) -> None:
+        self.breaker.before_call()
+        if self.requests:
+            await self.requests.acquire_async()
+        if self.tokens:
+            await self.tokens.acquire_async(est_tokens)
+
+    def _on_failure(self, exc: Exception, attempt: int, on_retry: Callable[[], None] | None) -> float:
+        """재시도할 수 있으면 대기할 시간(초)을 반환하고, 아니면 예외를 다시 발생시킨다."""
+        if not is_retryable(exc):
+            self.breaker.release()
+            raise exc
+        # 429는 할당량 초과일 뿐 provider 장애가 아니므로 회로 차단기에 반영하지 않는다.
+        if getattr(exc, "status_code", None) != 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        if attempt + 1 >= self.policy.max_attempts:
+            raise exc
+        if on_retry:
+            on_retry()
+        delay = retry_after(exc)
+        if delay is None:
+            delay = self.policy.backoff(attempt)
+        return min(delay, self.policy.max_delay)
+
+    def call(self, fn: Callable[[], T], est_tokens: int = 0, on_retry: Callable[[], None] | None = None) -> T:
+        """fn()을 실행한다. 일시적 오류이면 백오프 후 재시도하고, 최종 실패 시 예외를 전달한다."""
+        for attempt in range(self.policy.max_attempts):
+            self._acquire(est_tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                time.sleep(self._on_failure(e, attempt, on_retry))
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    def stream(self, fn: Callable[[], Iterator[T]], est_tokens: int = 0,
+               on_retry: Callable[[], None] | None = None) -> Iterator[T]:
+        """스트리밍 버전. 첫 조각을 받기 전의 실패만 재시도한다 (이미 출력한 내용은 되돌릴 수 없으므로)."""
+        for attempt in range(self.policy.max_attempts):
+            self._acquire(est_tokens)
+            stream = fn()
+            try:
+                first = next(stream)
+            except StopIteration:
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                time.sleep(self._on_failure(e, attempt, on_retry))
+                continue
+
+            self.breaker.record_success()
+            yield first
+            yield from stream
+            return
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], est_tokens: int = 0,
+                    on_retry: Callable[[], None] | None = None) -> T:
+        """call의 asyncio 버전. 대기 중에도 이벤트 루프를 막지 않는다."""
+        for attempt in range(self.policy.max_attempts):
+            await self._acquire_async(est_tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                await asyncio.sleep(self._on_failure(e, attempt, on_retry))
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    async def astream(self, fn: Callable[[], AsyncIterator[T]], est_tokens: int = 0,
+                      on_retry: Callable[[], None] | None = None) -> AsyncIterator[T]:
+        """stream의 asyncio 버전."""
+        for attempt in range(self.policy.max_attempts):
+            await self._acquire_async(est_tokens)
+            stream = fn()
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                await asyncio.sleep(self._on_failure(e, attempt, on_retry))
+                continue
+
+            self.breaker.record_success()
+            yield first
+            async for item in stream:
+                yield item
+            return
+
+
+_schedulers: dict[tuple[str, str, str], ProviderScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str, api_key: str, scope: str = "") -> ProviderScheduler:
+    """provider/API 키별 스케줄러를 가져온다. 속도 제한은 키(조직) 단위로 적용되므로 키별로 공유한다.
+
+    scope는 키로 구분되지 않는 제공자(자체 호스팅 서버)에서 서버 묶음을 나누는 값이다. 서로 다른 서버의
+    장애가 같은 서킷 브레이커를 열지 않도록 한다.
+    """
+    key = (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest(), scope)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            rpm, tpm = DEFAULT_LIMITS.get(provider, (None, None))
+            scheduler = ProviderScheduler(rpm=rpm, tpm=tpm)
+            _schedulers[key] = scheduler
+        return scheduler
@@ -0,0 +1,145 @@
+"""Streamlit 어댑터 — st.session_state / st.query_params를 코어(Session, llm_client)에 연결한다.
+
+src 아래에서 streamlit을 import하는 유일한 모듈이다. 화면 컴포넌트는 이 모듈을 쓰고,
+배치 실행기·워커·테스트는 Streamlit 없이 코어 모듈(src.paper_state, src.llm_client)을 직접 쓴다.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+
+import streamlit as st
+
+from src.config import LLMConfig
+from src.llm_client import invoke_llm, iter_llm, llm_labels
+from src.paper_state import Mode, PaperState, Session, Stage
+from src.telemetry import telemetry
+from src.warmup import prewarm
+
+
+def get_session() -> Session:
+    return Session(st.session_state, st.query_params)
+
+
+def get_owner() -> str:
+    """논문 소유자 — URL의 ?user= 값 (없으면 "default")."""
+    return get_session().owner
+
+
+def get_paper_state() -> PaperState:
+    """현재 세션의 논문. 새 세션이면 URL의 ?paper= 값으로 저장소에서 복원한다."""
+    return get_session().paper
+
+
+def open_paper(paper_id: str) -> None:
+    get_session().open_paper(paper_id)
+
+
+def autosave_paper_state() -> None:
+    """바뀐 필드만 저장소에 저장한다. 매 rerun 끝에 호출된다."""
+    get_session().autosave()
+
+
+def get_mode() -> Mode:
+    return get_paper_state().mode
+
+
+def set_stage(stage: Stage) -> None:
+    get_paper_state().current_stage = stage
+
+
+def add_chat(role: str, content: str) -> None:
+    get_paper_state().add_chat(role, content)
+
+
+def record_change(doc_key: str, old: str, new: str, label: str) -> None:
+    get_paper_state().record_change(doc_key, old, new, label)
+
+
+# ── LLM ──
+
+def get_llm_config() -> LLMConfig:
+    """세션에 저장된 LLM 설정 (불변 객체라 워커 스레드에 그대로 넘겨도 된다)."""
+    return get_session().llm_config
+
+
+def set_llm_config(cfg: LLMConfig) -> None:
+    """설정을 세션에 저장하고, 키가 있으면 SDK와 클라이언트를 백그라운드에서 예열한다."""
+    get_session().llm_config = cfg
+    prewarm(cfg)
+
+
+def is_llm_configured() -> bool:
+    """LLM API 키가 설정되어 있는지 확인한다."""
+    return get_llm_config().is_configured
+
+
+def session_telemetry() -> tuple[list[dict], list[dict], dict]:
+    """이 세션의 (단계별 지연 시간 통계, 모델별 호출 통계, 누적 토큰/비용)."""
+    session_id = get_session().session_id
+    return telemetry.stage_stats(session_id), telemetry.model_stats(session_id), telemetry.totals(session_id)
+
+
+def session_llm_labels() -> AbstractContextManager[None]:
+    """블록 안의 LLM 호출에 세션, 논문, 현재 단계, 모드 라벨을 붙인다 (src.telemetry)."""
+    session = get_session()
+    ps = session.paper
+    return llm_labels(session=session.session_id, paper=ps.paper_id, stage=ps.current_stage, mode=ps.mode)
+
+
+def call_llm(system_prompt: str, user_prompt: str, use_cache: bool = True, template: str = "",
+             schema: dict | None = None) -> str | None:
+    """세션에 저장된 설정으로 LLM을 호출한다. template은 계측에 남길 프롬프트 템플릿 이름이고,
+    schema를 주면 구조화 출력(JSON)을 요청한다 (src.llm_client.invoke_llm).
+
+    API 키가 설정되지 않았으면 None을 반환하고, 실패하면 오류를 표시한 뒤 None을 반환한다.
+    """
+    cfg = get_llm_config()
+    if not cfg.is_configured:
+        return None
+
+    try:
+        with session_llm_labels():
+            return invoke_llm(cfg, system_prompt, user_prompt, use_cache, template, schema)
+    except Exception as e:
+        st.error(f"LLM API 호출 실패: {e}")
+        return None
+
+
+class LLMStream:
+    """stream_llm의 반환값. st.write_stream에 그대로 넘기고, 끝난 뒤 completed로 성공 여부를 확인한다.
+
+    도중에 실패하면 그때까지 받은 조각만 나오므로, 결과를 저장하는 쪽은 completed일 때만 반영해야 한다.
+    """
+
+    def __init__(self, cfg: LLMConfig, system_prompt: str, user_prompt: str, use_cache: bool, template: str,
+                 schema: dict | None) -> None:
+        self._args = (cfg, system_prompt, user_prompt, use_cache, template, schema)
+        self.completed = False
+
+    def __iter__(self) -> Iterator[str]:
+        cfg = self._args[0]
+        if not cfg.is_configured:
+            return
+        try:
+            with session_llm_labels():
+                yield from iter_llm(*self._args)
+        except Exception as e:
+            st.error(f"LLM API 호출 실패: {e}")
+            return
+        self.completed = True
+
+
+def stream_llm(system_prompt: str, user_prompt: str, use_cache: bool = True, template: str = "",
+               schema: dict | None = None) -> LLMStream:
+    """call_llm의 스트리밍 버전. st.write_stream에 그대로 넘겨 사용한다.
+
+    API 키가 없으면 아무것도 yield하지 않고, 실패 시 오류를 표시한 뒤 중단한다 (completed는 False).
+
+        stream = stream_llm(system_prompt, prompt, template="overview")
+        result = st.write_stream(stream)
+        if result and stream.completed:
+            ...
+    """
+    return LLMStream(get_llm_config(), system_prompt, user_prompt, use_cache, template, schema)
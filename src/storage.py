@@ -0,0 +1,183 @@
+"""PaperState 영구 저장소 (SQLite).
+
+논문 하나는 papers 테이블의 한 행과 최상위 필드별 행(paper_fields)으로 저장되고,
+dict 필드(draft_sections 등)는 항목마다 한 행(paper_entries)으로 나누어 저장된다.
+마지막으로 저장한 값을 메모리에 기억해 두고 바뀐 필드/항목만 다시 쓰므로,
+매 rerun마다 자동 저장해도 수백 KB짜리 초안 전체를 다시 직렬화하지 않는다.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.environ.get("PAPER_DB", os.path.join(".data", "papers.sqlite"))
+
+_MISSING = object()
+
+
+class PaperStore:
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "  paper_id TEXT PRIMARY KEY, owner TEXT NOT NULL, title TEXT NOT NULL, updated REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS papers_owner ON papers (owner, updated);"
+            "CREATE TABLE IF NOT EXISTS paper_fields ("
+            "  paper_id TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL,"
+            "  PRIMARY KEY (paper_id, name));"
+            "CREATE TABLE IF NOT EXISTS paper_entries ("
+            "  paper_id TEXT NOT NULL, name TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            "  PRIMARY KEY (paper_id, name, key));"
+            "CREATE TABLE IF NOT EXISTS paper_references ("
+            "  paper_id TEXT NOT NULL, ref_id TEXT NOT NULL, value TEXT NOT NULL,"
+            "  PRIMARY KEY (paper_id, ref_id));"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._saved: dict[str, dict] = {}  # paper_id -> 마지막으로 저장(또는 로드)한 필드 값
+
+    def save(self, paper_id: str, owner: str, state: dict) -> int:
+        """바뀐 필드/항목만 저장하고, 기록한 행 수를 반환한다.
+
+        소유자는 처음 저장할 때 정해지고 바뀌지 않는다. 다른 사용자의 논문이면 PermissionError.
+        """
+        with self._lock:
+            saved = self._saved.get(paper_id)
+            if saved is None:
+                saved = self._load_locked(paper_id) or {}
+                self._saved[paper_id] = saved
+
+            fields: list[tuple] = []
+            entries: list[tuple] = []
+            removed: list[tuple] = []
+            for name, value in state.items():
+                prev = saved.get(name, _MISSING)
+                if isinstance(value, dict):
+                    if not isinstance(prev, dict):
+                        fields.append((paper_id, name, "{}"))
+                        prev = {}
+                    for key, item in value.items():
+                        if prev.get(key, _MISSING) != item:
+                            entries.append((paper_id, name, key, json.dumps(item, ensure_ascii=False)))
+                    removed.extend((paper_id, name, key) for key in prev.keys() - value.keys())
+                    saved[name] = dict(value)
+                elif prev != value:
+                    fields.append((paper_id, name, json.dumps(value, ensure_ascii=False)))
+                    saved[name] = value
+
+            written = len(fields) + len(entries) + len(removed)
+            if not written:
+                return 0
+            current = self._owner_locked(paper_id)
+            if current is not None and current != owner:
+                self._saved.pop(paper_id, None)  # 기록하지 못한 값이 "마지막 저장 값"으로 남지 않게 한다
+                raise PermissionError(f"논문 {paper_id!r}은(는) 다른 사용자({current})의 논문입니다.")
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO paper_fields (paper_id, name, value) VALUES (?, ?, ?)", fields
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO paper_entries (paper_id, name, key, value) VALUES (?, ?, ?, ?)", entries
+            )
+            self._db.executemany(
+                "DELETE FROM paper_entries WHERE paper_id = ? AND name = ? AND key = ?", removed
+            )
+            self._db.execute(
+                "INSERT INTO papers (paper_id, owner, title, updated) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(paper_id) DO UPDATE SET title = excluded.title, updated = excluded.updated",
+                (paper_id, owner, state.get("topic", ""), time.time()),
+            )
+            self._db.commit()
+            return written
+
+    def load(self, paper_id: str, owner: str | None = None) -> dict | None:
+        """저장된 논문 상태. 없거나, owner를 주었는데 다른 사용자의 논문이면 None."""
+        with self._lock:
+            if owner is not None and self._owner_locked(paper_id) not in (None, owner):
+                return None
+            state = self._load_locked(paper_id)
+            if state is None:
+                return None
+            # 호출자가 반환값을 수정해도 "마지막 저장 값"이 바뀌지 않도록 사본을 돌려준다.
+            self._saved[paper_id] = state
+            return copy.deepcopy(state)
+
+    def owner_of(self, paper_id: str) -> str | None:
+        """논문의 소유자. 저장된 적 없는 논문이면 None."""
+        with self._lock:
+            return self._owner_locked(paper_id)
+
+    def _owner_locked(self, paper_id: str) -> str | None:
+        row = self._db.execute("SELECT owner FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+        return row[0] if row else None
+
+    def _load_locked(self, paper_id: str) -> dict | None:
+        rows = self._db.execute("SELECT name, value FROM paper_fields WHERE paper_id = ?", (paper_id,)).fetchall()
+        if not rows:
+            return None
+        state = {name: json.loads(value) for name, value in rows}
+        for name, key, value in self._db.execute(
+            "SELECT name, key, value FROM paper_entries WHERE paper_id = ? ORDER BY rowid", (paper_id,)
+        ):
+            state.setdefault(name, {})[key] = json.loads(value)
+        return state
+
+    def list_papers(self, owner: str) -> list[dict]:
+        """owner의 논문 목록을 최근 수정 순으로 반환한다."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT paper_id, title, updated FROM papers WHERE owner = ? ORDER BY updated DESC", (owner,)
+            ).fetchall()
+        return [{"paper_id": pid, "title": title, "updated": updated} for pid, title, updated in rows]
+
+    def save_references(self, paper_id: str, refs: dict[str, dict]) -> None:
+        """참고문헌 항목(ref_id → dict)을 추가하거나 덮어쓴다. 논문 상태와 별도 테이블에 둔다."""
+        rows = [(paper_id, ref_id, json.dumps(ref, ensure_ascii=False)) for ref_id, ref in refs.items()]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO paper_references (paper_id, ref_id, value) VALUES (?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def load_references(self, paper_id: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT value FROM paper_references WHERE paper_id = ? ORDER BY rowid", (paper_id,)
+            ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def delete_references(self, paper_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM paper_references WHERE paper_id = ?", (paper_id,))
+            self._db.commit()
+
+    def delete(self, paper_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM paper_references WHERE paper_id = ?", (paper_id,))
+            self._db.execute("DELETE FROM paper_entries WHERE paper_id = ?", (paper_id,))
+            self._db.execute("DELETE FROM paper_fields WHERE paper_id = ?", (paper_id,))
+            self._db.execute("DELETE FROM papers WHERE paper_id = ?", (paper_id,))
+            self._db.commit()
+            self._saved.pop(paper_id, None)
+
+
+_store: PaperStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> PaperStore:
+    """프로세스 전체에서 공유하는 저장소를 가져온다 (환경 변수 PAPER_DB로 경로 변경)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PaperStore()
+        return _store
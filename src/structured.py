@@ -0,0 +1,157 @@
+"""구조화 출력 — LLM 응답의 JSON을 관대하게, 조각 단위로 파싱한다.
+
+제공자가 지원하면 src.llm_client가 JSON 스키마를 함께 보내(OpenAI response_format, Anthropic 도구 호출)
+응답이 처음부터 스키마에 맞는 JSON으로 온다. 그래도 지원하지 않는 서버나 프롬프트만으로 JSON을 받는
+경우가 있으므로 파서는 다음을 견딘다.
+
+- JSON 앞뒤의 설명 문장과 코드 펜스 (처음 나오는 '{' 또는 '['부터 그 값이 닫힐 때까지만 읽는다)
+- 닫는 괄호 앞의 불필요한 쉼표
+- 중간에 끊긴 응답 (max_tokens, 스트리밍 중): 열린 문자열과 괄호를 닫고, 끝나지 않은 키/숫자는 버린다
+
+JsonStream은 스트리밍 조각을 받을 때마다 스캔 상태를 이어 가며 "지금까지 받은 부분"의 값을 돌려주므로
+생성 중에도 섹션 목록 같은 결과를 미리 보여줄 수 있다.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+_CLOSERS = {"{": "}", "[": "]"}
+_MAX_ESCAPE = 6  # 가장 긴 이스케이프 시퀀스(\uXXXX)의 길이
+
+
+class JsonStream:
+    """JSON 값 하나를 조각 단위로 읽는다. feed()는 그때까지의 (부분) 값을 돌려준다 (아직 없으면 None)."""
+
+    def __init__(self, start: str = "{[") -> None:
+        self._start = start  # 값의 시작으로 인정할 문자
+        self._out: list[str] = []  # 값 부분만 (불필요한 쉼표는 뺀) 텍스트
+        self._stack: list[list[str]] = []  # 열린 괄호마다 [닫는 문자, 객체면 "key"/"value" 상태]
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._escape = False
+        self._pending_comma = False
+        self._safe: tuple[int, str] | None = None  # (잘라도 되는 위치, 그 위치에서 닫을 문자열)
+        self.done = False
+        self.value: Any = None
+
+    def feed(self, delta: str) -> Any:
+        if self.done:
+            return self.value
+        for ch in delta:
+            self._scan(ch)
+            if self.done:
+                break
+        if self._out:
+            snapshot = self._snapshot()
+            if snapshot is not _INVALID:
+                self.value = snapshot
+        return self.value
+
+    def _mark_safe(self) -> None:
+        self._safe = (len(self._out), "".join(c[0] for c in reversed(self._stack)))
+
+    def _scan(self, ch: str) -> None:
+        out = self._out
+        if not self._stack:
+            if ch in self._start:
+                out.append(ch)
+                self._stack.append([_CLOSERS[ch], "key"])
+                self._mark_safe()
+            return
+
+        if self._in_string:
+            out.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if not self._string_is_key:
+                    self._mark_safe()
+            return
+
+        if ch.isspace():
+            return
+        if ch == ",":
+            self._pending_comma = True
+            return
+        top = self._stack[-1]
+        if ch in "}]":
+            # 닫는 괄호 바로 앞의 쉼표는 버린다
+            self._pending_comma = False
+            out.append(ch)
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+            self._mark_safe()
+            return
+        if self._pending_comma:
+            self._pending_comma = False
+            self._mark_safe()
+            out.append(",")
+            if top[0] == "}":
+                top[1] = "key"
+        if ch == ":":
+            top[1] = "value"
+            out.append(ch)
+        elif ch == '"':
+            self._in_string = True
+            self._string_is_key = top[0] == "}" and top[1] == "key"
+            self._string_start = len(out)
+            out.append(ch)
+        elif ch in _CLOSERS:
+            out.append(ch)
+            self._stack.append([_CLOSERS[ch], "key"])
+            self._mark_safe()
+        else:
+            out.append(ch)
+
+    def _snapshot(self) -> Any:
+        text = "".join(self._out)
+        if self.done:
+            return _loads(text)
+        closers = "".join(c[0] for c in reversed(self._stack))
+        if not self._in_string:
+            value = _loads(text + closers)
+            if value is not _INVALID:
+                return value
+        elif not self._string_is_key:
+            # 값 문자열이 열려 있으면 닫아 지금까지의 내용을 보여준다. 끝에 끊긴 이스케이프(\, \u00)가
+            # 있으면 닫을 수 없으므로 몇 글자씩 덜어 보며 다시 시도한다.
+            for trim in range(_MAX_ESCAPE):
+                if len(text) - trim <= self._string_start:
+                    break
+                value = _loads(text[:len(text) - trim] + '"' + closers)
+                if value is not _INVALID:
+                    return value
+        if self._safe is None:
+            return _INVALID
+        pos, closers = self._safe
+        return _loads("".join(self._out[:pos]) + closers)
+
+
+_INVALID = object()
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
+
+
+def parse_json(text: str, start: str = "{[", complete: bool = False) -> Any:
+    """text 안의 첫 JSON 값을 관대하게 파싱한다. 찾지 못하면 None.
+
+    start는 값의 시작으로 인정할 문자다. 객체를 기대하면 "{"로 주어 앞 문장의 대괄호를 건너뛴다.
+    complete=True면 값이 끝까지 닫혔을 때만 돌려준다 (max_tokens 등으로 끊긴 응답은 None).
+    """
+    stream = JsonStream(start)
+    stream.feed(text)
+    if complete and not stream.done:
+        return None
+    return stream.value
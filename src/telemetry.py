@@ -0,0 +1,206 @@
+"""LLM 호출 계측 — 호출마다 지연 시간, 토큰, 비용을 구조화된 레코드로 남긴다.
+
+src.llm_client의 계측 훅으로 등록되어 모든 호출(화면, 배치, 워커)의 이벤트를 받는다.
+레코드는 메모리 링 버퍼(최근 capacity건)에 쌓이고, 환경 변수 LLM_TELEMETRY에 파일 경로를 주면
+그 파일에도 추가된다 — 확장자가 .jsonl이면 한 줄에 JSON 하나, 그 밖(.sqlite, .db)이면 SQLite llm_calls 테이블.
+단계(stage), 모드, 세션 같은 라벨은 호출하는 쪽이 src.llm_client.llm_labels로 붙인다.
+
+세션별 누적 토큰/비용은 링 버퍼와 별도로 합산하므로 오래된 레코드가 밀려나도 줄지 않는다.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.llm_client import add_llm_hook
+
+# 모델 이름 접두사 → 100만 토큰당 USD 가격 (입력, 출력, 캐시 읽기, 캐시 쓰기).
+# 긴 접두사가 먼저 오도록 정렬되어 있어야 한다. 공개 가격표 기준의 근사치이며 비용 표시에만 쓴다.
+MODEL_PRICES: list[tuple[str, tuple[float, float, float, float]]] = [
+    ("gpt-5", (1.25, 10.0, 0.125, 1.25)),
+    ("gpt-4.1-mini", (0.40, 1.60, 0.10, 0.40)),
+    ("gpt-4.1", (2.00, 8.00, 0.50, 2.00)),
+    ("gpt-4o-mini", (0.15, 0.60, 0.075, 0.15)),
+    ("gpt-4o", (2.50, 10.0, 1.25, 2.50)),
+    ("o3", (2.00, 8.00, 0.50, 2.00)),
+    ("o4-mini", (1.10, 4.40, 0.275, 1.10)),
+    ("claude-opus", (5.00, 25.0, 0.50, 6.25)),
+    ("claude-sonnet", (3.00, 15.0, 0.30, 3.75)),
+    ("claude-haiku", (1.00, 5.00, 0.10, 1.25)),
+]
+
+# 링 버퍼 크기와 누적 합계를 보관할 최대 세션 수.
+DEFAULT_CAPACITY = 2_000
+MAX_SESSIONS = 256
+
+# 레코드에 남기는 이벤트 키 (SQLite 열 순서이기도 하다).
+FIELDS = (
+    "ts", "session", "paper", "stage", "mode", "template", "provider", "model", "tier", "stream",
+    "input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens",
+    "ttft", "latency", "cache_hit", "retries", "cancelled", "error", "cost",
+)
+
+
+def model_prices(model: str) -> tuple[float, float, float, float] | None:
+    for prefix, prices in MODEL_PRICES:
+        if model.startswith(prefix):
+            return prices
+    return None
+
+
+def call_cost(event: dict) -> float:
+    """호출 하나의 비용(USD). 응답 캐시 적중, 실패, 가격을 모르는 모델은 0."""
+    prices = model_prices(event.get("model", ""))
+    if prices is None or event.get("cache_hit") or event.get("error"):
+        return 0.0
+    input_price, output_price, read_price, write_price = prices
+    read, write = event.get("cache_read_tokens", 0), event.get("cache_write_tokens", 0)
+    uncached = max(0, event.get("input_tokens", 0) - read - write)
+    return (uncached * input_price + read * read_price + write * write_price
+            + event.get("output_tokens", 0) * output_price) / 1_000_000
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """nearest-rank 백분위수 (q는 0~100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class JsonlSink:
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+
+class SqliteSink:
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS llm_calls ({', '.join(FIELDS)})")
+        # 이전 버전이 만든 테이블에는 나중에 추가된 열이 없다.
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(llm_calls)")}
+        for name in FIELDS:
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE llm_calls ADD COLUMN {name}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls (ts)")
+        self._db.commit()
+        self._insert = f"INSERT INTO llm_calls ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})"
+
+    def write(self, record: dict) -> None:
+        self._db.execute(self._insert, [record[f] for f in FIELDS])
+        self._db.commit()
+
+
+def open_sink(path: str) -> JsonlSink | SqliteSink:
+    return JsonlSink(path) if path.endswith(".jsonl") else SqliteSink(path)
+
+
+class Telemetry:
+    """호출 레코드의 링 버퍼 + 세션별 누적 합계 + 선택적 파일 기록. 여러 스레드에서 사용해도 안전하다."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, sink_path: str | None = None) -> None:
+        self._records: deque[dict] = deque(maxlen=capacity)
+        self._totals: OrderedDict[str, dict] = OrderedDict()
+        self._sink = open_sink(sink_path) if sink_path else None
+        self._lock = threading.Lock()
+
+    def record(self, event: dict) -> None:
+        """계측 훅 — llm_client 이벤트를 레코드로 바꿔 저장한다."""
+        record = {f: event.get(f) for f in FIELDS}
+        record["ts"] = time.time()
+        record["cost"] = call_cost(event)
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.setdefault(record["session"] or "", {
+                "calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0,
+                "cache_read_tokens": 0, "cache_write_tokens": 0, "cost": 0.0,
+            })
+            self._totals.move_to_end(record["session"] or "")
+            while len(self._totals) > MAX_SESSIONS:
+                self._totals.popitem(last=False)
+            totals["calls"] += 1
+            totals["errors"] += bool(record["error"])
+            if not record["cache_hit"]:
+                for key in ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens"):
+                    totals[key] += record[key] or 0
+            totals["cost"] += record["cost"]
+            if self._sink is not None:
+                try:
+                    self._sink.write(record)
+                except Exception:
+                    pass
+
+    def records(self, session: str | None = None) -> list[dict]:
+        with self._lock:
+            return [r for r in self._records if session is None or r["session"] == session]
+
+    def totals(self, session: str = "") -> dict:
+        with self._lock:
+            return dict(self._totals.get(session, {}))
+
+    def stage_stats(self, session: str | None = None) -> list[dict]:
+        """단계별 호출 수, 지연 시간 p50/p95, 첫 토큰 p50, 실패 수, 비용 (링 버퍼에 남은 호출 기준)."""
+        by_stage: dict[str, list[dict]] = {}
+        for r in self.records(session):
+            by_stage.setdefault(r["stage"] or "-", []).append(r)
+        stats = []
+        for stage, records in by_stage.items():
+            latencies = [r["latency"] for r in records if r["latency"] is not None and not r["cache_hit"]]
+            ttfts = [r["ttft"] for r in records if r["ttft"] is not None and not r["cache_hit"]]
+            stats.append({
+                "stage": stage,
+                "calls": len(records),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "ttft_p50": percentile(ttfts, 50),
+                "errors": sum(1 for r in records if r["error"]),
+                "cost": sum(r["cost"] for r in records),
+            })
+        return stats
+
+    def model_stats(self, session: str | None = None) -> list[dict]:
+        """모델별 호출 수, 등급(src.routing), 입력/출력 토큰, 지연 시간 p50, 비용 (링 버퍼에 남은 호출 기준)."""
+        by_model: dict[str, list[dict]] = {}
+        for r in self.records(session):
+            by_model.setdefault(r["model"] or "-", []).append(r)
+        stats = []
+        for model, records in by_model.items():
+            fresh = [r for r in records if not r["cache_hit"]]
+            stats.append({
+                "model": model,
+                "tier": next((r["tier"] for r in records if r["tier"]), None),
+                "calls": len(records),
+                "input_tokens": sum(r["input_tokens"] or 0 for r in fresh),
+                "output_tokens": sum(r["output_tokens"] or 0 for r in fresh),
+                "p50": percentile([r["latency"] for r in fresh if r["latency"] is not None], 50),
+                "cost": sum(r["cost"] for r in records),
+            })
+        return sorted(stats, key=lambda s: s["calls"], reverse=True)
+
+    def clear(self, session: str | None = None) -> None:
+        with self._lock:
+            if session is None:
+                self._records.clear()
+                self._totals.clear()
+                return
+            kept = [r for r in self._records if r["session"] != session]
+            self._records.clear()
+            self._records.extend(kept)
+            self._totals.pop(session, None)
+
+
+telemetry = Telemetry(sink_path=os.environ.get("LLM_TELEMETRY") or None)
+add_llm_hook(telemetry.record)
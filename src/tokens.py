@@ -0,0 +1,106 @@
+"""토큰 수 추정과 프롬프트 예산 관리.
+
+OpenAI 모델은 tiktoken이 설치되어 있으면 실제 토크나이저로 세고,
+그 외(Anthropic, tiktoken 미설치)에는 문자 종류별 근사치를 사용한다.
+근사치는 한도를 넘지 않도록 약간 크게 잡는다.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+# 모델 이름 접두사 → (컨텍스트 윈도우, 최대 출력 토큰). 긴 접두사가 먼저 오도록 정렬되어 있어야 한다.
+MODEL_LIMITS: list[tuple[str, tuple[int, int]]] = [
+    ("gpt-5", (400_000, 128_000)),
+    ("gpt-4.1", (1_047_576, 32_768)),
+    ("gpt-4o", (128_000, 16_384)),
+    ("o3", (200_000, 100_000)),
+    ("o4-mini", (200_000, 100_000)),
+    ("claude-opus", (200_000, 32_000)),
+    ("claude-sonnet", (200_000, 64_000)),
+    ("claude-haiku", (200_000, 64_000)),
+]
+DEFAULT_LIMITS = (128_000, 8_192)
+
+# 스트리밍이 아닌 호출의 출력 상한. Anthropic SDK는 10분 이상 걸릴 수 있는 비스트리밍 요청을 거부한다.
+NONSTREAMING_OUTPUT_CAP = 16_384
+
+# 초안 프롬프트에 넣는 배경 정보(개요, 전체 구조)의 기본 토큰 예산.
+DEFAULT_CONTEXT_BUDGET = 2_000
+
+# 응답을 위해 최소한 남겨 둘 출력 토큰 수.
+MIN_OUTPUT_TOKENS = 1_024
+
+_TRIM_MARKER = "\n\n…(중략)…\n\n"
+
+
+class PromptTooLargeError(ValueError):
+    """입력 프롬프트가 모델 컨텍스트 윈도우에 들어가지 않을 때 발생한다."""
+
+
+def model_limits(model: str) -> tuple[int, int]:
+    for prefix, limits in MODEL_LIMITS:
+        if model.startswith(prefix):
+            return limits
+    return DEFAULT_LIMITS
+
+
+@lru_cache(maxsize=16)
+def _tiktoken_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def approx_tokens(text: str) -> int:
+    """오프라인 근사: ASCII는 약 4자당 1토큰, 한글 등 비ASCII는 약 1.5자당 1토큰."""
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+def count_tokens(text: str, model: str = "") -> int:
+    if not text:
+        return 0
+    if not model.startswith("claude"):
+        encoding = _tiktoken_encoding(model or "gpt-4o")
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return approx_tokens(text)
+
+
+def choose_max_tokens(model: str, input_tokens: int, stream: bool, context: int | None = None) -> int:
+    """입력 크기에 맞춰 max_tokens를 정한다. 컨텍스트가 부족하면 PromptTooLargeError를 발생시킨다.
+
+    context를 주면(자체 호스팅 서버처럼 모델 표로 알 수 없을 때) 모델 표 대신 그 값을 컨텍스트 윈도우로 쓴다.
+    """
+    if context is None:
+        context, output_cap = model_limits(model)
+    else:
+        output_cap = min(model_limits(model)[1], context)
+    if not stream:
+        output_cap = min(output_cap, NONSTREAMING_OUTPUT_CAP)
+    available = context - input_tokens
+    if available < MIN_OUTPUT_TOKENS:
+        raise PromptTooLargeError(
+            f"프롬프트가 너무 깁니다 (약 {input_tokens:,} 토큰, {model} 한도 {context:,} 토큰)."
+        )
+    return min(output_cap, available)
+
+
+def fit_text(text: str, budget: int, model: str = "") -> str:
+    """text가 budget 토큰을 넘으면 앞부분과 끝부분을 남기고 가운데를 줄인다."""
+    tokens = count_tokens(text, model)
+    if tokens <= budget:
+        return text
+    keep_chars = int(len(text) * budget / tokens) - len(_TRIM_MARKER)
+    if keep_chars <= 0:
+        return ""
+    head = keep_chars * 2 // 3
+    tail = keep_chars - head
+    return text[:head].rstrip() + _TRIM_MARKER + text[len(text) - tail:].lstrip()
@@ -0,0 +1,106 @@
+"""시작 시간과 첫 호출 지연 줄이기 — 지연 import 계측과 provider SDK 백그라운드 예열.
+
+openai / anthropic SDK는 import에만 1초 안팎이 걸린다. 클라이언트 생성 함수 안에서 import하므로
+앱 시작은 가볍지만, 그대로 두면 첫 LLM 호출이 그 비용을 요청 경로에서 치른다.
+prewarm()은 API 키가 저장되는 시점에 백그라운드 스레드에서 SDK import, 동기/비동기 클라이언트 생성,
+토크나이저 로드를 미리 끝내 둔다. 화면 모듈은 timed_import()로 필요할 때 불러오고,
+처음 로드에 걸린 시간을 import_times()로 확인할 수 있다.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from types import ModuleType
+
+from src.config import LLMConfig
+
+_lock = threading.Lock()
+_import_times: dict[str, tuple[float, int]] = {}  # 모듈 -> (처음 로드 시간(초), 함께 로드된 모듈 수)
+_warmups: dict[tuple, Future] = {}  # (provider, api_key, base_url) -> 예열 소요 시간(초)의 Future
+
+
+def timed_import(name: str) -> ModuleType:
+    """모듈을 import하고, 처음 로드되는 경우 걸린 시간을 기록한다."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    loaded_before = len(sys.modules)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        _import_times.setdefault(name, (elapsed, len(sys.modules) - loaded_before))
+    return module
+
+
+def import_times() -> list[tuple[str, float, int]]:
+    """timed_import로 처음 로드한 모듈들의 (이름, 초, 함께 로드된 모듈 수), 오래 걸린 순."""
+    with _lock:
+        items = [(name, sec, count) for name, (sec, count) in _import_times.items()]
+    return sorted(items, key=lambda item: item[1], reverse=True)
+
+
+def _warmup_key(cfg: LLMConfig) -> tuple:
+    return cfg.provider, cfg.api_key.strip(), cfg.base_url or None
+
+
+def prewarm(cfg: LLMConfig) -> Future | None:
+    """cfg의 provider SDK와 클라이언트를 백그라운드에서 미리 준비한다.
+
+    API 키도 base_url도 없으면 None을 반환한다. 같은 (provider, 키, base_url)은 한 번만 예열하며,
+    실패한 예열은 다음 호출 때 다시 시도한다. 반환된 Future의 결과는 소요 시간(초)이다.
+    """
+    if not cfg.is_configured:
+        return None
+    key = _warmup_key(cfg)
+    with _lock:
+        future = _warmups.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            return future
+        future = Future()
+        _warmups[key] = future
+    threading.Thread(target=_prewarm, args=(cfg, future), name="llm-prewarm", daemon=True).start()
+    return future
+
+
+def _prewarm(cfg: LLMConfig, future: Future) -> None:
+    from src import llm_client
+    from src.async_bridge import run_async
+    from src.endpoints import parse_endpoints
+    from src.tokens import count_tokens
+
+    provider, api_key, base_url = _warmup_key(cfg)
+    urls = [url for url, _ in parse_endpoints(base_url)]
+    start = time.perf_counter()
+    try:
+        timed_import(llm_client.PROVIDERS[provider]["sdk"])
+        for url in urls:
+            llm_client.get_client(provider, api_key, url)
+
+        async def make_async_clients() -> None:
+            for url in urls:
+                llm_client.get_async_client(provider, api_key, url)
+
+        run_async(make_async_clients())
+        count_tokens("warmup", cfg.model or llm_client.default_model(provider))
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(time.perf_counter() - start)
+
+
+def warmup_status(cfg: LLMConfig) -> tuple[str, float | None]:
+    """cfg에 대한 예열 상태 ("none" | "running" | "ready" | "failed")와 소요 시간(초)."""
+    with _lock:
+        future = _warmups.get(_warmup_key(cfg))
+    if future is None:
+        return "none", None
+    if not future.done():
+        return "running", None
+    if future.exception() is not None:
+        return "failed", None
+    return "ready", future.result()